@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from schemas.auth_schema import LoginRequest, LoginResponse
 from odoo_client.client import odoo_login
 from config.settings import settings
+from auth.session_store import session_store
+from dependencies.auth_dep import get_odoo_user
+from helper.server_timing import TimedRoute
 import jwt
+import time
 from datetime import datetime, timedelta
 
-router = APIRouter(prefix="/auth", tags=["Auth"])
+router = APIRouter(prefix="/auth", tags=["Auth"], route_class=TimedRoute)
 
 def create_jwt_token(data: dict):
     expire = datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRY_MINUTES)
@@ -21,11 +25,19 @@ def login_user(payload: LoginRequest):
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid Odoo credentials")
 
+    # password cukup disimpan di session server, token hanya membawa sid
+    expires_at = time.time() + settings.JWT_EXPIRY_MINUTES * 60
+    session = session_store.create(uid, payload.username, payload.password, expires_at)
+
     token_data = {
+        "sid": session.sid,
         "uid": uid,
         "username": payload.username,
-        "password": payload.password  # sementara menyimpan password di jwt
     }
 
     token = create_jwt_token(token_data)
     return {"access_token": token}
+
+@router.post("/logout", status_code=204)
+def logout_user(user=Depends(get_odoo_user)):
+    session_store.revoke(user["sid"])
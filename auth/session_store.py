@@ -0,0 +1,206 @@
+import base64
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from config.settings import settings
+from helper.shared_store import shared_store
+
+try:
+    # cryptography ikut terpasang lewat python-jose[cryptography]
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # hanya dibutuhkan kalau SHARED_STORE_DB diisi
+    Fernet = InvalidToken = None
+
+SESSION_NAMESPACE = "session"
+# last_seen di shared store cukup diperbarui sesekali; idle timeout dalam menit
+LAST_SEEN_WRITE_SECONDS = 60.0
+
+
+def _fernet():
+    # password Odoo tidak disimpan plaintext di file shared store
+    if Fernet is None:
+        raise RuntimeError("SHARED_STORE_DB butuh paket cryptography")
+    key = hashlib.sha256(b"session-store:" + settings.JWT_SECRET.encode()).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
+
+
+class Session:
+    __slots__ = ("sid", "uid", "username", "password", "expires_at", "last_seen", "checked_at", "stored_seen")
+
+    def __init__(self, sid: str, uid: int, username: str, password: str, expires_at: float):
+        self.sid = sid
+        self.uid = uid
+        self.username = username
+        self.password = password
+        self.expires_at = expires_at
+        self.last_seen = time.time()
+        self.checked_at = self.last_seen  # terakhir dicocokkan dengan shared store
+        self.stored_seen = self.last_seen  # last_seen yang tersimpan di shared store
+
+    def as_user(self) -> dict:
+        # bentuk dict yang sama seperti dulu supaya router tidak perlu diubah
+        return {
+            "uid": self.uid,
+            "username": self.username,
+            "password": self.password,
+            "sid": self.sid,
+        }
+
+
+class SessionStore:
+    """Registry sesi server-side: token hanya membawa `sid`, kredensial Odoo tetap di server.
+
+    Token yang sudah pernah diverifikasi disimpan di LRU sehingga request
+    berikutnya cukup lookup dict, tanpa cek HMAC ulang.
+
+    Dengan `shared` (multi-worker) sesi juga ditulis ke shared store: worker
+    lain memuatnya saat pertama dipakai, dan salinan lokal dicocokkan ulang
+    paling lambat tiap `recheck` detik supaya logout berlaku di semua worker.
+    Cache token tetap per proses; verifikasi HMAC lebih murah dari lookup
+    ke store.
+    """
+
+    def __init__(self, idle_timeout: float, max_sessions: int, token_cache_size: int,
+                 shared=None, recheck: float = 2.0):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.token_cache_size = token_cache_size
+        self.shared = shared
+        self.recheck = recheck
+        self._cipher = _fernet() if shared is not None else None
+        self._sessions = OrderedDict()  # sid -> Session (urutan = terakhir dipakai)
+        self._verified = OrderedDict()  # token -> (sid, exp)
+        self._lock = threading.Lock()
+        self.stats = {
+            "created": 0, "expired": 0, "revoked": 0, "token_cache_hits": 0, "token_cache_misses": 0,
+            "shared_loads": 0,
+        }
+
+    # -------------------------------------------------------------- shared
+    def _store(self, session: Session):
+        self.shared.set(SESSION_NAMESPACE, session.sid, {
+            "uid": session.uid,
+            "username": session.username,
+            "password": self._cipher.encrypt(session.password.encode()).decode(),
+            "expires_at": session.expires_at,
+            "last_seen": session.last_seen,
+        }, ttl=session.expires_at - time.time())
+        session.stored_seen = session.last_seen
+
+    def _load(self, sid: str, local: Optional[Session]) -> Optional[Session]:
+        data = self.shared.get(SESSION_NAMESPACE, sid)
+        if data is None:
+            return None  # logout / expired di worker lain
+        if local is not None:
+            session = local
+        else:
+            try:
+                password = self._cipher.decrypt(data["password"].encode()).decode()
+            except InvalidToken:
+                return None  # JWT_SECRET sudah diganti: sesi lama tidak berlaku
+            session = Session(sid, data["uid"], data["username"], password, data["expires_at"])
+            self.stats["shared_loads"] += 1
+        session.last_seen = max(session.last_seen if local is not None else 0.0, data["last_seen"])
+        session.stored_seen = data["last_seen"]
+        session.checked_at = time.time()
+        return session
+
+    # ---------------------------------------------------------------- api
+    def create(self, uid: int, username: str, password: str, expires_at: float) -> Session:
+        session = Session(secrets.token_urlsafe(24), uid, username, password, expires_at)
+        if self.shared is not None:
+            self._store(session)
+        with self._lock:
+            self._sessions[session.sid] = session
+            self.stats["created"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats["expired"] += 1
+            purge = self.stats["created"] % 256 == 0
+        if purge:
+            self.purge_expired()
+        return session
+
+    def get(self, sid: str) -> Optional[Session]:
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(sid)
+            if self.shared is not None and (session is None or now - session.checked_at > self.recheck):
+                session = self._load(sid, session)
+                if session is None:
+                    self._sessions.pop(sid, None)
+                    return None
+                self._sessions[sid] = session
+            if session is None:
+                return None
+            if now > session.expires_at or now - session.last_seen > self.idle_timeout:
+                del self._sessions[sid]
+                self.stats["expired"] += 1
+                return None
+            session.last_seen = now
+            self._sessions.move_to_end(sid)
+            if self.shared is not None and now - session.stored_seen > LAST_SEEN_WRITE_SECONDS:
+                self._store(session)
+            return session
+
+    def revoke(self, sid: str):
+        if self.shared is not None:
+            self.shared.delete(SESSION_NAMESPACE, sid)
+        with self._lock:
+            if self._sessions.pop(sid, None) is not None:
+                self.stats["revoked"] += 1
+
+    def cached_token(self, token: str) -> Optional[tuple]:
+        """(sid, exp) untuk token yang sudah pernah lolos verifikasi signature."""
+        with self._lock:
+            entry = self._verified.get(token)
+            if entry is None:
+                self.stats["token_cache_misses"] += 1
+                return None
+            self._verified.move_to_end(token)
+            self.stats["token_cache_hits"] += 1
+            return entry
+
+    def remember_token(self, token: str, sid: str, exp: float):
+        with self._lock:
+            self._verified[token] = (sid, exp)
+            while len(self._verified) > self.token_cache_size:
+                self._verified.popitem(last=False)
+
+    def forget_token(self, token: str):
+        with self._lock:
+            self._verified.pop(token, None)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for sid, session in list(self._sessions.items()):
+                if now > session.expires_at or now - session.last_seen > self.idle_timeout:
+                    del self._sessions[sid]
+                    self.stats["expired"] += 1
+            for token, (_, exp) in list(self._verified.items()):
+                if now > exp:
+                    del self._verified[token]
+        if self.shared is not None:
+            self.shared.purge_expired(SESSION_NAMESPACE)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "sessions": len(self._sessions),
+                "verified_tokens": len(self._verified),
+                "shared": self.shared is not None,
+            }
+
+
+session_store = SessionStore(
+    idle_timeout=settings.SESSION_IDLE_MINUTES * 60,
+    max_sessions=settings.SESSION_MAX,
+    token_cache_size=settings.AUTH_TOKEN_CACHE_SIZE,
+    shared=shared_store,
+    recheck=settings.SESSION_SHARED_RECHECK_SECONDS,
+)
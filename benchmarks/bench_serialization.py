@@ -0,0 +1,110 @@
+"""
+Micro-benchmark serialisasi response list patient & appointment.
+
+Mengukur biaya per record (mikrodetik) dari dict hasil Odoo sampai byte JSON:
+
+  fastapi-classic : validate response_model -> dict -> json.dumps (JSONResponse),
+                    jalur FastAPI versi lama / saat response_class di-set
+  fastapi-current : validate response_model -> dump_json (FastAPI baru)
+  fast            : helper.fast_json.render(), TypeAdapter yang di-cache
+  fast-validated  : render(validated=True) untuk data yang sudah dinormalisasi
+                    (orjson kalau terpasang)
+
+    python -m benchmarks.bench_serialization --iterations 200
+"""
+import argparse
+import base64
+import os
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+
+from helper.fast_json import render, type_adapter, orjson
+from schemas.appointment_schema import AppointmentOut
+from schemas.patient_schema import PatientOutAll
+
+
+def _patients(n=50, image_bytes=6 * 1024):
+    # Odoo 8 mengirim binary sebagai base64 dengan newline tiap 76 karakter
+    image = base64.encodebytes(os.urandom(image_bytes)).decode()
+    return [
+        {
+            "id": i, "name": f"Patient {i}", "date_of_birth": "1990-01-01",
+            "gender": "female", "is_minor": False, "guardian": False,
+            "tag_ids": [1, 2], "image_small": image,
+            "image_url": f"/patients/{i}/image?size=small",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _appointments(n=100):
+    # bentuk setelah attach_appointment_lines()
+    return [
+        {
+            "id": i, "reference": f"APP/{i:05d}", "patient_id": i,
+            "date_appointment": "2025-01-01", "note": False, "state": "draft",
+            "appointment_line_ids": [
+                {"id": i * 3 + k, "product_id": k + 1, "qty": 2.0} for k in range(3)
+            ],
+            "display_name": f"APP/{i:05d}", "total_qty": 6.0, "date_of_birth": "1990-01-01",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+CASES = {
+    "patients": (List[PatientOutAll], _patients),
+    "appointments": (List[AppointmentOut], _appointments),
+}
+
+
+def _methods(tp, records):
+    field = create_model_field(name="Response", type_=tp, mode="serialization")
+    validated = type_adapter(tp).dump_python(type_adapter(tp).validate_python(records), mode="json")
+
+    def fastapi_classic():
+        value, _ = field.validate(records, {}, loc=("response",))
+        return JSONResponse(content=field.serialize(value)).body
+
+    def fastapi_current():
+        value, _ = field.validate(records, {}, loc=("response",))
+        return field.serialize_json(value)
+
+    return {
+        "fastapi-classic": fastapi_classic,
+        "fastapi-current": fastapi_current,
+        "fast": lambda: render(records, tp),
+        "fast-validated": lambda: render(validated, tp, validated=True),
+    }
+
+
+def run(iterations: int):
+    rows = []
+    for name, (tp, factory) in CASES.items():
+        records = factory()
+        for method, fn in _methods(tp, records).items():
+            size = len(fn())  # warm-up
+            start = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            per_record = (time.perf_counter() - start) * 1e6 / iterations / len(records)
+            rows.append((name, method, per_record, size))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if orjson is not None else 'no (json stdlib)'}")
+    print(f"{'endpoint':<14}{'method':<18}{'us/record':>11}{'bytes':>10}")
+    for name, method, per_record, size in run(args.iterations):
+        print(f"{name:<14}{method:<18}{per_record:>11.2f}{size:>10}")
+
+
+if __name__ == "__main__":
+    main()
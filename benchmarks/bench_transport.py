@@ -0,0 +1,133 @@
+"""
+Benchmark XML-RPC vs JSON-RPC untuk endpoint list patient & appointment.
+
+Mode default (offline) memakai payload sintetis yang bentuknya sama dengan
+hasil `search_read` di get_patients / get_appointments, lalu mengukur CPU
+encode request + decode response di sisi client dan jumlah byte di wire.
+
+Mode --live memanggil Odoo sungguhan (ODOO_URL dari .env) dengan OdooModel
+untuk kedua protokol; byte dihitung dari statistik ConnectionPool.
+
+    python -m benchmarks.bench_transport
+    python -m benchmarks.bench_transport --live --username admin --password 1234
+"""
+import argparse
+import base64
+import json
+import os
+import time
+import xmlrpc.client
+
+PATIENT_FIELDS = ['id', 'name', 'date_of_birth', 'gender', 'is_minor', 'guardian', 'tag_ids', 'image_small']
+APPOINTMENT_FIELDS = [
+    'id', 'reference', 'patient_id', 'date_appointment', 'note', 'state',
+    'appointment_line_ids', 'display_name', 'total_qty', 'date_of_birth'
+]
+
+
+def _patients(n=50, image_bytes=6 * 1024):
+    # Odoo 8 mengirim binary sebagai base64 dengan newline tiap 76 karakter
+    image = base64.encodebytes(os.urandom(image_bytes)).decode()
+    return [
+        {
+            "id": i, "name": f"Patient {i}", "date_of_birth": "1990-01-01",
+            "gender": "female", "is_minor": False, "guardian": False,
+            "tag_ids": [1, 2], "image_small": image,
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _appointments(n=100):
+    return [
+        {
+            "id": i, "reference": f"APP/{i:05d}", "patient_id": [i, f"Patient {i}"],
+            "date_appointment": "2025-01-01", "note": False, "state": "draft",
+            "appointment_line_ids": [i * 3, i * 3 + 1, i * 3 + 2],
+            "display_name": f"APP/{i:05d}", "total_qty": 6.0, "date_of_birth": "1990-01-01",
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+CASES = {
+    "patients": ("hospital.patient", PATIENT_FIELDS, 50, _patients),
+    "appointments": ("hospital.appointment", APPOINTMENT_FIELDS, 100, _appointments),
+}
+
+
+def _xmlrpc_codec(args, result):
+    encode = lambda: xmlrpc.client.dumps(args, "execute_kw", allow_none=True).encode()
+    # response dibuat sekali (sisi server), yang diukur hanya decode di client
+    response = xmlrpc.client.dumps((result,), methodresponse=True, allow_none=True).encode()
+    return encode, response, lambda: xmlrpc.client.loads(response)[0][0]
+
+
+def _jsonrpc_codec(args, result):
+    from odoo_client.jsonrpc import encode_call, decode_reply
+    encode = lambda: encode_call("object", "execute_kw", args)
+    response = json.dumps({"jsonrpc": "2.0", "id": 1, "result": result}).encode()
+    return encode, response, lambda: decode_reply(response)
+
+
+def run_offline(iterations: int):
+    rows = []
+    for name, (model, fields, limit, factory) in CASES.items():
+        result = factory()
+        args = ("db", 2, "password", model, "search_read", [[]], {"fields": fields, "limit": limit})
+        for protocol, codec in (("xmlrpc", _xmlrpc_codec), ("jsonrpc", _jsonrpc_codec)):
+            encode, response, decode = codec(args, result)
+            start = time.process_time()
+            for _ in range(iterations):
+                encode()
+                decode()
+            cpu_ms = (time.process_time() - start) * 1000 / iterations
+            rows.append((name, protocol, cpu_ms, len(encode()), len(response)))
+    return rows
+
+
+def run_live(iterations: int, username: str, password: str):
+    from config.settings import settings
+    from odoo_client.base_model import OdooModel
+    from odoo_client.client import odoo_login
+    from odoo_client.transport import get_pool
+
+    rows = []
+    for protocol in ("xmlrpc", "jsonrpc"):
+        settings.ODOO_PROTOCOL = protocol
+        uid = odoo_login(username, password)
+        for name, (model, fields, limit, _) in CASES.items():
+            odoo_model = OdooModel(model, uid, username, password)
+            odoo_model.search_read(fields=fields, limit=limit)  # warm-up koneksi
+            before = dict(get_pool().stats)
+            start = time.process_time()
+            for _ in range(iterations):
+                odoo_model.search_read(fields=fields, limit=limit)
+            cpu_ms = (time.process_time() - start) * 1000 / iterations
+            stats = get_pool().stats
+            sent = (stats["bytes_sent"] - before["bytes_sent"]) // iterations
+            received = (stats["bytes_received"] - before["bytes_received"]) // iterations
+            rows.append((name, protocol, cpu_ms, sent, received))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--live", action="store_true", help="pakai Odoo dari ODOO_URL")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="1234")
+    args = parser.parse_args()
+
+    if args.live:
+        rows = run_live(args.iterations, args.username, args.password)
+    else:
+        rows = run_offline(args.iterations)
+
+    print(f"{'endpoint':<14}{'protocol':<10}{'cpu/call (ms)':>15}{'request (B)':>14}{'response (B)':>15}")
+    for name, protocol, cpu_ms, sent, received in rows:
+        print(f"{name:<14}{protocol:<10}{cpu_ms:>15.3f}{sent:>14}{received:>15}")
+
+
+if __name__ == "__main__":
+    main()
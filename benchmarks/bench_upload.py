@@ -0,0 +1,149 @@
+"""
+Benchmark pipeline upload gambar patient: inline di event loop vs process pool.
+
+Mode default (offline) memproses N foto sintetis dengan konkurensi C dan
+mengukur throughput, latency per upload (p50/p95) serta lag event loop
+terbesar (heartbeat tiap 5 ms) -- lag inilah yang dirasakan request lain
+selama upload berjalan.
+
+  inline   : decode/resize/base64 langsung di coroutine (perilaku lama + resize)
+  pipeline : prepare_image_upload() -> ProcessPoolExecutor
+
+Mode --live mengirim upload sungguhan ke PUT /patients/{id} pada API yang
+sedang berjalan.
+
+    python -m benchmarks.bench_upload --uploads 32 --concurrency 8
+    python -m benchmarks.bench_upload --live --base-url http://localhost:8002 --patient-id 1
+"""
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import time
+
+from fastapi import UploadFile
+
+
+def _photo(width: int, height: int) -> bytes:
+    """Foto JPEG sintetis seukuran kamera HP; tanpa Pillow pakai byte acak."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return b"\xff\xd8\xff\xe0" + os.urandom(width * height // 4)
+    out = io.BytesIO()
+    Image.effect_noise((width, height), 40).convert("RGB").save(out, format="JPEG", quality=85)
+    return out.getvalue()
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _heartbeat(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def _run(handler, photos: list, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(stop, lags))
+
+    async def one(data):
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(data)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(data) for data in photos))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, latencies, max(lags, default=0.0)
+
+
+def run_offline(uploads: int, concurrency: int, width: int, height: int):
+    from config.settings import settings
+    from helper.image_pipeline import prepare_image_upload, process_image, get_image_pool, close_image_pool
+
+    photo = _photo(width, height)
+    photos = [photo] * uploads
+
+    async def inline(data):
+        upload = UploadFile(io.BytesIO(data), size=len(data))
+        content = await upload.read()
+        process_image(content, settings.PATIENT_IMAGE_MAX_DIMENSION)
+
+    async def pipeline(data):
+        await prepare_image_upload(UploadFile(io.BytesIO(data), size=len(data)))
+
+    rows = []
+    get_image_pool().submit(int).result()  # start worker process dulu
+    for name, handler in (("inline", inline), ("pipeline", pipeline)):
+        rows.append((name, *asyncio.run(_run(handler, photos, concurrency))))
+    close_image_pool()
+    return len(photo), rows
+
+
+def run_live(uploads: int, concurrency: int, width: int, height: int,
+             base_url: str, patient_id: int, username: str, password: str):
+    import httpx
+
+    photo = _photo(width, height)
+
+    async def main():
+        async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+            token = (await client.post("/auth/login", json={"username": username, "password": password})).json()
+            headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+            async def upload(data):
+                response = await client.put(
+                    f"/patients/{patient_id}", headers=headers,
+                    files={"image": ("photo.jpg", data, "image/jpeg")},
+                )
+                response.raise_for_status()
+
+            return await _run(upload, [photo] * uploads, concurrency)
+
+    return len(photo), [("live", *asyncio.run(main()))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--live", action="store_true", help="upload ke API yang sedang berjalan")
+    parser.add_argument("--base-url", default="http://localhost:8002")
+    parser.add_argument("--patient-id", type=int, default=1)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="1234")
+    args = parser.parse_args()
+
+    if args.live:
+        size, rows = run_live(
+            args.uploads, args.concurrency, args.width, args.height,
+            args.base_url, args.patient_id, args.username, args.password,
+        )
+    else:
+        size, rows = run_offline(args.uploads, args.concurrency, args.width, args.height)
+
+    print(f"photo {args.width}x{args.height} = {size} bytes, {args.uploads} uploads, concurrency {args.concurrency}")
+    print(f"{'mode':<10}{'uploads/s':>11}{'p50 (ms)':>11}{'p95 (ms)':>11}{'max loop lag (ms)':>19}")
+    for name, elapsed, latencies, max_lag in rows:
+        print(
+            f"{name:<10}{len(latencies) / elapsed:>11.1f}"
+            f"{statistics.median(latencies) * 1000:>11.1f}{_percentile(latencies, 95) * 1000:>11.1f}"
+            f"{max_lag * 1000:>19.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from typing import Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -7,6 +8,150 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRY_MINUTES: int = 60
 
+    # Session server-side (token JWT hanya membawa sid)
+    SESSION_IDLE_MINUTES: int = 30
+    SESSION_MAX: int = 100000
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    # Multi-worker: sesi dibaca ulang dari shared store paling lambat tiap N detik
+    # (logout di worker lain terlihat dalam waktu ini)
+    SESSION_SHARED_RECHECK_SECONDS: float = 2.0
+
+    # Store SQLite bersama antar worker (sesi, fleet index, geocode, lease);
+    # kosong = semua cache per proses. serve.py mengisinya otomatis kalau workers > 1
+    SHARED_STORE_DB: Optional[str] = None
+    # serve.py: 0 = diturunkan dari jumlah CPU
+    WEB_WORKERS: int = 0
+    WEB_THREADS: int = 0
+
+    # Protokol ke Odoo: "xmlrpc" (/xmlrpc/2/*) atau "jsonrpc" (/jsonrpc)
+    ODOO_PROTOCOL: Literal["xmlrpc", "jsonrpc"] = "xmlrpc"
+
+    # Akun service (opsional) untuk warm-up cache saat startup
+    ODOO_SERVICE_USERNAME: Optional[str] = None
+    ODOO_SERVICE_PASSWORD: Optional[str] = None
+
+    # Pool koneksi keep-alive ke Odoo (dipakai bersama semua OdooModel)
+    ODOO_POOL_SIZE: int = 10
+    ODOO_POOL_IDLE_TIMEOUT: float = 60.0
+    # AsyncOdooModel: batas koneksi paralel & ukuran payload yang di-offload ke thread
+    ODOO_ASYNC_MAX_CONNECTIONS: int = 20
+    ODOO_ASYNC_OFFLOAD_BYTES: int = 64 * 1024
+    # Window (ms) penggabungan `read` lintas request; 0 = nonaktif
+    ODOO_READ_COALESCE_MS: float = 0
+    # Header Server-Timing (odoo/geocode/serialize) di setiap response; /metrics selalu aktif
+    SERVER_TIMING_HEADER: bool = False
+    # Deteksi pola N+1 (model.method yang sama >= threshold kali per request, <= 1 record per call)
+    RPC_N_PLUS_ONE_DETECTION: bool = False
+    RPC_N_PLUS_ONE_THRESHOLD: int = 3
+    # Cache hasil search_read/read/search per uid; di-invalidate saat create/write/unlink
+    RESULT_CACHE_ENABLED: bool = False
+    RESULT_CACHE_SIZE: int = 10000
+    # TTL (detik) per model; model yang tidak ada di sini tidak di-cache
+    RESULT_CACHE_TTLS: Dict[str, float] = {
+        "res.partner": 60.0,
+        "hospital.patient": 30.0,
+        "hospital.appointment": 10.0,
+        "hospital.appointment.line": 10.0,
+        "vehicle.fleet": 30.0,
+    }
+    # Batas RPC paralel ke Odoo yang adaptif (AIMD terhadap target latency);
+    # request yang antre lebih lama dari QUEUE_TIMEOUT dapat 503 + Retry-After
+    ODOO_LIMITER_ENABLED: bool = False
+    ODOO_LIMITER_INITIAL: int = 10
+    ODOO_LIMITER_MIN: int = 2
+    ODOO_LIMITER_MAX: int = 50
+    ODOO_LIMITER_TARGET_LATENCY: float = 0.5
+    ODOO_LIMITER_QUEUE_TIMEOUT: float = 5.0
+    # Circuit breaker: buka kalau rasio error transport / RPC lambat dalam WINDOW detik terlalu tinggi
+    ODOO_BREAKER_ENABLED: bool = False
+    ODOO_BREAKER_WINDOW: float = 30.0
+    ODOO_BREAKER_MIN_CALLS: int = 20
+    ODOO_BREAKER_ERROR_RATIO: float = 0.5
+    ODOO_BREAKER_SLOW_CALL_SECONDS: float = 5.0
+    ODOO_BREAKER_SLOW_RATIO: float = 0.8
+    ODOO_BREAKER_OPEN_SECONDS: float = 15.0
+    ODOO_BREAKER_HALF_OPEN_CALLS: int = 3
+    # Deadline per request (detik), diteruskan sebagai timeout setiap RPC / geocode.
+    # Override per "METHOD /route" di REQUEST_TIMEOUTS; client boleh minta lebih
+    # pendek/panjang lewat header X-Request-Timeout (maks. REQUEST_TIMEOUT_MAX)
+    REQUEST_TIMEOUT: float = 30.0
+    REQUEST_TIMEOUT_MAX: float = 120.0
+    REQUEST_TIMEOUTS: Dict[str, float] = {
+        "POST /vehicle/karlo-update/bulk/": 60.0,
+        "GET /vehicle/{nopol}": 10.0,
+    }
+    # Batas satu RPC walau tanpa deadline request (mis. worker antrian)
+    ODOO_RPC_TIMEOUT: float = 30.0
+    # Hedged read: search/read/search_read yang melewati p95-nya dikirim ulang
+    # sekali, hasil yang lebih dulu datang dipakai
+    ODOO_HEDGE_ENABLED: bool = False
+    ODOO_HEDGE_QUANTILE: float = 0.95
+    ODOO_HEDGE_MIN_SAMPLES: int = 50
+    ODOO_HEDGE_MIN_DELAY: float = 0.01
+    ODOO_HEDGE_MAX_RATIO: float = 0.1  # maks. RPC tambahan per RPC read
+    ODOO_HEDGE_WORKERS: int = 32  # thread untuk RPC backup (primary sync jalan di thread caller)
+
+    # Reverse geocode (Nominatim) + cache per koordinat yang dibulatkan
+    NOMINATIM_URL: str = "https://app-nominatim.sibasurya.com/reverse"
+    GEOCODE_TIMEOUT: float = 5.0
+    GEOCODE_CACHE_PRECISION: int = 4  # 4 desimal ~ 11 meter
+    GEOCODE_CACHE_SIZE: int = 10000
+    GEOCODE_CACHE_TTL: float = 7 * 24 * 3600
+    GEOCODE_CACHE_DB: Optional[str] = None  # path SQLite, kosong = SHARED_STORE_DB / in-memory saja
+
+    # Ingestion Karlo: "sync" (langsung ke Odoo) atau "queue" (202 + worker background)
+    KARLO_INGEST_MODE: Literal["sync", "queue"] = "sync"
+    KARLO_QUEUE_SIZE: int = 5000
+    KARLO_QUEUE_WORKERS: int = 8
+    # Endpoint bulk: maksimal fix per request & RPC/geocode paralel per request
+    KARLO_BULK_MAX_ITEMS: int = 1000
+    KARLO_BULK_CONCURRENCY: int = 8
+
+    # Sync inkremental (replica, fleet index, appointment view) membaca ulang
+    # `write_date >= watermark - OVERLAP` supaya commit yang telat tidak terlewat
+    SYNC_WATERMARK_OVERLAP_SECONDS: float = 120.0
+
+    # Index nopol -> fleet id; daftar fleet yang boleh dibaca per uid (cek akses
+    # endpoint tulis) ikut dimuat ulang tiap FLEET_INDEX_REFRESH_SECONDS
+    FLEET_INDEX_REFRESH_SECONDS: float = 60.0
+    FLEET_INDEX_RELOAD_SECONDS: float = 3600.0
+    # Posisi terakhir per fleet dari ingestion (+ seed saat startup) untuk GET /vehicle/{nopol};
+    # entry yang tidak dikonfirmasi ingestion / Odoo selama MAX_AGE detik dibaca ulang ke Odoo.
+    # Akses dicek per uid lewat daftar fleet yang boleh dibaca (di-refresh tiap FLEET_INDEX_REFRESH_SECONDS)
+    POSITION_STORE_ENABLED: bool = False
+    POSITION_STORE_MAX_AGE: float = 300.0
+
+    # List endpoint: batas per halaman & ukuran chunk export NDJSON
+    LIST_MAX_LIMIT: int = 500
+    EXPORT_CHUNK_SIZE: int = 200
+    # Serialisasi list lewat TypeAdapter yang di-cache (+ orjson kalau ada)
+    FAST_JSON_RESPONSES: bool = False
+
+    # Materialized view appointment + line (per uid) untuk GET /appointments/
+    APPOINTMENT_VIEW_ENABLED: bool = False
+    APPOINTMENT_VIEW_MAX_STALENESS: float = 5.0
+    APPOINTMENT_VIEW_RELOAD_SECONDS: float = 600.0
+    APPOINTMENT_VIEW_MAX_USERS: int = 16
+
+    # Replica SQLite (butuh akun service); endpoint GET membaca dari sini kalau aktif.
+    # Data dibaca dengan akun service dan dilayani ke semua user (record rule / ACL
+    # Odoo dilewati), jadi hanya model di REPLICA_MODELS yang direplikasi: isi hanya
+    # dengan model yang boleh dibaca semua user API, mis. ["res.partner"]
+    REPLICA_ENABLED: bool = False
+    REPLICA_MODELS: List[str] = []
+    REPLICA_DB: str = ".cache/replica.sqlite3"
+    REPLICA_SYNC_SECONDS: float = 10.0
+    REPLICA_RECONCILE_SECONDS: float = 600.0
+
+    # Gambar patient: cache disk content-addressed + window revalidasi ke Odoo
+    PATIENT_IMAGE_CACHE_DIR: str = ".cache/patient_images"
+    PATIENT_IMAGE_REVALIDATE_SECONDS: float = 30.0
+    # Upload gambar: batas ukuran, resize ke ukuran `image` Odoo 8, worker process
+    PATIENT_IMAGE_MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    PATIENT_IMAGE_MAX_DIMENSION: int = 1024
+    PATIENT_IMAGE_JPEG_QUALITY: int = 85
+    IMAGE_PROCESS_WORKERS: int = 2
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,2 @@
+# fixture odoo_standin / api_client / rpc_recorder untuk tests/
+pytest_plugins = ["loadtest.pytest_plugin"]
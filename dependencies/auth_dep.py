@@ -1,21 +1,36 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
+import time
 from config.settings import settings
+from auth.session_store import session_store
 
 bearer_scheme = HTTPBearer()
 
 def get_odoo_user(
     token: HTTPAuthorizationCredentials = Depends(bearer_scheme)
 ) -> dict:
-    try:
-        payload = jwt.decode(token.credentials, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        return {
-            "uid": payload["uid"],
-            "username": payload["username"],
-            "password": payload["password"]
-        }
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    # token yang sudah pernah diverifikasi tidak perlu cek HMAC lagi
+    cached = session_store.cached_token(token.credentials)
+    if cached is None:
+        try:
+            payload = jwt.decode(token.credentials, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expired")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        if "sid" not in payload:
+            raise HTTPException(status_code=401, detail="Invalid token")
+        sid, exp = payload["sid"], payload["exp"]
+        session_store.remember_token(token.credentials, sid, exp)
+    else:
+        sid, exp = cached
+        if time.time() > exp:
+            session_store.forget_token(token.credentials)
+            raise HTTPException(status_code=401, detail="Token expired")
+
+    session = session_store.get(sid)
+    if session is None:
+        session_store.forget_token(token.credentials)
+        raise HTTPException(status_code=401, detail="Session expired")
+    return session.as_user()
@@ -0,0 +1,280 @@
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from pydantic import ValidationError
+from config.settings import settings
+from odoo_client import signals
+from helper.helper import rewind_watermark
+from schemas.appointment_schema import AppointmentOut
+
+logger = logging.getLogger(__name__)
+
+APPOINTMENT_MODEL = "hospital.appointment"
+LINE_MODEL = "hospital.appointment.line"
+VIEW_APPOINTMENT_FIELDS = [
+    'id', 'reference', 'patient_id', 'date_appointment', 'note', 'state',
+    'display_name', 'total_qty', 'date_of_birth', 'write_date'
+]
+VIEW_LINE_FIELDS = ['id', 'appointment_id', 'product_id', 'qty', 'write_date']
+
+
+def _m2o_id(value):
+    return value[0] if isinstance(value, (list, tuple)) else (value or None)
+
+
+class AppointmentView:
+    """Materialized view appointment + line-nya untuk satu user Odoo.
+
+    Setelah bulk load, view di-refresh inkremental dengan polling
+    `write_date >= watermark` di kedua model, paling lama setiap
+    `max_staleness` detik. Perubahan lewat API ini (hook `signals`) membuat
+    read berikutnya langsung refresh. Delete dari luar API baru terlihat
+    saat full reload (`reload_interval`).
+    Baris disimpan dalam bentuk AppointmentOut yang sudah divalidasi.
+    """
+
+    def __init__(self, max_staleness: float, reload_interval: float):
+        self.max_staleness = max_staleness
+        self.reload_interval = reload_interval
+        self._appointments = {}  # id -> record appointment dari Odoo
+        self._lines = {}  # line id -> {"id", "product_id", "qty", "appointment_id"}
+        self._lines_by_appt = {}  # appointment id -> set(line id)
+        self._rows = {}  # appointment id -> row AppointmentOut (mode json)
+        self._order = []  # id terurut untuk keyset pagination
+        self._watermarks = {APPOINTMENT_MODEL: None, LINE_MODEL: None}
+        self._pending = set()  # appointment yang harus dibaca ulang penuh (record + line)
+        self._dirty = False
+        self._loaded = False
+        self._last_refresh = 0.0
+        self._last_reload = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.stats = {"reads": 0, "refreshes": 0, "reloads": 0, "invalidations": 0, "invalid_rows": 0}
+
+    # -------------------------------------------------------------- refresh
+    def _refresh_kind(self) -> Optional[bool]:
+        """None kalau masih segar, True untuk full reload, False untuk inkremental."""
+        now = time.monotonic()
+        with self._lock:
+            if not self._loaded or now - self._last_reload > self.reload_interval:
+                return True
+            if self._dirty or self._pending or now - self._last_refresh > self.max_staleness:
+                return False
+            return None
+
+    def ensure_fresh(self, appointment_model, line_model):
+        """Refresh kalau perlu; caller lain menunggu supaya batas staleness terjaga."""
+        if self._refresh_kind() is None:
+            return
+        with self._refresh_lock:
+            full = self._refresh_kind()
+            if full is not None:
+                self._refresh(full, appointment_model, line_model)
+
+    def _domain(self, model: str) -> list:
+        # >= plus overlap supaya write di detik yang sama / commit yang telat tidak terlewat
+        watermark = rewind_watermark(self._watermarks[model], settings.SYNC_WATERMARK_OVERLAP_SECONDS)
+        return [('write_date', '>=', watermark)] if watermark else []
+
+    def _refresh(self, full: bool, appointment_model, line_model):
+        with self._lock:
+            self._dirty = False
+            pending, self._pending = self._pending, set()
+        try:
+            if full:
+                pending = set()
+                appointments = appointment_model.search_read(domain=[], fields=VIEW_APPOINTMENT_FIELDS, limit=None)
+                lines = line_model.search_read(domain=[], fields=VIEW_LINE_FIELDS, limit=None)
+            else:
+                appointments = appointment_model.search_read(
+                    domain=self._domain(APPOINTMENT_MODEL), fields=VIEW_APPOINTMENT_FIELDS, limit=None
+                )
+                lines = line_model.search_read(domain=self._domain(LINE_MODEL), fields=VIEW_LINE_FIELDS, limit=None)
+                if pending:
+                    lines += line_model.search_read(
+                        domain=[('appointment_id', 'in', list(pending))], fields=VIEW_LINE_FIELDS, limit=None
+                    )
+                    # line bisa kembali dari dua query (overlap watermark + pending)
+                    lines = list({line["id"]: line for line in lines}.values())
+                # appointment yang line-nya berubah ikut dibaca ulang (total_qty dsb.)
+                reread = set(pending)
+                with self._lock:
+                    for line in lines:
+                        reread.add(_m2o_id(line.get("appointment_id")))
+                        old = self._lines.get(line["id"])
+                        if old:
+                            reread.add(old["appointment_id"])
+                reread -= {appt["id"] for appt in appointments}
+                reread.discard(None)
+                if reread:
+                    appointments += appointment_model.search_read(
+                        domain=[('id', 'in', list(reread))], fields=VIEW_APPOINTMENT_FIELDS, limit=None
+                    )
+        except Exception:
+            with self._lock:
+                self._dirty = True
+                self._pending |= pending
+            raise
+        self._apply(full, appointments, lines, pending)
+
+    def _apply(self, full: bool, appointments: list, lines: list, pending: set):
+        now = time.monotonic()
+        with self._lock:
+            if full:
+                self._appointments, self._lines, self._lines_by_appt, self._rows = {}, {}, {}, {}
+                self._watermarks = {APPOINTMENT_MODEL: None, LINE_MODEL: None}
+            touched = set(pending)
+
+            # appointment pending yang tidak kembali dari Odoo = sudah dihapus
+            returned = {appt["id"] for appt in appointments}
+            for appt_id in pending - returned:
+                self._appointments.pop(appt_id, None)
+            for appt_id in pending:
+                for line_id in self._lines_by_appt.pop(appt_id, set()):
+                    self._lines.pop(line_id, None)
+
+            for appt in appointments:
+                self._appointments[appt["id"]] = appt
+                touched.add(appt["id"])
+                self._advance(APPOINTMENT_MODEL, appt.get("write_date"))
+
+            for line in lines:
+                appt_id = _m2o_id(line.get("appointment_id"))
+                old = self._lines.get(line["id"])
+                if old and old["appointment_id"] != appt_id:
+                    self._lines_by_appt.get(old["appointment_id"], set()).discard(line["id"])
+                    touched.add(old["appointment_id"])
+                self._lines[line["id"]] = {
+                    "id": line["id"],
+                    "product_id": _m2o_id(line.get("product_id")),
+                    "qty": line.get("qty"),
+                    "appointment_id": appt_id,
+                }
+                self._lines_by_appt.setdefault(appt_id, set()).add(line["id"])
+                touched.add(appt_id)
+                self._advance(LINE_MODEL, line.get("write_date"))
+
+            before = len(self._rows)
+            for appt_id in touched:
+                self._rebuild(appt_id)
+            if full or len(self._rows) != before or touched - set(self._order):
+                self._order = sorted(self._rows)
+
+            self._loaded = True
+            self._last_refresh = now
+            self.stats["refreshes"] += 1
+            if full:
+                self._last_reload = now
+                self.stats["reloads"] += 1
+
+    def _advance(self, model: str, write_date):
+        if write_date and (self._watermarks[model] is None or write_date > self._watermarks[model]):
+            self._watermarks[model] = write_date
+
+    def _rebuild(self, appt_id):
+        appt = self._appointments.get(appt_id)
+        if appt is None:
+            self._rows.pop(appt_id, None)
+            return
+        line_ids = sorted(self._lines_by_appt.get(appt_id, ()))
+        record = {
+            **{name: appt.get(name) for name in VIEW_APPOINTMENT_FIELDS if name != 'write_date'},
+            "patient_id": _m2o_id(appt.get("patient_id")),
+            "appointment_line_ids": [
+                {"id": line_id, "product_id": self._lines[line_id]["product_id"], "qty": self._lines[line_id]["qty"]}
+                for line_id in line_ids
+            ],
+        }
+        try:
+            self._rows[appt_id] = AppointmentOut.model_validate(record).model_dump(mode="json")
+        except ValidationError:
+            # record yang tidak lolos schema tidak ikut di-serve dari view
+            self._rows.pop(appt_id, None)
+            self.stats["invalid_rows"] += 1
+            logger.warning("Appointment %s tidak valid untuk AppointmentOut", appt_id)
+
+    # ------------------------------------------------------------ invalidasi
+    def on_change(self, model: str, operation: str, ids: list):
+        with self._lock:
+            self.stats["invalidations"] += 1
+            if model == APPOINTMENT_MODEL and operation == "unlink":
+                for appt_id in ids:
+                    self._appointments.pop(appt_id, None)
+                    self._rows.pop(appt_id, None)
+                    for line_id in self._lines_by_appt.pop(appt_id, set()):
+                        self._lines.pop(line_id, None)
+                self._order = sorted(self._rows)
+            elif model == APPOINTMENT_MODEL and operation == "write":
+                # write bisa membawa command line (tambah/hapus), baca ulang penuh
+                self._pending.update(ids)
+            elif model == LINE_MODEL and operation == "unlink":
+                for line_id in ids:
+                    line = self._lines.get(line_id)
+                    if line:
+                        self._pending.add(line["appointment_id"])
+            else:
+                self._dirty = True
+
+    # ----------------------------------------------------------------- read
+    def page(self, after_id: Optional[int], limit: int) -> list:
+        with self._lock:
+            self.stats["reads"] += 1
+            start = bisect.bisect_right(self._order, after_id) if after_id is not None else 0
+            return [self._rows[appt_id] for appt_id in self._order[start:start + limit]]
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                **self.stats,
+                "appointments": len(self._rows),
+                "lines": len(self._lines),
+                "watermarks": dict(self._watermarks),
+                "age_seconds": round(now - self._last_refresh, 3) if self._loaded else None,
+                "dirty": self._dirty or bool(self._pending),
+            }
+
+
+class AppointmentViews:
+    """Satu AppointmentView per uid (hak akses Odoo bisa beda per user), LRU."""
+
+    def __init__(self, max_users: int, max_staleness: float, reload_interval: float):
+        self.max_users = max_users
+        self.max_staleness = max_staleness
+        self.reload_interval = reload_interval
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+        signals.connect(APPOINTMENT_MODEL, self._on_change)
+        signals.connect(LINE_MODEL, self._on_change)
+
+    def for_user(self, uid: int) -> AppointmentView:
+        with self._lock:
+            view = self._views.get(uid)
+            if view is None:
+                view = AppointmentView(self.max_staleness, self.reload_interval)
+                self._views[uid] = view
+                while len(self._views) > self.max_users:
+                    self._views.popitem(last=False)
+            self._views.move_to_end(uid)
+            return view
+
+    def _on_change(self, model: str, operation: str, ids: list):
+        with self._lock:
+            views = list(self._views.values())
+        for view in views:
+            view.on_change(model, operation, ids)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            views = dict(self._views)
+        return {"users": {uid: view.snapshot() for uid, view in views.items()}}
+
+
+appointment_views = AppointmentViews(
+    max_users=settings.APPOINTMENT_VIEW_MAX_USERS,
+    max_staleness=settings.APPOINTMENT_VIEW_MAX_STALENESS,
+    reload_interval=settings.APPOINTMENT_VIEW_RELOAD_SECONDS,
+)
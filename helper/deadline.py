@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from config.settings import settings
+from odoo_client.deadline import set_deadline, reset_deadline
+
+HEADER = b"x-request-timeout"
+
+# timeout (detik) yang diminta client lewat header, berlaku untuk request ini saja
+_requested_timeout: ContextVar[Optional[float]] = ContextVar("requested_timeout", default=None)
+
+
+def parse_timeout(value: bytes) -> Optional[float]:
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    if not seconds > 0:  # juga menolak NaN
+        return None
+    return min(seconds, settings.REQUEST_TIMEOUT_MAX)
+
+
+def route_timeout(method: str, path: str) -> float:
+    return settings.REQUEST_TIMEOUTS.get(f"{method} {path}", settings.REQUEST_TIMEOUT)
+
+
+@contextmanager
+def request_deadline(timeout: float):
+    """Deadline selama handler berjalan: header client kalau ada, selain itu `timeout` route."""
+    requested = _requested_timeout.get()
+    token = set_deadline(requested if requested is not None else timeout)
+    try:
+        yield
+    finally:
+        reset_deadline(token)
+
+
+class DeadlineMiddleware:
+    """Baca header X-Request-Timeout; deadline-nya sendiri dipasang TimedRoute."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        requested = None
+        for name, value in scope.get("headers", []):
+            if name == HEADER:
+                requested = parse_timeout(value)
+                break
+        token = _requested_timeout.set(requested)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _requested_timeout.reset(token)
@@ -0,0 +1,53 @@
+import hashlib
+import threading
+from typing import Optional
+from fastapi import Response
+
+
+def make_etag(*parts) -> str:
+    """ETag kuat dari bagian-bagian versi record, mis. (model, id, __last_update)."""
+    raw = "|".join(str(part) for part in parts)
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Cek header If-None-Match (boleh daftar, `*`, atau weak `W/`)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(etag: str, headers: Optional[dict] = None) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+class ConditionalStats:
+    """Hitung request conditional per endpoint dan berapa yang selesai dengan 304."""
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, not_modified: bool):
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, {"requests": 0, "not_modified": 0})
+            counts["requests"] += 1
+            counts["not_modified"] += int(not_modified)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                endpoint: {**counts, "hit_ratio": round(counts["not_modified"] / counts["requests"], 4)}
+                for endpoint, counts in self._counts.items()
+            }
+
+
+etag_stats = ConditionalStats()
@@ -0,0 +1,43 @@
+import json
+import time
+from functools import lru_cache
+from typing import Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+from odoo_client.instrumentation import record_timing
+
+try:
+    import orjson
+except ImportError:  # orjson opsional, fallback ke json stdlib
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp) -> TypeAdapter:
+    """TypeAdapter per tipe response, dibuat sekali lalu dipakai ulang."""
+    return TypeAdapter(tp)
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def render(data, tp, validated: bool = False) -> bytes:
+    """Validasi + serialisasi dalam satu langkah di pydantic-core.
+
+    `validated=True` untuk data yang sudah dinormalisasi sebelumnya (hasil
+    `model_dump(mode="json")`): validasi dilewati dan langsung di-encode.
+    """
+    if validated:
+        return dumps(data)
+    adapter = type_adapter(tp)
+    return adapter.dump_json(adapter.validate_python(data))
+
+
+def fast_json_response(data, tp, validated: bool = False, headers: Optional[dict] = None) -> Response:
+    start = time.perf_counter()
+    content = render(data, tp, validated)
+    record_timing("serialize", time.perf_counter() - start)
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,347 @@
+import threading
+import time
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from config.settings import settings
+from helper.shared_store import shared_store
+from helper.helper import rewind_watermark
+
+FLEET_FIELDS = ['id', 'nopol', 'head_id', 'write_date']
+SHARED_NAMESPACE = "fleet_index"
+
+
+class FleetIndex:
+    """Index lokal vehicle.fleet: nopol <-> id, plus head_id.
+
+    Di-load sekali secara bulk, lalu di-refresh inkremental berdasarkan
+    `write_date`. Hanya satu caller yang menjalankan refresh; caller lain
+    tetap memakai data lama, dan nopol yang belum ada dicari ke Odoo.
+
+    Dengan `shared` (multi-worker) refresh ke Odoo dijalankan satu worker
+    per interval (lewat lease); hasilnya dipublikasikan sebagai snapshot
+    yang dimuat worker lain tanpa RPC.
+
+    Index dimuat dengan akun service / kredensial caller pertama, jadi
+    isinya bukan hak akses: sebelum menulis atau membaca atas nama user,
+    cek `readable()` (id fleet yang boleh dibaca uid itu menurut Odoo).
+    """
+
+    def __init__(self, refresh_interval: float, reload_interval: float, shared=None):
+        self.refresh_interval = refresh_interval
+        self.reload_interval = reload_interval
+        self.shared = shared
+        self._version = 0  # versi snapshot shared yang sedang dipakai
+        self._by_nopol = {}
+        self._by_id = {}
+        self._watermark = None
+        self._last_refresh = 0.0
+        self._last_reload = 0.0
+        self._refreshing = False
+        self._readable = {}  # uid -> (frozenset id fleet yang boleh dibaca, waktu load)
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0, "misses": 0, "fallback_hits": 0, "refreshes": 0, "reloads": 0, "shared_loads": 0,
+            "access_loads": 0, "access_denied": 0,
+        }
+
+    # ---------------------------------------------------------------- state
+    def _apply(self, records: list, full: bool = False) -> bool:
+        """Terapkan record ke index; return True kalau ada entry yang berubah."""
+        changed = full
+        with self._lock:
+            if full:
+                self._by_nopol, self._by_id = {}, {}
+            for rec in records:
+                old = self._by_id.get(rec["id"])
+                if old and old["nopol"] != rec.get("nopol"):
+                    self._by_nopol.pop(old["nopol"], None)
+                head = rec.get("head_id")
+                entry = {
+                    "id": rec["id"],
+                    "nopol": rec.get("nopol"),
+                    "head_id": head[0] if head else None,
+                    "head_name": head[1] if head else None,
+                }
+                changed = changed or entry != old
+                self._by_id[rec["id"]] = entry
+                if entry["nopol"]:
+                    self._by_nopol[entry["nopol"]] = rec["id"]
+                write_date = rec.get("write_date")
+                if write_date and (self._watermark is None or write_date > self._watermark):
+                    self._watermark = write_date
+        return changed
+
+    def _claim_refresh(self, force: bool = False) -> Optional[bool]:
+        """Return None kalau belum waktunya, True untuk full reload, False untuk inkremental."""
+        now = time.monotonic()
+        with self._lock:
+            if self._refreshing:
+                return None
+            full = force or self._watermark is None or now - self._last_reload > self.reload_interval
+            if not full and now - self._last_refresh < self.refresh_interval:
+                return None
+            self._refreshing = True
+        if self.shared is None:
+            return full
+        try:
+            full = self._claim_shared(force)
+        except Exception:
+            self._finish_refresh(False, None)
+            raise
+        if full is None:
+            with self._lock:
+                self._refreshing = False
+                self._last_refresh = now
+        return full
+
+    def _claim_shared(self, force: bool) -> Optional[bool]:
+        """Versi multi-worker: pakai snapshot worker lain kalau masih segar."""
+        deadline = time.time() + (self.refresh_interval if force else 0)
+        while True:
+            state = self._sync_shared()
+            if state is not None and time.time() - state["refreshed_at"] < self.refresh_interval:
+                return None
+            if self.shared.acquire_lease(SHARED_NAMESPACE, self.refresh_interval):
+                return (
+                    state is None or self._watermark is None
+                    or time.time() - state["reloaded_at"] > self.reload_interval
+                )
+            # worker lain sedang refresh; saat startup tunggu hasilnya daripada ikut bulk load
+            if time.time() >= deadline:
+                return None
+            time.sleep(0.2)
+
+    def _sync_shared(self) -> Optional[dict]:
+        state = self.shared.get(SHARED_NAMESPACE, "state")
+        if state is None or state["version"] == self._version:
+            return state
+        snapshot = self.shared.get(SHARED_NAMESPACE, "snapshot")
+        if snapshot is None or snapshot["version"] != state["version"]:
+            return state  # sedang ditulis ulang; coba lagi di putaran berikutnya
+        with self._lock:
+            self._by_id = {entry["id"]: entry for entry in snapshot["entries"]}
+            self._by_nopol = {entry["nopol"]: entry["id"] for entry in snapshot["entries"] if entry["nopol"]}
+            self._watermark = snapshot["watermark"]
+            self._version = state["version"]
+            self._last_reload = time.monotonic()
+            self.stats["shared_loads"] += 1
+        return state
+
+    def _publish(self, full: bool, changed: bool):
+        state = self.shared.get(SHARED_NAMESPACE, "state") or {"version": 0, "reloaded_at": 0.0}
+        if changed or state["version"] != self._version:
+            with self._lock:
+                version = max(state["version"], self._version) + 1
+                snapshot = {"version": version, "watermark": self._watermark, "entries": list(self._by_id.values())}
+                self._version = version
+            self.shared.set(SHARED_NAMESPACE, "snapshot", snapshot)
+        else:
+            version = self._version  # tidak ada perubahan: worker lain tidak perlu memuat ulang
+        now = time.time()
+        self.shared.set(SHARED_NAMESPACE, "state", {
+            "version": version,
+            "refreshed_at": now,
+            "reloaded_at": now if full else state["reloaded_at"],
+        })
+        self.shared.release_lease(SHARED_NAMESPACE)
+
+    def _refresh_domain(self, full: bool) -> list:
+        # >= plus overlap supaya write di detik yang sama / commit yang telat tidak terlewat;
+        # record yang terbaca ulang tidak mengubah apa-apa di _apply
+        return [] if full else [
+            ('write_date', '>=', rewind_watermark(self._watermark, settings.SYNC_WATERMARK_OVERLAP_SECONDS))
+        ]
+
+    def _finish_refresh(self, full: bool, records: Optional[list]):
+        now = time.monotonic()
+        changed = False
+        if records is not None:
+            changed = self._apply(records, full=full)
+        with self._lock:
+            self._refreshing = False
+            if records is not None:
+                self._last_refresh = now
+                self.stats["refreshes"] += 1
+                if full:
+                    self._last_reload = now
+                    self.stats["reloads"] += 1
+        if self.shared is not None:
+            if records is not None:
+                self._publish(full, changed)
+            else:
+                self.shared.release_lease(SHARED_NAMESPACE)
+
+    def _get(self, nopol: str) -> Optional[int]:
+        with self._lock:
+            fleet_id = self._by_nopol.get(nopol)
+            self.stats["hits" if fleet_id is not None else "misses"] += 1
+            return fleet_id
+
+    def _fallback_result(self, records: list) -> Optional[int]:
+        if not records:
+            return None
+        self._apply(records)
+        with self._lock:
+            self.stats["fallback_hits"] += 1
+        return records[0]["id"]
+
+    # ----------------------------------------------------------------- sync
+    def refresh(self, fleet_model, force: bool = False):
+        """Refresh kalau sudah jatuh tempo; `force=True` untuk bulk load saat startup."""
+        full = self._claim_refresh(force)
+        if full is None:
+            return
+        records = None
+        try:
+            records = fleet_model.search_read(domain=self._refresh_domain(full), fields=FLEET_FIELDS, limit=None)
+        finally:
+            self._finish_refresh(full, records)
+
+    def lookup(self, nopol: str, fleet_model) -> Optional[int]:
+        """nopol -> fleet id; miss dicari langsung ke Odoo lalu disimpan."""
+        self.refresh(fleet_model)
+        fleet_id = self._get(nopol)
+        if fleet_id is not None:
+            return fleet_id
+        return self._fallback_result(
+            fleet_model.search_read(domain=[('nopol', '=', nopol)], fields=FLEET_FIELDS, limit=1)
+        )
+
+    def exists(self, fleet_id: int, fleet_model) -> bool:
+        self.refresh(fleet_model)
+        with self._lock:
+            if fleet_id in self._by_id:
+                self.stats["hits"] += 1
+                return True
+            self.stats["misses"] += 1
+        return self._fallback_result(
+            fleet_model.search_read(domain=[('id', '=', fleet_id)], fields=FLEET_FIELDS, limit=1)
+        ) is not None
+
+    # ---------------------------------------------------------------- async
+    async def _offload(self, func, *args):
+        # state shared (SQLite, lease, snapshot JSON) dibaca/ditulis di threadpool
+        # supaya event loop tidak terblokir; index in-memory cukup inline
+        if self.shared is None:
+            return func(*args)
+        return await run_in_threadpool(func, *args)
+
+    async def refresh_async(self, fleet_model):
+        full = await self._offload(self._claim_refresh)
+        if full is None:
+            return
+        records = None
+        try:
+            records = await fleet_model.search_read(domain=self._refresh_domain(full), fields=FLEET_FIELDS, limit=None)
+        finally:
+            await self._offload(self._finish_refresh, full, records)
+
+    async def lookup_async(self, nopol: str, fleet_model) -> Optional[int]:
+        await self.refresh_async(fleet_model)
+        fleet_id = self._get(nopol)
+        if fleet_id is not None:
+            return fleet_id
+        return self._fallback_result(
+            await fleet_model.search_read(domain=[('nopol', '=', nopol)], fields=FLEET_FIELDS, limit=1)
+        )
+
+    async def lookup_many_async(self, nopols: list, fleet_model) -> dict:
+        """Versi batch: miss di-resolve dengan satu search_read `in`."""
+        await self.refresh_async(fleet_model)
+        found, missing = {}, []
+        for nopol in set(nopols):
+            fleet_id = self._get(nopol)
+            if fleet_id is None:
+                missing.append(nopol)
+            else:
+                found[nopol] = fleet_id
+        if missing:
+            records = await fleet_model.search_read(
+                domain=[('nopol', 'in', missing)], fields=FLEET_FIELDS, limit=len(missing)
+            )
+            if records:
+                self._apply(records)
+                with self._lock:
+                    self.stats["fallback_hits"] += len(records)
+            found.update({rec["nopol"]: rec["id"] for rec in records})
+        return found
+
+    # ---------------------------------------------------------------- akses
+    def _readable_ids(self, uid: int) -> Optional[frozenset]:
+        with self._lock:
+            cached = self._readable.get(uid)
+        if cached is None or time.monotonic() - cached[1] > self.refresh_interval:
+            return None
+        return cached[0]
+
+    def _store_readable(self, uid: int, ids: list) -> frozenset:
+        readable = frozenset(ids)
+        with self._lock:
+            self._readable[uid] = (readable, time.monotonic())
+            self.stats["access_loads"] += 1
+        return readable
+
+    def _confirm_readable(self, uid: int, fleet_ids: set, found: list) -> set:
+        # fleet yang dibuat setelah daftar dimuat: hasil search uid itu sendiri
+        found = set(found)
+        with self._lock:
+            cached = self._readable.get(uid)
+            if found and cached is not None:
+                self._readable[uid] = (cached[0] | found, cached[1])
+            self.stats["access_denied"] += len(fleet_ids - found)
+        return found
+
+    def readable(self, fleet_id: int, uid: int, fleet_model) -> bool:
+        """Apakah uid boleh membaca fleet ini (fleet_model pakai kredensial uid itu).
+
+        Daftar id dimuat dengan satu `search` per uid per refresh_interval;
+        id di luar daftar dicek ulang dengan search uid itu (fleet baru).
+        Hak akses yang dicabut baru berlaku setelah refresh_interval.
+        """
+        ids = self._readable_ids(uid)
+        if ids is None:
+            ids = self._store_readable(uid, fleet_model.search(domain=[], limit=None))
+        if fleet_id in ids:
+            return True
+        found = fleet_model.search(domain=[('id', '=', fleet_id)], limit=1)
+        return bool(self._confirm_readable(uid, {fleet_id}, found))
+
+    async def readable_many_async(self, fleet_ids: set, uid: int, fleet_model) -> set:
+        """Versi async + batch dari readable(): return subset fleet_ids yang boleh dibaca."""
+        ids = self._readable_ids(uid)
+        if ids is None:
+            ids = self._store_readable(uid, await fleet_model.search(domain=[], limit=None))
+        missing = set(fleet_ids) - ids
+        if not missing:
+            return set(fleet_ids)
+        found = await fleet_model.search(domain=[('id', 'in', sorted(missing))], limit=len(missing))
+        return (set(fleet_ids) & ids) | self._confirm_readable(uid, missing, found)
+
+    async def readable_async(self, fleet_id: int, uid: int, fleet_model) -> bool:
+        return fleet_id in await self.readable_many_async({fleet_id}, uid, fleet_model)
+
+    # ----------------------------------------------------------------- info
+    def head(self, fleet_id: int) -> Optional[dict]:
+        with self._lock:
+            entry = self._by_id.get(fleet_id)
+        if not entry or entry["head_id"] is None:
+            return None
+        return {"id": entry["head_id"], "nolambung": entry["head_name"]}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "size": len(self._by_id),
+                "access_users": len(self._readable),
+                "watermark": self._watermark,
+                "refreshing": self._refreshing,
+                "shared_version": self._version if self.shared is not None else None,
+            }
+
+
+fleet_index = FleetIndex(
+    refresh_interval=settings.FLEET_INDEX_REFRESH_SECONDS,
+    reload_interval=settings.FLEET_INDEX_RELOAD_SECONDS,
+    shared=shared_store,
+)
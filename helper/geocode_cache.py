@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GeocodeCache:
+    """Cache hasil reverse-geocode per koordinat yang dibulatkan.
+
+    Dua tingkat: LRU in-memory dengan TTL, dan (opsional) SQLite supaya
+    cache tetap ada setelah restart / dibagi antar worker. Miss yang bersamaan untuk koordinat
+    yang sama hanya memicu satu request ke Nominatim.
+    """
+
+    def __init__(self, precision: int, max_size: int, ttl: float, db_path: Optional[str] = None):
+        self.precision = precision
+        self.max_size = max_size
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()  # hanya state in-memory, tidak pernah ditahan saat I/O
+        self._db_lock = threading.Lock()
+        self._tasks = set()  # write-behind ke disk yang sedang jalan
+        self.db_path = db_path
+        self._db = None
+        self._db_pid = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "expired": 0}
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        # dibuka per proses: serve.py memuat app sebelum fork, koneksi SQLite tidak boleh ikut
+        if not self.db_path:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._db_pid = os.getpid()
+        return self._db
+
+    def key(self, lat: float, lon: float) -> str:
+        return f"{lat:.{self.precision}f},{lon:.{self.precision}f}"
+
+    def _memory_get(self, key: str, now: float):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry[0] > now:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[1]
+            del self._memory[key]
+            self.stats["expired"] += 1
+            return None
+
+    def _disk_get(self, key: str, now: float):
+        """Baca SQLite (blocking; dari async dipanggil lewat threadpool)."""
+        with self._db_lock:
+            db = self._conn()
+            row = db.execute("SELECT value, expires_at FROM geocode WHERE key = ?", (key,)).fetchone() if db else None
+        if not row or row[1] <= now:
+            return None
+        value = json.loads(row[0])
+        with self._lock:
+            self._remember(key, value, row[1])
+            self.stats["disk_hits"] += 1
+        return value
+
+    def _disk_set(self, key: str, value: dict, expires_at: float):
+        with self._db_lock:
+            db = self._conn()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO geocode (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                db.commit()
+
+    def _miss(self):
+        with self._lock:
+            self.stats["misses"] += 1
+
+    def _memory_set(self, key: str, value: dict) -> float:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.stats["stores"] += 1
+        return expires_at
+
+    def get(self, key: str):
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is None and self.db_path:
+            value = self._disk_get(key, now)
+        if value is None:
+            self._miss()
+        return value
+
+    def set(self, key: str, value: dict):
+        expires_at = self._memory_set(key, value)
+        if self.db_path:
+            self._disk_set(key, value, expires_at)
+
+    def _remember(self, key: str, value: dict, expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _write_behind(self, key: str, value: dict, expires_at: float):
+        # tulis ke disk tanpa ditunggu; LRU in-memory sudah berisi hasilnya
+        task = asyncio.get_running_loop().create_task(run_in_threadpool(self._disk_set, key, value, expires_at))
+        self._tasks.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _write_done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Gagal menulis cache geocode ke disk: %s", task.exception())
+
+    async def get_or_fetch(self, lat: float, lon: float, fetch):
+        """Ambil dari cache, atau panggil `fetch()` sekali per koordinat.
+
+        LRU in-memory dicek langsung di event loop; SQLite (bisa antre lock
+        antar worker) dibaca di threadpool dan ditulis write-behind.
+        """
+        key = self.key(lat, lon)
+        value = self._memory_get(key, time.time())
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        while inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # request ini sendiri yang dibatalkan
+            # fetch pemiliknya dibatalkan (client putus / deadline): ambil sendiri
+            inflight = self._inflight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await run_in_threadpool(self._disk_get, key, time.time()) if self.db_path else None
+            if value is None:
+                self._miss()
+                value = await fetch()
+                if value is not None:
+                    expires_at = self._memory_set(key, value)
+                    if self.db_path:
+                        self._write_behind(key, value, expires_at)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                # CancelledError (BaseException): caller yang menunggu jangan menggantung
+                future.cancel()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            total = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._memory),
+                "hit_ratio": round(hits / total, 4) if total else 0.0,
+            }
+
+
+geocode_cache = GeocodeCache(
+    precision=settings.GEOCODE_CACHE_PRECISION,
+    max_size=settings.GEOCODE_CACHE_SIZE,
+    ttl=settings.GEOCODE_CACHE_TTL,
+    # multi-worker: hasil geocode dibagi lewat file shared store
+    db_path=settings.GEOCODE_CACHE_DB or settings.SHARED_STORE_DB,
+)
@@ -1,5 +1,37 @@
-from datetime import date
-from typing import Any, Dict
+import xmlrpc.client
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+ODOO_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def rewind_watermark(watermark: Optional[str], seconds: float) -> Optional[str]:
+    """Mundurkan watermark `write_date` untuk sync inkremental.
+
+    write_date diisi saat transaksi mulai, jadi transaksi panjang bisa commit
+    dengan write_date lebih kecil dari watermark yang sudah lewat; overlap
+    ini membuat baris seperti itu tetap terbaca di putaran berikutnya.
+    """
+    if not watermark or seconds <= 0:
+        return watermark
+    try:
+        parsed = datetime.strptime(watermark[:19], ODOO_DATETIME_FORMAT)
+    except ValueError:
+        return watermark
+    return (parsed - timedelta(seconds=seconds)).strftime(ODOO_DATETIME_FORMAT)
+
+def is_access_fault(error: Exception) -> bool:
+    """Fault Odoo karena record tidak boleh dibaca user ini / sudah tidak ada.
+
+    Odoo 8 mengirim AccessError / AccessDenied dengan kode 4 / 3 di
+    /xmlrpc/2, pelanggaran record rule sebagai except_orm "Access Denied",
+    dan JSON-RPC membawa nama exception-nya di faultCode.
+    """
+    if not isinstance(error, xmlrpc.client.Fault):
+        return False
+    if error.faultCode in (3, 4):
+        return True
+    text = f"{error.faultCode} {error.faultString}"
+    return any(marker in text for marker in ("AccessError", "Access Denied", "MissingError", "does not exist"))
 
 def preprocess_odoo_data(data: dict) -> dict:
     processed = {}
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+from config.settings import settings
+
+IMAGE_TYPES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+]
+
+
+def sniff_content_type(data: bytes) -> str:
+    for magic, content_type in IMAGE_TYPES:
+        if data.startswith(magic):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+class ImageCache:
+    """Cache gambar di disk, content-addressed (nama file = sha256 isi).
+
+    `refs/<key>` mencatat versi record (`__last_update`) dan sha blob-nya,
+    jadi gambar yang sama tidak pernah disimpan dua kali dan cache tetap
+    valid setelah restart. Ref yang baru dicek *oleh uid yang sama* dalam
+    `revalidate_seconds` dipakai tanpa bertanya ke Odoo sama sekali; user
+    lain tetap lewat cek versi ke Odoo dengan kredensialnya sendiri (hak
+    akses record), hanya blob di disk yang dibagi antar user.
+    """
+
+    def __init__(self, root: str, revalidate_seconds: float):
+        self.root = root
+        self.revalidate_seconds = revalidate_seconds
+        self._refs = {}  # key -> {"version", "sha"}
+        self._checked = {}  # (key, uid) -> waktu cek versi terakhir ke Odoo
+        self._lock = threading.Lock()
+        self.stats = {"fresh_hits": 0, "revalidated_hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(root, "refs"), exist_ok=True)
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.root, "blobs", sha[:2], sha)
+
+    def _ref_path(self, key: str) -> str:
+        return os.path.join(self.root, "refs", key)
+
+    def _write_atomic(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _load_ref(self, key: str) -> Optional[dict]:
+        ref = self._refs.get(key)
+        if ref is not None:
+            return ref
+        try:
+            with open(self._ref_path(key)) as f:
+                version, sha = f.read().split("\n")[:2]
+        except (OSError, ValueError):
+            return None
+        ref = {"version": version, "sha": sha}
+        self._refs[key] = ref
+        return ref
+
+    def fresh(self, key: str, uid: int) -> Optional[dict]:
+        """Ref yang masih dalam window revalidasi uid ini (tanpa RPC)."""
+        with self._lock:
+            checked_at = self._checked.get((key, uid))
+            if checked_at is None or time.monotonic() - checked_at > self.revalidate_seconds:
+                return None
+            ref = self._load_ref(key)
+            if ref is None:
+                return None
+            if not os.path.exists(self._blob_path(ref["sha"])):
+                return None
+            self.stats["fresh_hits"] += 1
+            return ref
+
+    def validate(self, key: str, version: str, uid: int) -> Optional[dict]:
+        """Ref untuk versi record ini (sudah dicek uid ke Odoo), kalau blob-nya masih ada di disk."""
+        with self._lock:
+            ref = self._load_ref(key)
+            if ref is None or ref["version"] != version or not os.path.exists(self._blob_path(ref["sha"])):
+                self.stats["misses"] += 1
+                return None
+            self._checked[(key, uid)] = time.monotonic()
+            self.stats["revalidated_hits"] += 1
+            return ref
+
+    def store(self, key: str, version: str, data: bytes, uid: int) -> dict:
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(sha)
+        if not os.path.exists(path):
+            self._write_atomic(path, data)
+        self._write_atomic(self._ref_path(key), f"{version}\n{sha}\n".encode())
+        ref = {"version": version, "sha": sha}
+        with self._lock:
+            self._refs[key] = ref
+            self._checked[(key, uid)] = time.monotonic()
+            self.stats["stores"] += 1
+        return ref
+
+    def read(self, ref: dict) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(ref["sha"]), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def invalidate(self, prefix: str):
+        """Buang ref dengan prefix tertentu (mis. semua ukuran satu patient)."""
+        with self._lock:
+            for key in [key for key in self._refs if key.startswith(prefix)]:
+                del self._refs[key]
+            for checked in [checked for checked in self._checked if checked[0].startswith(prefix)]:
+                del self._checked[checked]
+            for name in os.listdir(os.path.join(self.root, "refs")):
+                if name.startswith(prefix):
+                    try:
+                        os.remove(self._ref_path(name))
+                    except OSError:
+                        pass
+            self.stats["invalidations"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "refs": len(self._refs), "checked": len(self._checked), "root": self.root}
+
+
+patient_image_cache = ImageCache(
+    root=settings.PATIENT_IMAGE_CACHE_DIR,
+    revalidate_seconds=settings.PATIENT_IMAGE_REVALIDATE_SECONDS,
+)
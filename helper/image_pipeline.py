@@ -0,0 +1,160 @@
+import asyncio
+import base64
+import io
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException, UploadFile
+from config.settings import settings
+from helper.image_cache import sniff_content_type
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow opsional: tanpa Pillow gambar dikirim apa adanya
+    Image = None
+
+READ_CHUNK_SIZE = 64 * 1024
+# format yang disimpan ulang setelah resize; format lain dikonversi ke JPEG
+KEEP_FORMATS = {"JPEG", "PNG"}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def process_image(data: bytes, max_dimension: int) -> str:
+    """Decode, kecilkan ke ukuran `image` Odoo, lalu base64. Jalan di worker process."""
+    if Image is None:
+        if not sniff_content_type(data).startswith("image/"):
+            raise InvalidImage("Unsupported image format")
+        return base64.b64encode(data).decode("ascii")
+
+    try:
+        img = Image.open(io.BytesIO(data))
+        img.load()
+    except Exception:
+        raise InvalidImage("Unsupported or corrupt image")
+
+    if max(img.size) <= max_dimension and img.format in KEEP_FORMATS:
+        # sudah cukup kecil: simpan byte aslinya, tidak perlu encode ulang
+        return base64.b64encode(data).decode("ascii")
+
+    fmt = img.format if img.format in KEEP_FORMATS else "JPEG"
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((max_dimension, max_dimension))
+    if fmt == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    if fmt == "JPEG":
+        img.save(out, format="JPEG", quality=settings.PATIENT_IMAGE_JPEG_QUALITY, optimize=True)
+    else:
+        img.save(out, format="PNG", optimize=True)
+    return base64.b64encode(out.getvalue()).decode("ascii")
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+        return _pool
+
+
+def close_image_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+async def read_upload(upload: UploadFile, max_bytes: int) -> bytes:
+    """Baca upload per chunk dan berhenti begitu melewati batas."""
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge()
+    chunks, total = [], 0
+    while True:
+        chunk = await upload.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge()
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def prepare_image_upload(upload: UploadFile) -> str:
+    """UploadFile -> base64 siap tulis ke field `image`; 413/400 kalau ditolak."""
+    try:
+        data = await read_upload(upload, settings.PATIENT_IMAGE_MAX_UPLOAD_BYTES)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Image larger than {settings.PATIENT_IMAGE_MAX_UPLOAD_BYTES} bytes"
+        )
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            get_image_pool(), process_image, data, settings.PATIENT_IMAGE_MAX_DIMENSION
+        )
+    except InvalidImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+class BodySizeLimitMiddleware:
+    """Tolak body multipart yang melewati batas selagi masih di-stream.
+
+    Content-Length dicek di depan; kalau tidak ada (chunked), byte dihitung
+    di `receive` sehingga parser form berhenti sebelum file utuh di-spool.
+    """
+
+    def __init__(self, app, max_bytes: int, path_prefix: str = "/"):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT") \
+                or not scope["path"].startswith(self.path_prefix):
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/"):
+            return await self.app(scope, receive, send)
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None:
+            if not content_length.strip().isdigit():  # Content-Length = 1*DIGIT
+                return await self._reject(send, 400, "Invalid Content-Length header")
+            if int(content_length) > self.max_bytes:
+                return await self._reject(send, 413, "Request body too large")
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send, status: int, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueue:
+    """Antrian in-process berkapasitas tetap + pool worker asyncio.
+
+    `submit()` tidak pernah menunggu: kalau antrian penuh item ditolak
+    (caller membalas 429) sehingga backpressure terlihat jelas oleh client.
+    Handler raise LookupError untuk item yang targetnya tidak ada (mis.
+    nopol belum terdaftar): dihitung `not_found` dan di-log tanpa traceback.
+    """
+
+    def __init__(self, name: str, maxsize: int, workers: int, handler=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.workers = workers
+        self.handler = handler
+        self._queue = None
+        self._tasks = []
+        self.stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "failed": 0,
+            "not_found": 0,
+            "dropped": 0,
+            "last_lag": 0.0,
+            "max_lag": 0.0,
+            "total_lag": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 10.0):
+        """Kosongkan antrian (maksimal `timeout` detik) lalu hentikan worker."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s: %d item belum terproses saat shutdown", self.name, self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, *args) -> bool:
+        if not self.running:
+            raise RuntimeError(f"{self.name} belum dijalankan")
+        try:
+            self._queue.put_nowait((time.monotonic(), args))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            enqueued_at, args = await self._queue.get()
+            lag = time.monotonic() - enqueued_at
+            self.stats["last_lag"] = lag
+            self.stats["max_lag"] = max(self.stats["max_lag"], lag)
+            self.stats["total_lag"] += lag
+            try:
+                await self.handler(*args)
+                self.stats["processed"] += 1
+            except LookupError as e:
+                # kasus yang diharapkan (vendor GPS kirim plat yang belum terdaftar)
+                self.stats["not_found"] += 1
+                logger.warning("%s: %s", self.name, e)
+            except Exception:
+                self.stats["failed"] += 1
+                logger.exception("%s: gagal memproses item", self.name)
+            finally:
+                self._queue.task_done()
+
+    def snapshot(self) -> dict:
+        done = self.stats["processed"] + self.stats["failed"] + self.stats["not_found"]
+        return {
+            **self.stats,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "maxsize": self.maxsize,
+            "workers": self.workers,
+            "avg_lag": round(self.stats["total_lag"] / done, 4) if done else 0.0,
+        }
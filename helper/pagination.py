@@ -0,0 +1,58 @@
+from typing import Callable, Iterator, Optional
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from helper.sparse_fields import partial_schema
+
+# urutan stabil untuk keyset pagination: selalu berdasarkan id
+KEYSET_ORDER = "id asc"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def keyset_domain(domain: Optional[list], after_id: Optional[int]) -> list:
+    """Tambahkan `id > after_id` ke domain (cursor = id terakhir halaman sebelumnya)."""
+    domain = list(domain or [])
+    if after_id:
+        domain.append(('id', '>', after_id))
+    return domain
+
+
+def set_next_cursor(response: Response, records: list, limit: int):
+    # halaman penuh berarti kemungkinan masih ada data berikutnya
+    if records and len(records) >= limit:
+        response.headers["X-Next-Cursor"] = str(records[-1]["id"])
+
+
+def iter_search_read(
+    odoo_model,
+    domain: Optional[list],
+    fields: list,
+    chunk_size: int,
+    after_id: Optional[int] = None,
+    transform: Optional[Callable[[list], list]] = None,
+) -> Iterator[dict]:
+    """Telusuri semua hasil search_read per chunk pakai keyset, record demi record."""
+    last_id = after_id
+    while True:
+        records = odoo_model.search_read(
+            domain=keyset_domain(domain, last_id), fields=fields, limit=chunk_size, order=KEYSET_ORDER
+        )
+        if not records:
+            return
+        last_id = records[-1]["id"]
+        yield from (transform(records) if transform else records)
+        if len(records) < chunk_size:
+            return
+
+
+def ndjson_response(records: Iterator[dict], schema, fields: Optional[list] = None) -> StreamingResponse:
+    """Stream record sebagai NDJSON; tiap baris divalidasi dengan schema response."""
+    def lines():
+        if fields:
+            # sparse fieldset: hanya field yang diminta
+            model, include = partial_schema(schema), set(fields)
+        else:
+            model, include = schema, None
+        for record in records:
+            yield model.model_validate(record).model_dump_json(include=include) + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Optional
+from config.settings import settings
+from helper.shared_store import shared_store
+
+LOCATION_FIELDS = [
+    'id', 'fleet_id', 'latitude', 'longitude', 'address', 'village',
+    'district', 'city', 'province', 'postcode', 'timestamp'
+]
+SHARED_NAMESPACE = "position"
+SEED_CHUNK_SIZE = 1000
+
+
+def location_detail(loc: dict) -> dict:
+    """Record vehicle.location dari Odoo -> bentuk `last_location` di response."""
+    return {
+        "id": loc["id"],
+        "fleet_id": loc["fleet_id"][0] if isinstance(loc["fleet_id"], list) else loc["fleet_id"],
+        "latitude": loc.get("latitude"),
+        "longitude": loc.get("longitude"),
+        "address": loc.get("address"),
+        "village": loc.get("village"),
+        "district": loc.get("district"),
+        "city": loc.get("city"),
+        "province": loc.get("province"),
+        "postcode": loc.get("postcode"),
+        "timestamp": loc.get("timestamp"),
+    }
+
+
+class PositionStore:
+    """Posisi terakhir per fleet (isi `last_location_id`) tanpa RPC.
+
+    Diisi setiap fix yang di-ingest API ini dan di-seed bulk dari Odoo saat
+    startup. Sama seperti `last_location_id` di Odoo, location dengan id
+    terbesar (yang terakhir dibuat) yang menang, jadi fix yang selesai tidak
+    berurutan tidak menimpa posisi yang lebih baru. Entry yang lebih tua
+    dari `max_age` (mis. lokasi ditulis di luar API ini) dianggap miss dan
+    dibaca ulang dari Odoo.
+
+    Dengan `shared` (multi-worker) entry disimpan di shared store, jadi fix
+    yang diterima satu worker langsung terlihat di worker lain.
+
+    Entry tidak terikat user, jadi caller mengecek `fleet_index.readable()`
+    sebelum memakainya. Akses ke vehicle.location / head dianggap mengikuti
+    akses fleet-nya.
+    """
+
+    def __init__(self, max_age: float, shared=None):
+        self.max_age = max_age
+        self.shared = shared
+        self._by_fleet = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "updates": 0, "out_of_order": 0, "seeded": 0}
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.stats[name] += n
+
+    def record(self, fleet_id: int, location: Optional[dict], source: str, replace: bool = False) -> bool:
+        """Simpan posisi fleet; `location` None = fleet belum punya lokasi.
+
+        `replace=True` untuk hasil baca langsung dari Odoo: menimpa entry
+        apa pun (mis. lokasi terakhir dihapus di Odoo).
+        """
+        entry = {
+            "location_id": location["id"] if location else 0,
+            "location": location,
+            "source": source,
+            "confirmed_at": time.time(),
+        }
+        if self.shared is not None:
+            if replace:
+                self.shared.set(SHARED_NAMESPACE, str(fleet_id), entry)
+                stored = True
+            else:
+                stored = self.shared.set_newer(SHARED_NAMESPACE, str(fleet_id), entry, "location_id")
+        else:
+            with self._lock:
+                current = self._by_fleet.get(fleet_id)
+                stored = replace or current is None or current["location_id"] <= entry["location_id"]
+                if stored:
+                    self._by_fleet[fleet_id] = entry
+        self._count("updates" if stored else "out_of_order")
+        return stored
+
+    def get(self, fleet_id: int) -> Optional[dict]:
+        """Entry + `age` (detik sejak terakhir dikonfirmasi); None kalau miss / kedaluwarsa."""
+        if self.shared is not None:
+            entry = self.shared.get(SHARED_NAMESPACE, str(fleet_id))
+        else:
+            with self._lock:
+                entry = self._by_fleet.get(fleet_id)
+        if entry is None:
+            self._count("misses")
+            return None
+        age = time.time() - entry["confirmed_at"]
+        if age > self.max_age:
+            self._count("expired")
+            return None
+        self._count("hits")
+        return {**entry, "age": age}
+
+    def seed(self, fleet_model, location_model):
+        """Bulk load posisi terakhir semua fleet (startup, akun service)."""
+        if self.shared is not None and self.shared.get(SHARED_NAMESPACE + ":meta", "seeded_at") is not None:
+            return  # worker lain / master sudah seed dalam max_age terakhir
+        fleets = fleet_model.search_read(domain=[], fields=['last_location_id'], limit=None)
+        location_ids = [fleet["last_location_id"][0] for fleet in fleets if fleet.get("last_location_id")]
+        locations = {}
+        for start in range(0, len(location_ids), SEED_CHUNK_SIZE):
+            for loc in location_model.read(location_ids[start:start + SEED_CHUNK_SIZE], fields=LOCATION_FIELDS):
+                locations[loc["id"]] = location_detail(loc)
+        for fleet in fleets:
+            last = fleet.get("last_location_id")
+            self.record(fleet["id"], locations.get(last[0]) if last else None, "seed")
+        self._count("seeded", len(fleets))
+        if self.shared is not None:
+            self.shared.set(SHARED_NAMESPACE + ":meta", "seeded_at", time.time(), ttl=self.max_age)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "size": len(self._by_fleet) if self.shared is None else None,
+                "max_age": self.max_age,
+                "shared": self.shared is not None,
+            }
+
+
+position_store = PositionStore(
+    max_age=settings.POSITION_STORE_MAX_AGE,
+    shared=shared_store,
+) if settings.POSITION_STORE_ENABLED else None
@@ -0,0 +1,410 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from config.settings import settings
+from odoo_client import signals
+from odoo_client.base_model import OdooModel
+from odoo_client.client import get_service_user
+from helper.pagination import iter_search_read
+from helper.helper import rewind_watermark
+from helper.shared_store import shared_store
+
+logger = logging.getLogger(__name__)
+
+# model -> field yang direplikasi + kolom yang di-index untuk filter; yang aktif
+# hanya yang ada di settings.REPLICA_MODELS (model tanpa record rule per user)
+REPLICA_MODELS = {
+    "res.partner": {
+        "fields": ['id', 'name', 'email', 'phone'],
+        "index": [],
+    },
+    "hospital.patient": {
+        "fields": ['id', 'name', 'date_of_birth', 'gender', 'is_minor', 'guardian', 'tag_ids'],
+        "index": [],
+    },
+    "hospital.appointment": {
+        "fields": [
+            'id', 'reference', 'patient_id', 'date_appointment', 'note', 'state',
+            'appointment_line_ids', 'display_name', 'total_qty', 'date_of_birth'
+        ],
+        "index": ['patient_id'],
+    },
+    "hospital.appointment.line": {
+        "fields": ['id', 'appointment_id', 'product_id', 'qty'],
+        "index": ['appointment_id'],
+    },
+    "vehicle.fleet": {
+        "fields": ['id', 'nopol', 'head_id', 'last_location_id'],
+        "index": ['nopol'],
+    },
+    "vehicle.location": {
+        "fields": [
+            'id', 'fleet_id', 'latitude', 'longitude', 'address', 'village',
+            'district', 'city', 'province', 'postcode', 'timestamp'
+        ],
+        "index": ['fleet_id'],
+    },
+}
+
+SQL_OPERATORS = {"=": "=", ">": ">", ">=": ">=", "<": "<", "<=": "<="}
+# dilayani dari kolom write_date (di Odoo 8 __last_update = write_date)
+VERSION_FIELDS = ('write_date', '__last_update')
+
+
+def _table(model: str) -> str:
+    return '"' + model.replace(".", "_") + '"'
+
+
+def _column_value(value):
+    # many2one [id, name] disimpan sebagai id saja supaya bisa di-index
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return None if value is False else value
+
+
+class OdooReplica:
+    """Replika read-only beberapa model Odoo di SQLite lokal.
+
+    Disinkronkan di background dengan akun service: inkremental lewat
+    `write_date >= watermark`, dan rekonsiliasi id berkala untuk menangkap
+    delete dari luar API. Karena datanya dibaca dengan akun service,
+    hanya model yang boleh dibaca seluruhnya oleh semua user API yang
+    boleh dimasukkan (settings.REPLICA_MODELS).
+    """
+
+    def __init__(self, db_path: str, models: dict, sync_interval: float,
+                 reconcile_interval: float, chunk_size: int, shared=None):
+        self.db_path = db_path
+        self.models = models
+        self.sync_interval = sync_interval
+        self.reconcile_interval = reconcile_interval
+        self.chunk_size = chunk_size
+        self.shared = shared
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._state = {}  # model -> {"watermark", "synced_at", "reconciled_at"}
+        self._service_user = None
+        self._task = None
+        self._wake = None
+        self._loop = None
+        self.stats = {"syncs": 0, "upserts": 0, "deletes": 0, "errors": 0, "reads": 0, "fallbacks": 0}
+        self._initialized = False
+
+    # --------------------------------------------------------------- sqlite
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def init(self):
+        if self._initialized:
+            return
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS replica_state ("
+                " model TEXT PRIMARY KEY, watermark TEXT, synced_at REAL, reconciled_at REAL)"
+            )
+            for model, spec in self.models.items():
+                columns = "".join(f", {col}" for col in spec["index"])
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_table(model)} ("
+                    f" id INTEGER PRIMARY KEY, write_date TEXT, data TEXT NOT NULL{columns})"
+                )
+                for col in spec["index"]:
+                    conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{model.replace(".", "_")}_{col}" ON {_table(model)} ({col}, id)'
+                    )
+        self._load_state()
+        self._initialized = True
+
+    def _load_state(self):
+        for model, watermark, synced_at, reconciled_at in self._conn().execute("SELECT * FROM replica_state"):
+            self._state[model] = {"watermark": watermark, "synced_at": synced_at, "reconciled_at": reconciled_at}
+
+    def _save_state(self, conn, model: str):
+        state = self._state[model]
+        conn.execute(
+            "INSERT OR REPLACE INTO replica_state (model, watermark, synced_at, reconciled_at) VALUES (?, ?, ?, ?)",
+            (model, state["watermark"], state["synced_at"], state["reconciled_at"]),
+        )
+
+    def _upsert(self, model: str, records: list):
+        spec = self.models[model]
+        fields = set(spec["fields"])
+        columns = ["id", "write_date", "data", *spec["index"]]
+        sql = (
+            f"INSERT OR REPLACE INTO {_table(model)} ({', '.join(columns)})"
+            f" VALUES ({', '.join('?' for _ in columns)})"
+        )
+        rows = [
+            (
+                rec["id"], rec.get("write_date"),
+                json.dumps({name: value for name, value in rec.items() if name in fields}),
+                *(_column_value(rec.get(col)) for col in spec["index"]),
+            )
+            for rec in records
+        ]
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.executemany(sql, rows)
+        self.stats["upserts"] += len(rows)
+
+    def delete(self, model: str, ids: list):
+        if model not in self.models or not ids:
+            return
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.executemany(f"DELETE FROM {_table(model)} WHERE id = ?", [(i,) for i in ids])
+        self.stats["deletes"] += len(ids)
+
+    # ----------------------------------------------------------------- sync
+    def sync_model(self, model: str, odoo_model):
+        """Tarik record yang berubah sejak watermark, per chunk keyset."""
+        state = self._state.setdefault(model, {"watermark": None, "synced_at": None, "reconciled_at": None})
+        watermark = state["watermark"]
+        # overlap: baris yang commit telat / berubah saat keyset sudah lewat id-nya
+        # terbaca lagi; upsert per id jadi baris yang sama cukup ditimpa
+        since = rewind_watermark(watermark, settings.SYNC_WATERMARK_OVERLAP_SECONDS)
+        domain = [('write_date', '>=', since)] if since else []
+        fields = [*self.models[model]["fields"], 'write_date']
+        batch = []
+        for record in iter_search_read(odoo_model, domain, fields, self.chunk_size):
+            batch.append(record)
+            if record.get("write_date") and (watermark is None or record["write_date"] > watermark):
+                watermark = record["write_date"]
+            if len(batch) >= self.chunk_size:
+                self._upsert(model, batch)
+                batch = []
+        if batch:
+            self._upsert(model, batch)
+
+        now = time.time()
+        if state["reconciled_at"] is None or now - state["reconciled_at"] > self.reconcile_interval:
+            self.reconcile_model(model, odoo_model)
+            state["reconciled_at"] = now
+        state["watermark"] = watermark
+        state["synced_at"] = now
+        conn = self._conn()
+        with self._write_lock, conn:
+            self._save_state(conn, model)
+
+    def reconcile_model(self, model: str, odoo_model):
+        """Hapus baris lokal yang id-nya sudah tidak ada di Odoo."""
+        remote = set(odoo_model.search(domain=[], limit=None))
+        local = {row[0] for row in self._conn().execute(f"SELECT id FROM {_table(model)}")}
+        self.delete(model, list(local - remote))
+
+    def sync_all(self):
+        if self._service_user is None:
+            self._service_user = get_service_user()
+            if self._service_user is None:
+                raise RuntimeError("Replica butuh ODOO_SERVICE_USERNAME/ODOO_SERVICE_PASSWORD")
+        user = self._service_user
+        for model in self.models:
+            try:
+                self.sync_model(model, OdooModel(model, user["uid"], user["username"], user["password"]))
+            except Exception:
+                self.stats["errors"] += 1
+                self._service_user = None  # login ulang di putaran berikutnya
+                logger.exception("Sinkronisasi replica %s gagal", model)
+        self.stats["syncs"] += 1
+
+    # ------------------------------------------------------------ lifecycle
+    def start(self):
+        if self._task is not None:
+            return
+        self.init()
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        for model in self.models:
+            signals.connect(model, self._on_change)
+        self._task = asyncio.create_task(self._run(), name="odoo-replica-sync")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        for model in self.models:
+            signals.disconnect(model, self._on_change)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def _is_leader(self) -> bool:
+        # multi-worker: hanya satu worker yang sync ke Odoo, yang lain membaca file yang sama
+        if self.shared is None:
+            return True
+        return self.shared.acquire_lease("replica", self.sync_interval * 3)
+
+    def _sync_or_follow(self):
+        if self._is_leader():
+            self.sync_all()
+        else:
+            self._load_state()
+
+    async def _run(self):
+        while True:
+            try:
+                await run_in_threadpool(self._sync_or_follow)
+            except Exception:
+                self.stats["errors"] += 1
+                logger.exception("Sinkronisasi replica gagal")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.sync_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _on_change(self, model: str, operation: str, ids: list):
+        # write lewat API ini: unlink langsung dihapus, sisanya memicu sync cepat
+        if operation == "unlink":
+            self.delete(model, ids)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # ----------------------------------------------------------------- read
+    def ready(self, model: str) -> bool:
+        state = self._state.get(model)
+        return self._task is not None and state is not None and state["synced_at"] is not None
+
+    def age(self, model: str) -> Optional[float]:
+        state = self._state.get(model)
+        if not state or state["synced_at"] is None:
+            return None
+        return time.time() - state["synced_at"]
+
+    def translate(self, model: str, domain: Optional[list], fields: list, order: Optional[str]) -> Optional[list]:
+        """Domain Odoo -> klausa SQL; None kalau tidak bisa dilayani replica."""
+        spec = self.models.get(model)
+        if spec is None or order not in (None, "id asc", "id") \
+                or not set(fields) <= {*spec["fields"], *VERSION_FIELDS}:
+            return None
+        clauses = []
+        for leaf in domain or []:
+            if not isinstance(leaf, (list, tuple)) or len(leaf) != 3:
+                return None
+            name, operator, value = leaf
+            if name != "id" and name not in spec["index"]:
+                return None
+            if operator == "in" and isinstance(value, (list, tuple)):
+                if not value:
+                    clauses.append(("0", []))
+                else:
+                    clauses.append((f"{name} IN ({', '.join('?' for _ in value)})", list(value)))
+            elif operator in SQL_OPERATORS and not isinstance(value, (list, tuple)):
+                clauses.append((f"{name} {SQL_OPERATORS[operator]} ?", [value]))
+            else:
+                return None
+        return clauses
+
+    def query(self, model: str, clauses: list, fields: list, limit: Optional[int], offset: int = 0) -> list:
+        where = " AND ".join(sql for sql, _ in clauses) or "1"
+        params = [param for _, values in clauses for param in values]
+        sql = f"SELECT data, write_date FROM {_table(model)} WHERE {where} ORDER BY id"
+        if limit:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset or 0]
+        elif offset:
+            sql += " LIMIT -1 OFFSET ?"
+            params.append(offset)
+        wanted = set(fields) | {"id"}
+        versions = [name for name in VERSION_FIELDS if name in wanted]
+        self.stats["reads"] += 1
+        records = []
+        for data, write_date in self._conn().execute(sql, params):
+            record = {name: value for name, value in json.loads(data).items() if name in wanted}
+            for name in versions:
+                record[name] = write_date
+            records.append(record)
+        return records
+
+    def snapshot(self) -> dict:
+        models = {}
+        for model in self.models:
+            state = self._state.get(model, {})
+            count = self._conn().execute(f"SELECT COUNT(*) FROM {_table(model)}").fetchone()[0] if self._initialized else 0
+            age = self.age(model)
+            models[model] = {
+                "rows": count,
+                "watermark": state.get("watermark"),
+                "age_seconds": round(age, 3) if age is not None else None,
+            }
+        return {**self.stats, "running": self._task is not None, "models": models}
+
+
+class ReplicaModel:
+    """Permukaan read OdooModel di atas replica; yang tidak bisa dilayani diteruskan ke Odoo."""
+
+    def __init__(self, replica: OdooReplica, odoo_model: OdooModel):
+        self.replica = replica
+        self.odoo_model = odoo_model
+        self.model = odoo_model.model
+
+    def search_read(self, domain=None, fields=None, limit=10, offset=0, order=None):
+        fields = fields or ['name']
+        clauses = self.replica.translate(self.model, domain, fields, order)
+        if clauses is None:
+            self.replica.stats["fallbacks"] += 1
+            return self.odoo_model.search_read(domain=domain, fields=fields, limit=limit, offset=offset, order=order)
+        return self.replica.query(self.model, clauses, fields, limit, offset)
+
+    def read(self, ids: list, fields=None):
+        fields = fields or ['name']
+        clauses = self.replica.translate(self.model, [('id', 'in', list(ids))], fields, None)
+        if clauses is None:
+            self.replica.stats["fallbacks"] += 1
+            return self.odoo_model.read(ids, fields=fields)
+        # urutan mengikuti ids seperti read() Odoo
+        by_id = {rec["id"]: rec for rec in self.replica.query(self.model, clauses, fields, None)}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def search(self, domain=None, limit=10, offset=0, order=None):
+        clauses = self.replica.translate(self.model, domain, ['id'], order)
+        if clauses is None:
+            self.replica.stats["fallbacks"] += 1
+            return self.odoo_model.search(domain=domain, limit=limit, offset=offset, order=order)
+        return [rec["id"] for rec in self.replica.query(self.model, clauses, ['id'], limit, offset)]
+
+    def create(self, values: dict):
+        return self.odoo_model.create(values)
+
+    def write(self, ids: list, values: dict):
+        return self.odoo_model.write(ids, values)
+
+    def unlink(self, ids: list):
+        return self.odoo_model.unlink(ids)
+
+
+unknown = set(settings.REPLICA_MODELS) - set(REPLICA_MODELS)
+if unknown:
+    raise ValueError(f"REPLICA_MODELS tidak dikenal: {', '.join(sorted(unknown))}")
+
+replica = OdooReplica(
+    db_path=settings.REPLICA_DB,
+    models={model: spec for model, spec in REPLICA_MODELS.items() if model in settings.REPLICA_MODELS},
+    sync_interval=settings.REPLICA_SYNC_SECONDS,
+    reconcile_interval=settings.REPLICA_RECONCILE_SECONDS,
+    chunk_size=settings.EXPORT_CHUNK_SIZE,
+    shared=shared_store,
+)
+
+
+def read_model(model: str, user: dict):
+    """OdooModel untuk endpoint GET; dilayani replica kalau aktif, model-nya di
+    REPLICA_MODELS, dan sudah tersinkron. Model lain selalu ke Odoo dengan kredensial user."""
+    odoo_model = OdooModel(model, user["uid"], user["username"], user["password"])
+    if settings.REPLICA_ENABLED and model in replica.models and replica.ready(model):
+        return ReplicaModel(replica, odoo_model)
+    return odoo_model
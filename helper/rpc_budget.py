@@ -0,0 +1,184 @@
+import logging
+import threading
+from collections import Counter
+from typing import Optional
+from config.settings import settings
+from odoo_client.instrumentation import add_request_listener, remove_request_listener
+
+logger = logging.getLogger(__name__)
+
+# batas RPC ke Odoo per request, per (HTTP method, route). Naikkan hanya
+# kalau round trip tambahan memang disengaja; turunkan setelah optimasi.
+RPC_BUDGETS = {
+    ("POST", "/auth/login"): 1,
+    ("GET", "/patients/"): 1,
+    ("GET", "/patients/{patient_id}"): 2,  # 1 tanpa If-None-Match / 304; 2 kalau ETag basi
+    ("GET", "/patients/{patient_id}/image"): 2,
+    ("POST", "/patients/"): 2,
+    ("PUT", "/patients/{patient_id}"): 2,
+    ("DELETE", "/patients/{patient_id}"): 1,
+    ("GET", "/appointments/"): 2,
+    ("GET", "/appointments/{appointment_id}"): 4,  # 2 tanpa If-None-Match / 304; 4 kalau ETag basi
+    ("POST", "/appointments/"): 3,
+    ("POST", "/appointments/createonly/"): 2,
+    ("PUT", "/appointments/{appointment_id}"): 3,
+    ("PUT", "/appointments/updateonly/{appointment_id}"): 2,
+    ("PUT", "/appointments/{appointment_id}/state"): 3,
+    ("DELETE", "/appointments/{appointment_id}"): 1,
+    ("POST", "/appointment_line/"): 2,
+    ("GET", "/appointment_line/{line_id}"): 1,
+    ("GET", "/appointment_line/appointment/{appointment_id}"): 1,
+    ("PUT", "/appointment_line/{appointment_line_id}"): 2,
+    ("DELETE", "/appointment_line/{appointment_line_id}"): 1,
+    ("GET", "/partners/"): 1,
+    ("POST", "/partners/"): 2,
+    ("PUT", "/partners/{partner_id}"): 2,
+    ("DELETE", "/partners/{partner_id}"): 1,
+    ("GET", "/vehicle/{nopol}"): 3,
+    ("POST", "/vehicle/location/"): 3,  # + search akses fleet per uid per refresh fleet index
+    ("POST", "/vehicle/karlo-update/"): 2,
+    ("POST", "/vehicle/karlo-update2/"): 2,
+}
+
+# endpoint bulk: (dasar, per item). Dasar = refresh fleet index + satu search_read
+# `in` untuk nopol yang belum ada di index + search akses fleet uid;
+# per item satu create vehicle.location
+RPC_ITEM_BUDGETS = {
+    ("POST", "/vehicle/karlo-update/bulk/"): (3, 1),
+}
+
+# pola berulang yang disengaja: satu create per fix (Odoo 8 create hanya satu record)
+ALLOWED_REPEATS = {
+    ("POST", "/vehicle/karlo-update/bulk/"): {("vehicle.location", "create")},
+}
+
+
+def find_n_plus_one(calls: list, threshold: int = 3) -> list:
+    """Cari (model, method) yang dipanggil >= threshold kali dengan <= 1 record per call.
+
+    Itu ciri read/search/write per item di dalam loop yang seharusnya
+    digabung jadi satu RPC dengan daftar id / domain `in`.
+    """
+    counts = Counter()
+    for model, method, ids in calls:
+        if ids is None or ids <= 1:
+            counts[(model, method)] += 1
+    return [
+        {"model": model, "method": method, "calls": count}
+        for (model, method), count in counts.items() if count >= threshold
+    ]
+
+
+def budget_for(record: dict, budgets: dict = RPC_BUDGETS) -> Optional[int]:
+    """Budget RPC untuk satu request; endpoint bulk dihitung dari jumlah itemnya."""
+    key = (record["method"], record["route"])
+    if key in RPC_ITEM_BUDGETS and record.get("items") is not None:
+        base, per_item = RPC_ITEM_BUDGETS[key]
+        return base + per_item * record["items"]
+    return budgets.get(key)
+
+
+def check_record(record: dict, budgets: dict = RPC_BUDGETS, threshold: int = 3,
+                 max_rpcs: Optional[int] = None) -> list:
+    """Pelanggaran budget / pola N+1 untuk satu request, sebagai list pesan."""
+    key = (record["method"], record["route"])
+    problems = []
+    limit = max_rpcs if max_rpcs is not None else budget_for(record, budgets)
+    if limit is not None and record["rpc_count"] > limit:
+        calls = ", ".join(f"{model}.{method}({ids})" for model, method, ids in record["calls"])
+        problems.append(f"{key[0]} {key[1]}: {record['rpc_count']} RPC > budget {limit} [{calls}]")
+    allowed = ALLOWED_REPEATS.get(key, set())
+    for finding in find_n_plus_one(record["calls"], threshold):
+        if (finding["model"], finding["method"]) not in allowed:
+            problems.append(
+                f"{key[0]} {key[1]}: N+1 {finding['model']}.{finding['method']} x{finding['calls']}"
+            )
+    return problems
+
+
+class RpcRecorder:
+    """Kumpulkan record RPC per request selama blok `with` (thread-safe).
+
+        with RpcRecorder() as recorder:
+            client.get("/appointments/1")
+        recorder.assert_budget()
+    """
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def _on_request(self, record: dict):
+        with self._lock:
+            self.records.append(record)
+
+    def __enter__(self):
+        add_request_listener(self._on_request)
+        return self
+
+    def __exit__(self, *exc):
+        remove_request_listener(self._on_request)
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+
+    def calls(self, method: Optional[str] = None, route: Optional[str] = None) -> list:
+        with self._lock:
+            return [
+                record["calls"] for record in self.records
+                if (method is None or record["method"] == method) and (route is None or record["route"] == route)
+            ]
+
+    def problems(self, max_rpcs: Optional[int] = None, threshold: int = 3) -> list:
+        with self._lock:
+            records = list(self.records)
+        return [problem for record in records for problem in check_record(record, threshold=threshold, max_rpcs=max_rpcs)]
+
+    def assert_budget(self, max_rpcs: Optional[int] = None, threshold: int = 3):
+        """AssertionError kalau ada request yang melewati budget atau punya pola N+1.
+
+        Tanpa `max_rpcs`, budget diambil dari RPC_BUDGETS per route (RPC_ITEM_BUDGETS
+        untuk endpoint bulk).
+        """
+        problems = self.problems(max_rpcs, threshold)
+        assert not problems, "RPC budget terlampaui:\n" + "\n".join(problems)
+
+
+class RpcPatternStats:
+    """Deteksi N+1 di runtime: dicatat per route, di-log sekali per pola."""
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self._findings = {}  # (method, route, model, rpc method) -> jumlah request
+        self._lock = threading.Lock()
+
+    def on_request(self, record: dict):
+        allowed = ALLOWED_REPEATS.get((record["method"], record["route"]), set())
+        for finding in find_n_plus_one(record["calls"], self.threshold):
+            if (finding["model"], finding["method"]) in allowed:
+                continue
+            key = (record["method"], record["route"], finding["model"], finding["method"])
+            with self._lock:
+                first = key not in self._findings
+                self._findings[key] = self._findings.get(key, 0) + 1
+            if first:
+                logger.warning(
+                    "Pola N+1 di %s %s: %s.%s dipanggil %d kali",
+                    record["method"], record["route"], finding["model"], finding["method"], finding["calls"],
+                )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "findings": [
+                    {"route": f"{method} {route}", "model": model, "method": rpc_method, "requests": count}
+                    for (method, route, model, rpc_method), count in self._findings.items()
+                ],
+            }
+
+
+rpc_patterns = RpcPatternStats(settings.RPC_N_PLUS_ONE_THRESHOLD) if settings.RPC_N_PLUS_ONE_DETECTION else None
+if rpc_patterns is not None:
+    add_request_listener(rpc_patterns.on_request)
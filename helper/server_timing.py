@@ -0,0 +1,114 @@
+import functools
+import inspect
+import time
+from fastapi.routing import APIRoute
+from odoo_client.instrumentation import begin_request, end_request, current_timings, rpc_metrics, notify_request
+from helper.deadline import request_deadline, route_timeout
+
+# urutan komponen di header Server-Timing
+TIMING_NAMES = ("odoo", "geocode", "serialize")
+
+
+def _mark_handler_done():
+    timings = current_timings()
+    if timings is not None:
+        timings.handler_done = time.perf_counter()
+
+
+def _timed_endpoint(endpoint, timeout: float):
+    # functools.wraps menjaga signature sehingga dependency injection FastAPI tetap sama
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                with request_deadline(timeout):
+                    return await endpoint(*args, **kwargs)
+            finally:
+                _mark_handler_done()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                with request_deadline(timeout):
+                    return endpoint(*args, **kwargs)
+            finally:
+                _mark_handler_done()
+    wrapper.timed = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute yang mencatat kapan endpoint selesai dan memasang deadline request.
+
+    Selisih sampai `http.response.start` = validasi response_model +
+    serialisasi JSON oleh FastAPI, dilaporkan sebagai `serialize`.
+    Deadline (REQUEST_TIMEOUTS / X-Request-Timeout) berlaku selama handler
+    berjalan; body streaming (NDJSON) sesudahnya hanya dibatasi
+    ODOO_RPC_TIMEOUT per RPC.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router membuat ulang route dengan endpoint yang sudah dibungkus
+        if not getattr(endpoint, "timed", False):
+            methods = kwargs.get("methods") or ["GET"]
+            timeout = max(route_timeout(method.upper(), path) for method in methods)
+            endpoint = _timed_endpoint(endpoint, timeout)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def format_server_timing(timings, total: float) -> str:
+    parts = []
+    for name in TIMING_NAMES:
+        if name in timings.durations:
+            count = timings.counts[name]
+            parts.append(f'{name};dur={timings.durations[name] * 1000:.2f};desc="{count}x"')
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """Buka RequestTimings per request, catat RPC per request ke /metrics
+    (dan ke listener, lihat helper.rpc_budget), lalu kalau `header=True`
+    tambahkan header Server-Timing ke response."""
+
+    def __init__(self, app, header: bool = True):
+        self.app = app
+        self.header = header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings, token = begin_request()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.header:
+                    now = time.perf_counter()
+                    if timings.handler_done is not None:
+                        timings.add("serialize", now - timings.handler_done)
+                        timings.handler_done = None
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", format_server_timing(timings, now - timings.started).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            rpc_metrics.observe_request(path, scope["method"], timings.rpc_count)
+            notify_request({
+                "route": path,
+                "method": scope["method"],
+                "status": status,
+                "calls": list(timings.calls),
+                "rpc_count": timings.rpc_count,
+                "items": timings.items,
+                "duration": time.perf_counter() - timings.started,
+            })
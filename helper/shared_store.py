@@ -0,0 +1,118 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from config.settings import settings
+
+
+class SharedStore:
+    """Key-value SQLite (WAL) yang dipakai bersama semua worker di satu host.
+
+    Dipakai untuk state yang mahal kalau dingin per proses (sesi login,
+    snapshot fleet index) plus lease antar proses, supaya pekerjaan ke Odoo
+    yang cukup dilakukan sekali (refresh index, sync replica) hanya
+    dijalankan satu worker. Koneksi dibuat per thread dan dibuka ulang
+    setelah fork.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if not os.path.exists(self.path):
+                # berisi sesi login: hanya bisa dibaca user proses ini
+                os.close(os.open(self.path, os.O_CREAT | os.O_WRONLY, 0o600))
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    # ------------------------------------------------------------------ kv
+    def get(self, namespace: str, key: str):
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._conn().execute(
+            "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), expires_at),
+        )
+
+    def set_newer(self, namespace: str, key: str, value: dict, field: str) -> bool:
+        """Set kecuali value tersimpan punya `field` lebih besar (atomic antar worker)."""
+        path = f"$.{field}"
+        cursor = self._conn().execute(
+            "INSERT INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, NULL)"
+            " ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = NULL"
+            " WHERE json_extract(kv.value, ?) IS NULL OR json_extract(kv.value, ?) <= json_extract(excluded.value, ?)",
+            (namespace, key, json.dumps(value), path, path, path),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, namespace: str, key: str):
+        self._conn().execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def purge_expired(self, namespace: str):
+        self._conn().execute(
+            "DELETE FROM kv WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?",
+            (namespace, time.time()),
+        )
+
+    # --------------------------------------------------------------- lease
+    def _owner(self) -> str:
+        return f"{os.uname().nodename}:{os.getpid()}"
+
+    def acquire_lease(self, name: str, seconds: float) -> bool:
+        """Ambil / perpanjang lease `name`; False kalau masih dipegang proses lain."""
+        now = time.time()
+        cursor = self._conn().execute(
+            "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+            " WHERE leases.expires_at <= ? OR leases.owner = excluded.owner",
+            (name, self._owner(), now + seconds, now),
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, name: str):
+        self._conn().execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self._owner()))
+
+    def snapshot(self) -> dict:
+        conn = self._conn()
+        now = time.time()
+        return {
+            "path": self.path,
+            "entries": dict(conn.execute(
+                "SELECT namespace, COUNT(*) FROM kv WHERE expires_at IS NULL OR expires_at > ? GROUP BY namespace",
+                (now,),
+            ).fetchall()),
+            "leases": [
+                {"name": name, "owner": owner, "expires_in": round(expires_at - now, 1)}
+                for name, owner, expires_at in conn.execute(
+                    "SELECT name, owner, expires_at FROM leases WHERE expires_at > ?", (now,)
+                )
+            ],
+        }
+
+
+shared_store = SharedStore(settings.SHARED_STORE_DB) if settings.SHARED_STORE_DB else None
@@ -0,0 +1,51 @@
+import time
+from functools import lru_cache
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import create_model
+from odoo_client.instrumentation import record_timing
+
+
+def parse_fields(fields: Optional[str], schema) -> Optional[list]:
+    """Parse `?fields=a,b` dan validasi terhadap schema response.
+
+    Return None kalau parameter tidak diisi (pakai field default route).
+    `id` selalu ikut supaya record tetap bisa dikenali / dipaginasi.
+    """
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in schema.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(schema.model_fields)}"
+        )
+    return list(dict.fromkeys(["id", *requested]))
+
+
+@lru_cache(maxsize=None)
+def partial_schema(schema):
+    """Turunan schema yang semua field-nya opsional (validator tetap berlaku)."""
+    overrides = {
+        name: (Optional[field.annotation], None)
+        for name, field in schema.model_fields.items()
+    }
+    return create_model(f"{schema.__name__}Partial", __base__=schema, **overrides)
+
+
+def dump_sparse(record: dict, schema, fields: list) -> dict:
+    return partial_schema(schema).model_validate(record).model_dump(mode="json", include=set(fields))
+
+
+def sparse_response(data, schema, fields: list, headers: Optional[dict] = None) -> JSONResponse:
+    """Response berisi hanya field yang diminta, untuk satu record atau list."""
+    start = time.perf_counter()
+    if isinstance(data, list):
+        content = [dump_sparse(record, schema, fields) for record in data]
+    else:
+        content = dump_sparse(data, schema, fields)
+    response = JSONResponse(content=content, headers=headers)
+    record_timing("serialize", time.perf_counter() - start)
+    return response
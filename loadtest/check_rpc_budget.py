@@ -0,0 +1,130 @@
+"""
+Cek budget RPC per endpoint dan pola N+1 terhadap stand-in Odoo.
+
+Semua skenario loadtest/run.py (plus alur tulis appointment) dijalankan
+in-process lewat TestClient; setiap request dicatat RpcRecorder lalu
+dibandingkan dengan RPC_BUDGETS / RPC_ITEM_BUDGETS di helper/rpc_budget.py.
+Exit code 1 kalau ada endpoint yang melewati budget atau punya pola N+1,
+jadi bisa dipasang di CI supaya round trip tambahan menggagalkan build.
+
+    python -m loadtest.check_rpc_budget
+    python -m loadtest.check_rpc_budget --repeat 5 --threshold 3
+"""
+import argparse
+import os
+import random
+import sys
+
+USERNAME = "admin"
+PASSWORD = "1234"
+
+
+def use_standin(odoo_url: str):
+    """Arahkan env aplikasi (Odoo + Nominatim) ke stand-in.
+
+    Harus sebelum config.settings di-import pertama kali.
+    """
+    os.environ.setdefault("ODOO_DB", "loadtest")
+    os.environ.setdefault("JWT_SECRET", "loadtest-secret-loadtest-secret-0000")
+    os.environ["ODOO_URL"] = odoo_url
+    os.environ["NOMINATIM_URL"] = f"{odoo_url}/reverse"
+
+
+def start_app(odoo_url: str):
+    """TestClient (sudah login) untuk main.app yang diarahkan ke stand-in.
+
+    Panggil ini sebelum modul aplikasi lain di-import (lihat use_standin).
+    """
+    use_standin(odoo_url)
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    client.__enter__()  # jalankan lifespan
+    response = client.post("/auth/login", json={"username": USERNAME, "password": PASSWORD})
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    return client
+
+
+def appointment_write_flow(client, rnd, state):
+    """create -> update -> state -> delete (endpoint tulis yang tidak ada di campuran load)."""
+    created = client.post("/appointments/", json={
+        "patient_id": rnd.choice(state["patient_ids"]), "date_appointment": "2025-01-01",
+        "appointment_line_ids": [{"product_id": 1, "qty": 1}, {"product_id": 2, "qty": 2}],
+        "display_name": None, "total_qty": 0, "date_of_birth": None,
+    })
+    if created.status_code != 200:
+        return created
+    appointment = created.json()
+    # PUT menulis semua field (bukan hanya yang dikirim), jadi kirim record lengkap
+    lines = [{**line, "qty": line["qty"] + 1} for line in appointment["appointment_line_ids"]]
+    values = {key: appointment[key] for key in ("patient_id", "date_appointment", "state")}
+    client.put(f"/appointments/{appointment['id']}", json={**values, "note": "budget", "appointment_line_ids": lines})
+    client.put(f"/appointments/{appointment['id']}/state", json={"state": "confirmed"})
+    return client.delete(f"/appointments/{appointment['id']}")
+
+
+def run(client, repeat: int, seed: int):
+    from helper.rpc_budget import RpcRecorder
+    from loadtest.run import SCENARIOS, discover
+
+    rnd = random.Random(seed)
+    state = discover(client)
+    scenarios = {name: scenario for name, (scenario, _) in SCENARIOS.items()}
+    scenarios["appointments.write_flow"] = appointment_write_flow
+    with RpcRecorder() as recorder:
+        for scenario in scenarios.values():
+            for _ in range(repeat):
+                scenario(client, rnd, state)
+    return recorder
+
+
+def report(recorder, threshold: int) -> int:
+    from helper.rpc_budget import budget_for
+
+    # per endpoint: request dengan sisa budget paling tipis (bulk: budget ikut jumlah item)
+    worst = {}
+    for record in recorder.records:
+        key = (record["method"], record["route"])
+        budget = budget_for(record)
+        margin = (budget if budget is not None else 0) - record["rpc_count"]
+        if key not in worst or margin < worst[key][0]:
+            worst[key] = (margin, record["rpc_count"], budget)
+    print(f"{'endpoint':<58}{'max rpc':>8}{'budget':>8}")
+    for (method, route), (_, count, budget) in sorted(worst.items(), key=lambda item: item[0][1]):
+        flag = "  <-- over" if budget is not None and count > budget else ""
+        print(f"{method + ' ' + route:<58}{count:>8}{budget if budget is not None else '-':>8}{flag}")
+
+    problems = sorted(set(recorder.problems(threshold=threshold)))
+    print()
+    if problems:
+        print("\n".join(problems))
+        return 1
+    print("Semua endpoint dalam budget, tidak ada pola N+1.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=int, default=3, help="minimal call berulang untuk dianggap N+1")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from loadtest.fake_odoo import start_in_thread
+
+    server, odoo_url = start_in_thread(seed=args.seed)
+    try:
+        client = start_app(odoo_url)
+        try:
+            recorder = run(client, args.repeat, args.seed)
+        finally:
+            client.__exit__(None, None, None)
+    finally:
+        server.shutdown()
+    sys.exit(report(recorder, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,541 @@
+"""
+Stand-in server Odoo untuk development dan load test.
+
+Mengimplementasikan `common.authenticate` dan `object.execute_kw`
+(search, search_read, read, create, write, unlink) untuk model yang dipakai
+router, lewat XML-RPC (/xmlrpc/2/*) dan JSON-RPC (/jsonrpc), ditambah
+endpoint `/reverse` yang meniru Nominatim. Data di-seed deterministik
+(`--seed`), latency + jitter bisa diinjeksi per RPC dan per geocode,
+plus ekor latency (`--straggler-ratio` RPC mendapat `--straggler-ms` ekstra).
+`GET /__stats__` mengembalikan jumlah RPC (total & per model.method),
+`POST /__reset__` mengosongkan hitungan itu.
+
+    python -m loadtest.fake_odoo --port 8069 --latency-ms 20 --jitter-ms 10
+"""
+import argparse
+import base64
+import json
+import random
+import sys
+import threading
+import time
+import xmlrpc.client
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+USERS = {"admin": ("1234", 2), "demo": ("demo", 6)}
+
+# record rule per (model, uid): search hanya melihat record yang cocok dengan
+# domain ini, read/write/unlink di luarnya gagal dengan AccessError
+RECORD_RULES = {
+    ("vehicle.fleet", 6): [("id", "<=", 50)],
+}
+
+# tipe field: char, int, float, bool, date, datetime, binary, m2o, o2m, m2m
+MODELS = {
+    "res.partner": {
+        "name": ("char",), "email": ("char",), "phone": ("char",),
+    },
+    "product.product": {
+        "name": ("char",),
+    },
+    "hospital.tag": {
+        "name": ("char",),
+    },
+    "hospital.patient": {
+        "name": ("char",), "date_of_birth": ("date",), "gender": ("char",),
+        "is_minor": ("bool",), "guardian": ("char",),
+        "tag_ids": ("m2m", "hospital.tag"),
+        "image": ("binary",), "image_medium": ("binary",), "image_small": ("binary",),
+    },
+    "hospital.appointment": {
+        "reference": ("char",), "patient_id": ("m2o", "hospital.patient"),
+        "date_appointment": ("date",), "note": ("char",), "state": ("char",),
+        "appointment_line_ids": ("o2m", "hospital.appointment.line", "appointment_id"),
+        "total_qty": ("float",), "date_of_birth": ("date",),
+    },
+    "hospital.appointment.line": {
+        "appointment_id": ("m2o", "hospital.appointment"),
+        "product_id": ("m2o", "product.product"), "qty": ("float",),
+    },
+    "vehicle.head": {
+        "nolambung": ("char",),
+    },
+    "vehicle.fleet": {
+        "nopol": ("char",), "head_id": ("m2o", "vehicle.head"),
+        "last_location_id": ("m2o", "vehicle.location"),
+    },
+    "vehicle.location": {
+        "fleet_id": ("m2o", "vehicle.fleet"), "latitude": ("float",),
+        "longitude": ("float",), "address": ("char",), "village": ("char",),
+        "district": ("char",), "city": ("char",), "province": ("char",),
+        "postcode": ("char",), "timestamp": ("datetime",),
+    },
+}
+
+NAME_FIELD = {
+    "vehicle.fleet": "nopol", "vehicle.head": "nolambung",
+    "hospital.appointment": "reference", "hospital.appointment.line": None,
+    "vehicle.location": None,
+}
+
+DATETIME_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+class OdooError(Exception):
+    pass
+
+
+class FakeOdoo:
+    def __init__(self, seed=0, patients=200, appointments=300, fleets=100, image_kb=48):
+        self.lock = threading.RLock()
+        self.tables = {model: {} for model in MODELS}
+        self.next_id = {model: 1 for model in MODELS}
+        self.rpc_count = 0
+        self.rpc_by_method = {}
+        self._seed(random.Random(seed), patients, appointments, fleets, image_kb)
+
+    # ------------------------------------------------------------ seed data
+    def _seed(self, rnd, patients, appointments, fleets, image_kb):
+        for i in range(1, 41):
+            self._create("res.partner", {
+                "name": f"Partner {i}", "email": f"partner{i}@example.com",
+                "phone": f"+62-31-{1000 + i}",
+            })
+        for i in range(1, 21):
+            self._create("product.product", {"name": f"Product {i}"})
+        for name in ("vip", "bpjs", "umum", "anak"):
+            self._create("hospital.tag", {"name": name})
+        image = base64.encodebytes(_fake_png(image_kb * 1024, rnd)).decode()
+        small = base64.encodebytes(_fake_png(2 * 1024, rnd)).decode()
+        for i in range(1, patients + 1):
+            self._create("hospital.patient", {
+                "name": f"Patient {i}",
+                "date_of_birth": f"{1950 + i % 60}-0{1 + i % 9}-1{i % 9}",
+                "gender": rnd.choice(["male", "female"]),
+                "is_minor": i % 7 == 0, "guardian": f"Guardian {i}" if i % 7 == 0 else False,
+                "tag_ids": [(6, 0, rnd.sample(range(1, 5), rnd.randint(0, 2)))],
+                "image": image, "image_medium": small, "image_small": small,
+            })
+        for i in range(1, appointments + 1):
+            self._create("hospital.appointment", {
+                "reference": f"APP/{i:05d}", "patient_id": rnd.randint(1, patients),
+                "date_appointment": f"2025-0{1 + i % 9}-1{i % 9}",
+                "note": f"Note {i}" if i % 3 else False, "state": "draft",
+                "appointment_line_ids": [
+                    (0, 0, {"product_id": rnd.randint(1, 20), "qty": float(rnd.randint(1, 5))})
+                    for _ in range(rnd.randint(1, 4))
+                ],
+            })
+        for i in range(1, fleets + 1):
+            self._create("vehicle.head", {"nolambung": f"LB-{i:03d}"})
+        now = datetime.utcnow()
+        for i in range(1, fleets + 1):
+            fleet_id = self._create("vehicle.fleet", {"nopol": f"L-{1000 + i}-AB", "head_id": i})
+            for j in range(3):
+                self._create("vehicle.location", {
+                    "fleet_id": fleet_id,
+                    "latitude": -7.25 + rnd.random() / 10, "longitude": 112.75 + rnd.random() / 10,
+                    "address": f"Jalan {i}/{j}", "city": "Surabaya", "province": "Jawa Timur",
+                    "postcode": "60111",
+                    "timestamp": (now - timedelta(minutes=10 * (3 - j))).strftime(DATETIME_FMT),
+                })
+
+    # ------------------------------------------------------------ rpc entry
+    def authenticate(self, db, login, password, ctx):
+        user = USERS.get(login)
+        if not user or user[0] != password:
+            return False
+        return user[1]
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs=None):
+        kwargs = kwargs or {}
+        if not any(u == (password, uid) for u in USERS.values()):
+            raise OdooError("AccessDenied")
+        if model not in MODELS:
+            raise OdooError(f"Object {model} doesn't exist")
+        with self.lock:
+            self.rpc_count += 1
+            key = f"{model}.{method}"
+            self.rpc_by_method[key] = self.rpc_by_method.get(key, 0) + 1
+            rule = RECORD_RULES.get((model, uid), [])
+            if method in ("search", "search_count", "search_read"):
+                args = list(args)
+                domain = args.pop(0) if args else kwargs.pop("domain", [])
+                domain = rule + (domain or [])
+            if method == "search":
+                return self._search(model, domain, *args, **kwargs)
+            if method == "search_count":
+                return len(self._search(model, domain))
+            if method == "search_read":
+                fields = kwargs.pop("fields", None)
+                ids = self._search(model, domain, **kwargs)
+                return self._read(model, ids, fields)
+            if method in ("read", "write", "unlink") and rule:
+                self._check_rule(model, args[0], rule)
+            if method == "read":
+                return self._read(model, args[0], args[1] if len(args) > 1 else kwargs.get("fields"))
+            if method == "create":
+                return self._create(model, args[0])
+            if method == "write":
+                return self._write(model, args[0], args[1])
+            if method == "unlink":
+                return self._unlink(model, args[0])
+        raise OdooError(f"Method {method} not supported")
+
+    def _check_rule(self, model, ids, rule):
+        for rid in ids:
+            rec = self.tables[model].get(rid)
+            if rec is not None and not self._match(model, rec, rule):
+                raise OdooError(f"AccessError: record rule {model}({rid})")
+
+    # ------------------------------------------------------------ orm
+    def _now(self):
+        return datetime.utcnow().strftime(DATETIME_FMT)
+
+    def _create(self, model, vals):
+        rid = self.next_id[model]
+        self.next_id[model] += 1
+        rec = {"id": rid, "create_date": self._now(), "write_date": self._now()}
+        for name, spec in MODELS[model].items():
+            if spec[0] in ("o2m", "m2m"):
+                rec[name] = []
+            elif spec[0] == "m2o":
+                rec[name] = False
+            elif spec[0] in ("float", "int"):
+                rec[name] = 0.0 if spec[0] == "float" else 0
+            else:
+                rec[name] = False
+        if model == "hospital.appointment":
+            rec["state"] = "draft"
+        self.tables[model][rid] = rec
+        self._apply(model, rec, vals)
+        self._touch_parents(model, rec)
+        return rid
+
+    def _write(self, model, ids, vals):
+        for rid in ids:
+            rec = self.tables[model].get(rid)
+            if rec is None:
+                raise OdooError(f"Record {model}({rid}) does not exist")
+            self._apply(model, rec, vals)
+            rec["write_date"] = self._now()
+            self._touch_parents(model, rec)
+        return True
+
+    def _unlink(self, model, ids):
+        for rid in ids:
+            rec = self.tables[model].pop(rid, None)
+            if rec is None:
+                raise OdooError(f"Record {model}({rid}) does not exist")
+            for name, spec in MODELS[model].items():
+                if spec[0] == "o2m":
+                    self._unlink(spec[1], [i for i in rec[name] if i in self.tables[spec[1]]])
+            self._touch_parents(model, rec, removed=True)
+        return True
+
+    def _apply(self, model, rec, vals):
+        for name, value in vals.items():
+            spec = MODELS[model].get(name)
+            if spec is None:
+                continue
+            if spec[0] == "o2m":
+                for cmd in value or []:
+                    if cmd[0] == 0:
+                        self._create(spec[1], {**cmd[2], spec[2]: rec["id"]})
+                    elif cmd[0] == 1:
+                        self._write(spec[1], [cmd[1]], cmd[2])
+                    elif cmd[0] == 2:
+                        self._unlink(spec[1], [cmd[1]])
+            elif spec[0] == "m2m":
+                ids = list(rec[name])
+                for cmd in value or []:
+                    if isinstance(cmd, int):
+                        ids.append(cmd)
+                    elif cmd[0] == 6:
+                        ids = list(cmd[2])
+                    elif cmd[0] == 4:
+                        ids.append(cmd[1])
+                    elif cmd[0] == 3:
+                        ids = [i for i in ids if i != cmd[1]]
+                    elif cmd[0] == 5:
+                        ids = []
+                rec[name] = ids
+            elif spec[0] == "m2o":
+                if isinstance(value, (list, tuple)):
+                    value = value[0] if value else False
+                if value and value not in self.tables[spec[1]]:
+                    raise OdooError(f"Record {spec[1]}({value}) does not exist")
+                rec[name] = value or False
+            elif spec[0] == "binary" and value and name == "image":
+                rec[name] = value
+                if "image_small" in MODELS[model]:
+                    rec["image_small"] = value
+                    rec["image_medium"] = value
+            else:
+                rec[name] = value
+
+    def _touch_parents(self, model, rec, removed=False):
+        # field o2m & computed ikut berubah di parent
+        for parent_model, fields in MODELS.items():
+            for name, spec in fields.items():
+                if spec[0] == "o2m" and spec[1] == model:
+                    parent_id = rec.get(spec[2])
+                    parent = self.tables[parent_model].get(parent_id)
+                    if not parent:
+                        continue
+                    if removed:
+                        parent[name] = [i for i in parent[name] if i != rec["id"]]
+                    elif rec["id"] not in parent[name]:
+                        parent[name].append(rec["id"])
+        if model == "vehicle.location" and not removed:
+            fleet = self.tables["vehicle.fleet"].get(rec.get("fleet_id"))
+            if fleet:
+                fleet["last_location_id"] = rec["id"]
+                fleet["write_date"] = self._now()
+
+    def _compute(self, model, rec, name):
+        if model == "hospital.appointment" and name == "total_qty":
+            lines = self.tables["hospital.appointment.line"]
+            return float(sum(lines[i]["qty"] for i in rec["appointment_line_ids"] if i in lines))
+        if model == "hospital.appointment" and name == "date_of_birth":
+            patient = self.tables["hospital.patient"].get(rec["patient_id"])
+            return patient["date_of_birth"] if patient else False
+        if name == "display_name":
+            return self._display_name(model, rec["id"])
+        if name == "__last_update":
+            return rec["write_date"]
+        return rec.get(name, False)
+
+    def _display_name(self, model, rid):
+        rec = self.tables[model].get(rid)
+        if rec is None:
+            return False
+        name_field = NAME_FIELD.get(model, "name")
+        if name_field is None:
+            return f"{model},{rid}"
+        return rec.get(name_field) or f"{model},{rid}"
+
+    def _read(self, model, ids, fields=None):
+        fields = fields or list(MODELS[model]) + ["display_name"]
+        result = []
+        for rid in ids:
+            rec = self.tables[model].get(rid)
+            if rec is None:
+                raise OdooError(f"Record {model}({rid}) does not exist or has been deleted")
+            row = {"id": rid}
+            for name in fields:
+                if name == "id":
+                    continue
+                spec = MODELS[model].get(name)
+                value = self._compute(model, rec, name)
+                if spec and spec[0] == "m2o" and value:
+                    value = [value, self._display_name(spec[1], value)]
+                elif spec and spec[0] in ("o2m", "m2m"):
+                    value = list(value)
+                row[name] = value
+            result.append(row)
+        return result
+
+    def _search(self, model, domain=None, limit=None, offset=0, order=None, **_):
+        rows = [rec for rec in self.tables[model].values() if self._match(model, rec, domain or [])]
+        if order:
+            for part in reversed(order.split(",")):
+                bits = part.strip().split()
+                key, desc = bits[0], len(bits) > 1 and bits[1].lower() == "desc"
+                rows.sort(key=lambda r: (r.get(key) is False, r.get(key)), reverse=desc)
+        else:
+            rows.sort(key=lambda r: r["id"])
+        rows = rows[offset or 0:]
+        if limit:
+            rows = rows[:limit]
+        return [r["id"] for r in rows]
+
+    def _match(self, model, rec, domain):
+        stack = []
+        for term in reversed(domain):
+            if term == "&":
+                stack.append(stack.pop() and stack.pop())
+            elif term == "|":
+                a, b = stack.pop(), stack.pop()
+                stack.append(a or b)
+            elif term == "!":
+                stack.append(not stack.pop())
+            else:
+                stack.append(self._match_term(model, rec, term))
+        return all(stack)
+
+    def _match_term(self, model, rec, term):
+        field, op, value = term
+        actual = rec["id"] if field == "id" else self._compute(model, rec, field)
+        if op == "=":
+            return actual == value
+        if op == "!=":
+            return actual != value
+        if op == "in":
+            return actual in value or (isinstance(actual, list) and bool(set(actual) & set(value)))
+        if op == "not in":
+            return actual not in value
+        if op in ("ilike", "like"):
+            return str(value).lower() in str(actual or "").lower()
+        if actual is False:
+            return False
+        return {">": actual > value, ">=": actual >= value,
+                "<": actual < value, "<=": actual <= value}[op]
+
+
+def _fake_png(size, rnd):
+    header = b"\x89PNG\r\n\x1a\n"
+    return header + bytes(rnd.getrandbits(8) for _ in range(max(size - len(header), 0)))
+
+
+def fake_reverse(lat, lon):
+    return {
+        "display_name": f"Jalan Palsu {lat:.4f},{lon:.4f}, Surabaya, Jawa Timur, 60111, Indonesia",
+        "address": {
+            "road": "Jalan Palsu", "village": "Kelurahan Palsu", "suburb": "Tegalsari",
+            "city": "Surabaya", "state": "Jawa Timur", "postcode": "60111",
+            "country": "Indonesia",
+        },
+    }
+
+
+def make_handler(odoo, latency_ms=0.0, jitter_ms=0.0, geocode_latency_ms=0.0,
+                 straggler_ratio=0.0, straggler_ms=0.0):
+    def sleep(base, stragglers=False):
+        delay = base + (random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0)
+        if stragglers and straggler_ratio and random.random() < straggler_ratio:
+            delay += straggler_ms
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # header & body ditulis terpisah; tanpa ini keep-alive kena delayed ACK ~40ms
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body, content_type, status=200):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/reverse":
+                sleep(geocode_latency_ms)
+                qs = parse_qs(url.query)
+                body = json.dumps(fake_reverse(float(qs["lat"][0]), float(qs["lon"][0]))).encode()
+                return self._send(body, "application/json")
+            if url.path == "/__stats__":
+                with odoo.lock:
+                    body = json.dumps({"rpc_count": odoo.rpc_count, "by_method": dict(odoo.rpc_by_method)}).encode()
+                return self._send(body, "application/json")
+            self._send(b"not found", "text/plain", 404)
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            path = urlparse(self.path).path
+            if path == "/__reset__":
+                with odoo.lock:
+                    odoo.rpc_count, odoo.rpc_by_method = 0, {}
+                return self._send(b"{}", "application/json")
+            sleep(latency_ms, stragglers=True)
+            if path == "/jsonrpc":
+                return self._jsonrpc(raw)
+            if path.startswith("/xmlrpc/2/"):
+                return self._xmlrpc(path.rsplit("/", 1)[-1], raw)
+            self._send(b"not found", "text/plain", 404)
+
+        def _dispatch(self, service, method, params):
+            if service == "common" and method == "authenticate":
+                return odoo.authenticate(*params)
+            if service == "object" and method == "execute_kw":
+                return odoo.execute_kw(*params)
+            raise OdooError(f"{service}.{method} not supported")
+
+        def _xmlrpc(self, service, raw):
+            params, method = xmlrpc.client.loads(raw)
+            try:
+                result = self._dispatch(service, method, params)
+                body = xmlrpc.client.dumps((result,), methodresponse=True, allow_none=True)
+            except Exception as e:
+                body = xmlrpc.client.dumps(xmlrpc.client.Fault(1, str(e)), allow_none=True)
+            self._send(body.encode(), "text/xml")
+
+        def _jsonrpc(self, raw):
+            payload = json.loads(raw)
+            params = payload.get("params", {})
+            try:
+                result = self._dispatch(params.get("service"), params.get("method"), params.get("args", []))
+                body = {"jsonrpc": "2.0", "id": payload.get("id"), "result": result}
+            except Exception as e:
+                body = {"jsonrpc": "2.0", "id": payload.get("id"),
+                        "error": {"code": 200, "message": "Odoo Server Error",
+                                  "data": {"name": type(e).__name__, "message": str(e)}}}
+            self._send(json.dumps(body).encode(), "application/json")
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # client memutus koneksi (mis. RPC hedging yang kalah): bukan error stand-in
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def serve(host="127.0.0.1", port=8069, **options):
+    latency = options.pop("latency_ms", 0.0)
+    jitter = options.pop("jitter_ms", 0.0)
+    geocode_latency = options.pop("geocode_latency_ms", 0.0)
+    straggler_ratio = options.pop("straggler_ratio", 0.0)
+    straggler_ms = options.pop("straggler_ms", 0.0)
+    odoo = FakeOdoo(**options)
+    server = _Server(
+        (host, port), make_handler(odoo, latency, jitter, geocode_latency, straggler_ratio, straggler_ms)
+    )
+    server.odoo = odoo
+    return server
+
+
+def start_in_thread(port=0, **options):
+    """Jalankan stand-in di thread daemon (port 0 = port bebas); return (server, url)."""
+    server = serve("127.0.0.1", port, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Odoo + Nominatim")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8069)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--geocode-latency-ms", type=float, default=0.0)
+    parser.add_argument("--straggler-ratio", type=float, default=0.0, help="fraksi RPC yang sangat lambat")
+    parser.add_argument("--straggler-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--appointments", type=int, default=300)
+    parser.add_argument("--fleets", type=int, default=100)
+    parser.add_argument("--image-kb", type=int, default=48)
+    args = parser.parse_args()
+    server = serve(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                   geocode_latency_ms=args.geocode_latency_ms, straggler_ratio=args.straggler_ratio,
+                   straggler_ms=args.straggler_ms, seed=args.seed, patients=args.patients,
+                   appointments=args.appointments, fleets=args.fleets, image_kb=args.image_kb)
+    print(f"Fake Odoo listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Plugin pytest untuk regression test round trip ke Odoo.
+
+Stand-in Odoo (loadtest/fake_odoo.py) dijalankan saat pytest mulai dan env
+aplikasi diarahkan ke sana sebelum test module di-import, jadi unit test
+boleh langsung import modul aplikasi (config.settings butuh ODOO_URL dkk.).
+
+Fixture:
+- `odoo_standin`: URL stand-in Odoo, satu per sesi.
+- `odoo_server`: FakeOdoo di balik stand-in (tables, execute_kw).
+- `api_client`: TestClient main.app yang sudah login ke stand-in.
+- `rpc_recorder`: RpcRecorder aktif selama satu test.
+
+conftest.py di root repo sudah mengaktifkannya untuk tests/ (lihat
+tests/test_rpc_budget.py); di luar itu pakai `pytest -p loadtest.pytest_plugin`, lalu mis.:
+
+    def test_appointment_detail_budget(api_client, rpc_recorder):
+        api_client.get("/appointments/1")
+        rpc_recorder.assert_budget()             # budget dari RPC_BUDGETS
+        rpc_recorder.assert_budget(max_rpcs=2)   # atau batas eksplisit
+"""
+import pytest
+
+_standin = None  # (server, url)
+
+
+def pytest_configure(config):
+    global _standin
+    from loadtest.check_rpc_budget import use_standin
+    from loadtest.fake_odoo import start_in_thread
+
+    _standin = start_in_thread()
+    use_standin(_standin[1])
+
+
+def pytest_unconfigure(config):
+    if _standin is not None:
+        _standin[0].shutdown()
+
+
+@pytest.fixture(scope="session")
+def odoo_standin():
+    return _standin[1]
+
+
+@pytest.fixture(scope="session")
+def odoo_server(odoo_standin):
+    return _standin[0].odoo
+
+
+@pytest.fixture(scope="session")
+def api_client(odoo_standin):
+    from loadtest.check_rpc_budget import start_app
+
+    client = start_app(odoo_standin)
+    yield client
+    client.__exit__(None, None, None)
+
+
+@pytest.fixture
+def rpc_recorder():
+    from helper.rpc_budget import RpcRecorder
+
+    with RpcRecorder() as recorder:
+        yield recorder
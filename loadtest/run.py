@@ -0,0 +1,366 @@
+"""
+Load test end-to-end API terhadap stand-in Odoo (loadtest/fake_odoo.py).
+
+Dua fase:
+1. probe: setiap skenario dijalankan berurutan beberapa kali (setelah
+   warm-up) untuk mengukur RPC ke Odoo per request.
+2. load: campuran skenario berbobot dijalankan `--concurrency` worker
+   selama `--duration` detik; hasilnya throughput, p50/p95/p99 per
+   skenario dan total RPC per request.
+
+Dengan --spawn, stand-in Odoo dijalankan di proses ini dan API dijalankan
+lewat uvicorn (env ODOO_URL/NOMINATIM_URL diarahkan ke stand-in; env lain
+seperti RESULT_CACHE_ENABLED ikut diteruskan; --api-workers > 1 memakai
+serve.py). Tanpa --spawn, API dan
+stand-in harus sudah jalan di --api-url / --odoo-url.
+
+    python -m loadtest.run --spawn --duration 20 --concurrency 16
+    python -m loadtest.run --spawn --latency-ms 20 --json before.json
+    python -m loadtest.run --spawn --compare before.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+import httpx
+
+USERNAME = "admin"
+PASSWORD = "1234"
+
+
+# ---------------------------------------------------------------- skenario
+# setiap skenario: fungsi(client, rnd, state) -> httpx.Response
+
+def list_patients(client, rnd, state):
+    return client.get("/patients/", params={"limit": 50})
+
+
+def list_patients_sparse(client, rnd, state):
+    return client.get("/patients/", params={"limit": 50, "fields": "name,gender"})
+
+
+def get_patient(client, rnd, state):
+    return client.get(f"/patients/{rnd.choice(state['patient_ids'])}")
+
+
+def get_patient_image(client, rnd, state):
+    return client.get(f"/patients/{rnd.choice(state['patient_ids'])}/image", params={"size": "small"})
+
+
+def list_appointments(client, rnd, state):
+    return client.get("/appointments/", params={"limit": 50})
+
+
+def get_appointment(client, rnd, state):
+    return client.get(f"/appointments/{rnd.choice(state['appointment_ids'])}")
+
+
+def appointment_lines(client, rnd, state):
+    return client.get(f"/appointment_line/appointment/{rnd.choice(state['appointment_ids'])}")
+
+
+def get_appointment_line(client, rnd, state):
+    return client.get(f"/appointment_line/{rnd.choice(state['line_ids'])}")
+
+
+def update_appointment_line(client, rnd, state):
+    line_id = rnd.choice(state["line_ids"])
+    values = {"id": line_id, "product_id": rnd.randint(1, 20), "qty": rnd.randint(1, 5)}
+    return client.put(f"/appointment_line/{line_id}", json=values)
+
+
+def list_partners(client, rnd, state):
+    return client.get("/partners/", params={"limit": 50})
+
+
+def partner_crud(client, rnd, state):
+    response = client.post("/partners/", json={"name": f"Load {rnd.random():.6f}", "email": "load@example.com"})
+    if response.status_code != 200:
+        return response
+    partner_id = response.json()["id"]
+    client.put(f"/partners/{partner_id}", json={"name": "Load renamed"})
+    return client.delete(f"/partners/{partner_id}")
+
+
+def get_vehicle(client, rnd, state):
+    return client.get(f"/vehicle/{rnd.choice(state['nopols'])}")
+
+
+def _karlo_fix(rnd, nopol):
+    return {
+        "gps_imei": "356307042441013", "gps_vendor": "Teltonika", "gps_network": "4G",
+        "plate_number": nopol,
+        "latitude": -7.25 + rnd.random() / 10, "longitude": 112.75 + rnd.random() / 10,
+        "altitude": 0.0, "bearing": 0.0, "speed": 30.0, "battery": 80.0,
+        "lastUpdated": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def karlo_update(client, rnd, state):
+    return client.post("/vehicle/karlo-update/", json=_karlo_fix(rnd, rnd.choice(state["nopols"])))
+
+
+def karlo_bulk(client, rnd, state):
+    fixes = [_karlo_fix(rnd, rnd.choice(state["nopols"])) for _ in range(20)]
+    return client.post("/vehicle/karlo-update/bulk/", json=fixes)
+
+
+# nama -> (fungsi, bobot di fase load)
+SCENARIOS = {
+    "patients.list": (list_patients, 10),
+    "patients.list_sparse": (list_patients_sparse, 5),
+    "patients.get": (get_patient, 10),
+    "patients.image": (get_patient_image, 5),
+    "appointments.list": (list_appointments, 10),
+    "appointments.get": (get_appointment, 10),
+    "appointment_line.by_appointment": (appointment_lines, 5),
+    "appointment_line.get": (get_appointment_line, 5),
+    "appointment_line.update": (update_appointment_line, 2),
+    "partners.list": (list_partners, 5),
+    "partners.crud": (partner_crud, 1),
+    "vehicle.get": (get_vehicle, 10),
+    "vehicle.karlo_update": (karlo_update, 10),
+    "vehicle.karlo_bulk": (karlo_bulk, 1),
+}
+
+
+# ---------------------------------------------------------------- helper
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def rpc_count(odoo_url):
+    return httpx.get(f"{odoo_url}/__stats__").json()["rpc_count"]
+
+
+def login(api_url):
+    response = httpx.post(f"{api_url}/auth/login", json={"username": USERNAME, "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def discover(client):
+    """Ambil id/nopol yang ada untuk dipakai skenario."""
+    patients = client.get("/patients/", params={"limit": 100, "fields": "id"}).json()
+    appointments = client.get("/appointments/", params={"limit": 100}).json()
+    return {
+        "patient_ids": [p["id"] for p in patients],
+        "appointment_ids": [a["id"] for a in appointments],
+        "line_ids": [line["id"] for a in appointments for line in a["appointment_line_ids"]],
+        "nopols": [f"L-{1000 + i}-AB" for i in range(1, 51)],
+    }
+
+
+def wait_until_up(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} tidak bisa dihubungi")
+
+
+# ---------------------------------------------------------------- fase
+def run_probe(client, odoo_url, state, repeat, seed):
+    """RPC per request per skenario, diukur berurutan setelah warm-up."""
+    rnd = random.Random(seed)
+    result = {}
+    for name, (scenario, _) in SCENARIOS.items():
+        scenario(client, rnd, state)  # warm-up (cache, index, koneksi)
+        before = rpc_count(odoo_url)
+        errors = 0
+        for _ in range(repeat):
+            response = scenario(client, rnd, state)
+            errors += response.status_code >= 400
+        result[name] = {"rpc_per_request": (rpc_count(odoo_url) - before) / repeat, "errors": errors}
+    return result
+
+
+def run_load(api_url, headers, odoo_url, state, concurrency, duration, seed):
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][1] for name in names]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(index):
+        rnd = random.Random(seed + index)
+        with httpx.Client(base_url=api_url, headers=headers, timeout=30.0) as client:
+            while time.monotonic() < stop_at:
+                name = rnd.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    failed = SCENARIOS[name][0](client, rnd, state).status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies[name].append(elapsed)
+                    errors[name] += failed
+
+    before = rpc_count(odoo_url)
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+    rpcs = rpc_count(odoo_url) - before
+
+    total = sum(len(values) for values in latencies.values())
+    everything = [value for values in latencies.values() for value in values]
+    scenarios = {
+        name: {
+            "requests": len(values),
+            "errors": errors[name],
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+        for name, values in latencies.items() if values
+    }
+    return {
+        "requests": total,
+        "errors": sum(errors.values()),
+        "throughput_rps": round(total / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(everything, 50), 2),
+        "p95_ms": round(percentile(everything, 95), 2),
+        "p99_ms": round(percentile(everything, 99), 2),
+        "rpc_per_request": round(rpcs / total, 3) if total else 0.0,
+        "scenarios": scenarios,
+    }
+
+
+# ---------------------------------------------------------------- spawn
+def spawn(args):
+    from loadtest.fake_odoo import start_in_thread
+
+    server, odoo_url = start_in_thread(
+        args.odoo_port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        geocode_latency_ms=args.geocode_latency_ms, seed=args.seed,
+    )
+    env = {
+        "ODOO_DB": "loadtest",
+        "JWT_SECRET": "loadtest-secret-loadtest-secret-0000",
+        **os.environ,
+        "ODOO_URL": odoo_url,
+        "NOMINATIM_URL": f"{odoo_url}/reverse",
+    }
+    if args.api_workers > 1:
+        # multi-worker lewat serve.py: sesi & cache dibagi lewat shared store sementara
+        shared_store = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "shared.sqlite3")
+        command = ["serve.py", "--workers", str(args.api_workers), "--shared-store", shared_store]
+    else:
+        command = ["-m", "uvicorn", "main:app"]
+    api = subprocess.Popen(
+        [sys.executable, *command, "--port", str(args.api_port), "--log-level", "warning"],
+        env=env,
+    )
+    return server, api, odoo_url, f"http://127.0.0.1:{args.api_port}"
+
+
+# ---------------------------------------------------------------- output
+def print_report(report, baseline=None):
+    probe, load = report["probe"], report["load"]
+    base_load = (baseline or {}).get("load", {}).get("scenarios", {})
+    base_probe = (baseline or {}).get("probe", {})
+    print(f"{'scenario':<34}{'rpc/req':>9}{'reqs':>8}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name in SCENARIOS:
+        row = load["scenarios"].get(name, {})
+        line = (
+            f"{name:<34}{probe[name]['rpc_per_request']:>9.2f}{row.get('requests', 0):>8}"
+            f"{row.get('errors', 0):>6}{row.get('p50_ms', 0):>10.2f}{row.get('p95_ms', 0):>10.2f}"
+            f"{row.get('p99_ms', 0):>10.2f}"
+        )
+        if name in base_load:
+            old = base_load[name]
+            line += f"   (p95 {old['p95_ms']:.2f} -> {row.get('p95_ms', 0):.2f}"
+            line += f", rpc {base_probe.get(name, {}).get('rpc_per_request', 0):.2f})"
+        print(line)
+    print()
+    summary = (
+        f"total: {load['requests']} req, {load['errors']} error, {load['throughput_rps']} req/s, "
+        f"p50 {load['p50_ms']} ms, p95 {load['p95_ms']} ms, p99 {load['p99_ms']} ms, "
+        f"{load['rpc_per_request']} RPC/req"
+    )
+    print(summary)
+    if baseline:
+        old = baseline["load"]
+        print(
+            f"baseline: {old['throughput_rps']} req/s, p50 {old['p50_ms']} ms, p95 {old['p95_ms']} ms, "
+            f"p99 {old['p99_ms']} ms, {old['rpc_per_request']} RPC/req"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spawn", action="store_true", help="jalankan stand-in Odoo + uvicorn sendiri")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--odoo-url", default="http://127.0.0.1:8069")
+    parser.add_argument("--api-port", type=int, default=8000)
+    parser.add_argument("--api-workers", type=int, default=1)
+    parser.add_argument("--odoo-port", type=int, default=8069)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency per RPC di stand-in (--spawn)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--geocode-latency-ms", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--probe-repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    parser.add_argument("--compare", help="file JSON hasil run sebelumnya")
+    args = parser.parse_args()
+
+    server = api = None
+    api_url, odoo_url = args.api_url, args.odoo_url
+    if args.spawn:
+        server, api, odoo_url, api_url = spawn(args)
+    try:
+        wait_until_up(f"{odoo_url}/__stats__")
+        wait_until_up(f"{api_url}/docs")
+        headers = login(api_url)
+        with httpx.Client(base_url=api_url, headers=headers, timeout=30.0) as client:
+            state = discover(client)
+            probe = run_probe(client, odoo_url, state, args.probe_repeat, args.seed)
+        load = run_load(api_url, headers, odoo_url, state, args.concurrency, args.duration, args.seed)
+    finally:
+        if api is not None:
+            api.terminate()
+            api.wait()
+        if server is not None:
+            server.shutdown()
+
+    report = {
+        "config": {
+            "concurrency": args.concurrency, "duration": args.duration,
+            "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+        },
+        "probe": probe,
+        "load": load,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
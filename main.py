@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from auth.login import router as auth_router
 from routers.partner_routes import router as partner_router
@@ -5,20 +6,87 @@ from routers.patient_routes import router as patient_router
 from routers.appointment_routes import router as appointment_router
 from routers.appointment_line_routes import router as appointment_line_routes
 import uvicorn
-from routers.vehicle_fleet_routes import router as fleet_router
+from routers.vehicle_fleet_routes import router as fleet_router, close_geocoder_client, karlo_queue
+from config.settings import settings
+from routers.stats_routes import router as stats_router
+from routers.metrics_routes import router as metrics_router
+from odoo_client.transport import close_pools
+from odoo_client.async_model import close_async_client
+from odoo_client.base_model import OdooModel
+from odoo_client.client import get_service_user
+from helper.fleet_index import fleet_index
+from helper.position_store import position_store
+from helper.image_pipeline import BodySizeLimitMiddleware, close_image_pool
+from helper.replica import replica
+from helper.server_timing import ServerTimingMiddleware
+from helper.deadline import DeadlineMiddleware
+from fastapi.concurrency import run_in_threadpool
+import anyio.to_thread
+import logging
+
+logger = logging.getLogger(__name__)
+
+def warm_up_caches():
+    """Isi cache lokal pakai akun service (kalau dikonfigurasi)."""
+    service_user = get_service_user()
+    if service_user is None:
+        return
+    fleet_model = OdooModel("vehicle.fleet", service_user["uid"], service_user["username"], service_user["password"])
+    fleet_index.refresh(fleet_model, force=True)
+    if position_store is not None:
+        location_model = OdooModel("vehicle.location", service_user["uid"], service_user["username"], service_user["password"])
+        position_store.seed(fleet_model, location_model)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WEB_THREADS > 0:
+        # ukuran threadpool handler sync (default anyio 40); serve.py menurunkannya dari CPU
+        anyio.to_thread.current_default_thread_limiter().total_tokens = settings.WEB_THREADS
+    try:
+        await run_in_threadpool(warm_up_caches)
+    except Exception:
+        # Odoo belum siap bukan alasan untuk gagal start; cache terisi saat request pertama
+        logger.exception("Warm-up cache gagal")
+    if settings.KARLO_INGEST_MODE == "queue":
+        karlo_queue.start()
+    if settings.REPLICA_ENABLED and replica.models:
+        replica.start()
+    yield
+    await replica.stop()
+    await karlo_queue.stop()
+    close_pools()
+    await close_async_client()
+    await close_geocoder_client()
+    close_image_pool()
 
 app = FastAPI(
     title="Odoo XML-RPC FastAPI",
     description="API FastAPI untuk CRUD res.partner di Odoo via XML-RPC dengan login dinamis dan JWT",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
+# upload gambar patient: batas file + sedikit ruang untuk field form lain
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=settings.PATIENT_IMAGE_MAX_UPLOAD_BYTES + 64 * 1024,
+    path_prefix="/patients",
+)
+
+# header X-Request-Timeout -> deadline request (lihat helper/deadline.py)
+app.add_middleware(DeadlineMiddleware)
+
+# paling luar supaya total & serialize mencakup middleware lain
+app.add_middleware(ServerTimingMiddleware, header=settings.SERVER_TIMING_HEADER)
+
 app.include_router(auth_router)
 app.include_router(fleet_router)
 app.include_router(partner_router)
 app.include_router(patient_router)
 app.include_router(appointment_router)
 app.include_router(appointment_line_routes)
+app.include_router(stats_router)
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8002, reload=True)
\ No newline at end of file
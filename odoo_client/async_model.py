@@ -0,0 +1,194 @@
+import xmlrpc.client
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from config.settings import settings
+from odoo_client.jsonrpc import JSONRPC_PATH, encode_call, decode_reply
+from odoo_client.batching import AsyncReadCoalescer
+from odoo_client import signals
+from odoo_client.result_cache import result_cache, cacheable
+from odoo_client.instrumentation import track_rpc, add_rpc_bytes
+from odoo_client.limiter import odoo_guard
+from odoo_client.hedging import hedger, HEDGE_METHODS
+from odoo_client.deadline import rpc_timeout, RpcTimeout
+
+_client = None
+
+read_coalescer = (
+    AsyncReadCoalescer(settings.ODOO_READ_COALESCE_MS / 1000.0)
+    if settings.ODOO_READ_COALESCE_MS > 0 else None
+)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """AsyncClient bersama (keep-alive) untuk semua AsyncOdooModel."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=settings.ODOO_URL,
+            timeout=httpx.Timeout(None),
+            limits=httpx.Limits(
+                max_connections=settings.ODOO_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ODOO_POOL_SIZE,
+                keepalive_expiry=settings.ODOO_POOL_IDLE_TIMEOUT,
+            ),
+        )
+    return _client
+
+
+async def close_async_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _maybe_offload(func, payload_size: int, *args):
+    # payload besar (mis. image base64) di-encode/decode di threadpool
+    # supaya event loop tidak ikut terblokir
+    if payload_size >= settings.ODOO_ASYNC_OFFLOAD_BYTES:
+        return await run_in_threadpool(func, *args)
+    return func(*args)
+
+
+def _payload_size(value) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_payload_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_payload_size(v) for v in value)
+    return 0
+
+
+def _decode_response(body: bytes):
+    params, _ = xmlrpc.client.loads(body, use_builtin_types=False)
+    return params[0]
+
+
+async def call_async(service: str, method: str, *args):
+    """Panggil service Odoo secara non-blocking (protokol sesuai ODOO_PROTOCOL)."""
+    if settings.ODOO_PROTOCOL == "jsonrpc":
+        path, content_type = JSONRPC_PATH, "application/json"
+        encode = lambda: encode_call(service, method, args)
+        decode = decode_reply
+    else:
+        path, content_type = f"/xmlrpc/2/{service}", "text/xml"
+        encode = lambda: xmlrpc.client.dumps(args, method, allow_none=True).encode("utf-8")
+        decode = _decode_response
+
+    body = await _maybe_offload(encode, _payload_size(args))
+    try:
+        response = await get_async_client().post(
+            path, content=body, headers={"Content-Type": content_type}, timeout=rpc_timeout()
+        )
+    except httpx.TimeoutException:
+        raise RpcTimeout()
+    add_rpc_bytes(len(body), len(response.content))
+    if response.status_code != 200:
+        raise xmlrpc.client.ProtocolError(
+            settings.ODOO_URL + path, response.status_code, response.reason_phrase, dict(response.headers)
+        )
+    return await _maybe_offload(decode, len(response.content), response.content)
+
+
+class AsyncOdooModel:
+    """Versi async dari OdooModel dengan method yang sama, tinggal di-`await`."""
+
+    def __init__(self, model: str, uid: int, username: str, password: str):
+        self.uid = uid
+        self.username = username
+        self.password = password
+        self.model = model
+        self.db = settings.ODOO_DB
+
+    async def _execute_kw(self, method: str, args: list, kwargs: dict = None):
+        params = [self.db, self.uid, self.password, self.model, method, args]
+        if kwargs is not None:
+            params.append(kwargs)
+
+        async def execute():
+            # backup hedging ikut dihitung sebagai RPC sendiri (limiter & track_rpc)
+            async with odoo_guard.slot_async():
+                with track_rpc(self.model, method, (args,)) as call:
+                    return call.returned(await call_async("object", "execute_kw", *params))
+        if hedger is not None and method in HEDGE_METHODS:
+            return await hedger.call_async(self.model, method, execute)
+        return await execute()
+
+    def _use_cache(self, domain=None, fields=None, limit=10) -> bool:
+        return (
+            result_cache is not None and result_cache.enabled_for(self.model)
+            and cacheable(domain, fields, limit)
+        )
+
+    async def _cached(self, method: str, args: tuple, call):
+        # cache yang sama dengan OdooModel (key tidak membedakan sync/async)
+        key = result_cache.key(self, method, args)
+        hit, value, generation = result_cache.get(key)
+        if hit:
+            return value
+        value = await call()
+        result_cache.put(key, generation, value)
+        return value
+
+    async def search_read(self, domain=None, fields=None, limit=10, offset=0, order=None):
+        if self._use_cache(domain, fields, limit):
+            return await self._cached(
+                'search_read', (domain, fields, limit, offset, order),
+                lambda: self._search_read(domain, fields, limit, offset, order)
+            )
+        return await self._search_read(domain, fields, limit, offset, order)
+
+    async def _search_read(self, domain, fields, limit, offset, order):
+        return await self._execute_kw(
+            'search_read',
+            [domain or []],
+            {'fields': fields or ['name'], 'limit': limit, 'offset': offset, 'order': order}
+        )
+
+    async def create(self, values: dict):
+        new_id = await self._execute_kw('create', [values])
+        signals.notify(self.model, "create", [new_id])
+        return new_id
+
+    async def read(self, ids: list, fields=None):
+        fields = fields or ['name']
+        if ids and self._use_cache(fields=fields):
+            return await self._cached('read', (list(ids), fields), lambda: self._coalesced_read(ids, fields))
+        return await self._coalesced_read(ids, fields)
+
+    async def _coalesced_read(self, ids: list, fields: list):
+        if read_coalescer is not None and ids:
+            return await read_coalescer.read(self, list(ids), fields, self._read)
+        return await self._read(ids, fields)
+
+    async def _read(self, ids: list, fields: list):
+        return await self._execute_kw('read', [ids], {'fields': fields})
+
+    async def write(self, ids: list, values: dict):
+        result = await self._execute_kw('write', [ids, values])
+        signals.notify(self.model, "write", ids)
+        return result
+
+    async def unlink(self, ids: list):
+        result = await self._execute_kw('unlink', [ids])
+        signals.notify(self.model, "unlink", ids)
+        return result
+
+    async def search(self, domain=None, limit=10, offset=0, order=None):
+        if self._use_cache(domain, limit=limit):
+            return await self._cached(
+                'search', (domain, limit, offset, order), lambda: self._search(domain, limit, offset, order)
+            )
+        return await self._search(domain, limit, offset, order)
+
+    async def _search(self, domain, limit, offset, order):
+        return await self._execute_kw(
+            'search',
+            [domain or []],
+            {
+                'limit': limit,
+                'offset': offset,
+                'order': order,
+            }
+        )
@@ -1,5 +1,17 @@
-import xmlrpc.client
 from config.settings import settings
+from odoo_client.transport import server_proxy
+from odoo_client.batching import ReadCoalescer
+from odoo_client import signals
+from odoo_client.result_cache import result_cache, cacheable
+from odoo_client.instrumentation import track_rpc
+from odoo_client.limiter import odoo_guard
+from odoo_client.hedging import hedger, HEDGE_METHODS
+
+# opt-in: read ke model & field yang sama dalam window ini digabung jadi satu RPC
+read_coalescer = (
+    ReadCoalescer(settings.ODOO_READ_COALESCE_MS / 1000.0)
+    if settings.ODOO_READ_COALESCE_MS > 0 else None
+)
 
 class OdooModel:
     def __init__(self, model: str, uid: int, username: str, password: str):
@@ -10,68 +22,101 @@ class OdooModel:
         self.url = settings.ODOO_URL
         self.db = settings.ODOO_DB
         # self.models = xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/object")
-        self.models = xmlrpc.client.ServerProxy(
-            f"{self.url}/xmlrpc/2/object", allow_none=True
+        # transport keep-alive dipakai bersama, jadi proxy ini murah dibuat
+        self.models = server_proxy("object", self.url)
+
+    def _execute_kw(self, method: str, *args):
+        # semua RPC lewat sini supaya tercatat di /metrics & Server-Timing,
+        # dan dibatasi limiter/circuit breaker (lihat odoo_client.limiter);
+        # backup hedging ikut dihitung sebagai RPC sendiri
+        def execute():
+            with odoo_guard.slot(), track_rpc(self.model, method, args) as call:
+                return call.returned(self.models.execute_kw(self.db, self.uid, self.password, self.model, method, *args))
+        if hedger is not None and method in HEDGE_METHODS:
+            return hedger.call(self.model, method, execute)
+        return execute()
+
+    def _use_cache(self, domain=None, fields=None, limit=10) -> bool:
+        return (
+            result_cache is not None and result_cache.enabled_for(self.model)
+            and cacheable(domain, fields, limit)
         )
 
-    def search_read(self, domain=None, fields=None, limit=10):
-        return self.models.execute_kw(
-            self.db,
-            self.uid,
-            self.password,
-            self.model,
+    def _cached(self, method: str, args: tuple, call):
+        key = result_cache.key(self, method, args)
+        hit, value, generation = result_cache.get(key)
+        if hit:
+            return value
+        value = call()
+        result_cache.put(key, generation, value)
+        return value
+
+    def search_read(self, domain=None, fields=None, limit=10, offset=0, order=None):
+        if self._use_cache(domain, fields, limit):
+            return self._cached(
+                'search_read', (domain, fields, limit, offset, order),
+                lambda: self._search_read(domain, fields, limit, offset, order)
+            )
+        return self._search_read(domain, fields, limit, offset, order)
+
+    def _search_read(self, domain, fields, limit, offset, order):
+        return self._execute_kw(
             'search_read',
             [domain or []],
-            {'fields': fields or ['name'], 'limit': limit}
+            {'fields': fields or ['name'], 'limit': limit, 'offset': offset, 'order': order}
         )
 
     def create(self, values: dict):
-        return self.models.execute_kw(
-            self.db,
-            self.uid,
-            self.password,
-            self.model,
+        new_id = self._execute_kw(
             'create',
             [values]
         )
+        signals.notify(self.model, "create", [new_id])
+        return new_id
 
     def read(self, ids: list, fields=None):
-        return self.models.execute_kw(
-            self.db,
-            self.uid,
-            self.password,
-            self.model,
+        fields = fields or ['name']
+        if ids and self._use_cache(fields=fields):
+            return self._cached('read', (list(ids), fields), lambda: self._coalesced_read(ids, fields))
+        return self._coalesced_read(ids, fields)
+
+    def _coalesced_read(self, ids: list, fields: list):
+        if read_coalescer is not None and ids:
+            return read_coalescer.read(self, list(ids), fields, self._read)
+        return self._read(ids, fields)
+
+    def _read(self, ids: list, fields: list):
+        return self._execute_kw(
             'read',
             [ids],
-            {'fields': fields or ['name']}
+            {'fields': fields}
         )
 
     def write(self, ids: list, values: dict):
-        return self.models.execute_kw(
-            self.db,
-            self.uid,
-            self.password,
-            self.model,
+        result = self._execute_kw(
             'write',
             [ids, values]
         )
+        signals.notify(self.model, "write", ids)
+        return result
 
     def unlink(self, ids: list):
-        return self.models.execute_kw(
-            self.db,
-            self.uid,
-            self.password,
-            self.model,
+        result = self._execute_kw(
             'unlink',
             [ids]
         )
+        signals.notify(self.model, "unlink", ids)
+        return result
 
     def search(self, domain=None, limit=10, offset=0, order=None):
-        return self.models.execute_kw(
-            self.db,
-            self.uid,
-            self.password,
-            self.model,
+        if self._use_cache(domain, limit=limit):
+            return self._cached(
+                'search', (domain, limit, offset, order), lambda: self._search(domain, limit, offset, order)
+            )
+        return self._search(domain, limit, offset, order)
+
+    def _search(self, domain, limit, offset, order):
+        return self._execute_kw(
             'search',
             [domain or []],
             {
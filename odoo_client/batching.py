@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+
+
+def _batch_key(odoo_model, fields) -> tuple:
+    # uid & password ikut jadi key supaya hak akses user tidak tercampur
+    return (
+        odoo_model.db,
+        odoo_model.uid,
+        odoo_model.password,
+        odoo_model.model,
+        tuple(sorted(fields)),
+    )
+
+
+def _pick(records_by_id: dict, ids: list) -> list:
+    return [dict(records_by_id[i]) for i in ids if i in records_by_id]
+
+
+class _Batch:
+    def __init__(self):
+        self.ids = set()
+        self.callers = 0
+        self.records = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class ReadCoalescer:
+    """Gabungkan `read` ke model + field yang sama dalam satu window jadi satu RPC.
+
+    Thread pertama yang masuk jadi leader: menunggu `window` detik, lalu
+    membaca gabungan semua id dan membagikan hasilnya ke thread lain.
+    Leader hanya menunggu kalau ada read lain ke key yang sama yang sedang
+    berjalan; caller yang sendirian langsung membaca tanpa tambahan latency.
+    Kalau RPC gabungan gagal (mis. ada id yang sudah dihapus), tiap caller
+    mengulang read-nya sendiri supaya error tidak menular.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._active = {}  # key -> jumlah caller yang sedang di dalam read()
+        self.stats = {"calls": 0, "rpcs": 0, "fallbacks": 0, "solo": 0}
+
+    def read(self, odoo_model, ids: list, fields: list, fetch) -> list:
+        key = _batch_key(odoo_model, fields)
+        with self._lock:
+            self.stats["calls"] += 1
+            batch = self._pending.get(key)
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._pending[key] = batch
+            batch.ids.update(ids)
+            batch.callers += 1
+            concurrent = self._active.get(key, 0)
+            self._active[key] = concurrent + 1
+
+        try:
+            if leader:
+                if concurrent:
+                    time.sleep(self.window)
+                with self._lock:
+                    self._pending.pop(key, None)
+                    self.stats["rpcs"] += 1
+                    self.stats["solo"] += not concurrent
+                try:
+                    batch.records = {r["id"]: r for r in fetch(sorted(batch.ids), fields)}
+                except Exception as e:
+                    batch.error = e
+                batch.done.set()
+            else:
+                batch.done.wait()
+
+            if batch.error is not None:
+                if batch.callers == 1:
+                    raise batch.error
+                with self._lock:
+                    self.stats["fallbacks"] += 1
+                return fetch(ids, fields)
+            return _pick(batch.records, ids)
+        finally:
+            with self._lock:
+                self._active[key] -= 1
+                if not self._active[key]:
+                    del self._active[key]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            calls, rpcs = self.stats["calls"], self.stats["rpcs"]
+            return {**self.stats, "calls_per_rpc": round(calls / rpcs, 2) if rpcs else 0.0}
+
+
+class AsyncReadCoalescer:
+    """Versi asyncio dari ReadCoalescer untuk AsyncOdooModel."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._pending = {}
+        self._active = {}  # key -> jumlah caller yang sedang di dalam read()
+        self._tasks = set()  # referensi task flush supaya tidak di-GC sebelum selesai
+        self.stats = {"calls": 0, "rpcs": 0, "fallbacks": 0, "solo": 0}
+
+    async def read(self, odoo_model, ids: list, fields: list, fetch) -> list:
+        key = _batch_key(odoo_model, fields)
+        self.stats["calls"] += 1
+        concurrent = self._active.get(key, 0)
+        self._active[key] = concurrent + 1
+        try:
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = {"ids": set(ids), "callers": 1, "future": asyncio.get_running_loop().create_future()}
+                self._pending[key] = batch
+                task = asyncio.get_running_loop().create_task(self._flush(key, batch, fields, fetch, bool(concurrent)))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                batch["ids"].update(ids)
+                batch["callers"] += 1
+
+            try:
+                records = await asyncio.shield(batch["future"])
+            except Exception:
+                if batch["callers"] == 1:
+                    raise
+                self.stats["fallbacks"] += 1
+                return await fetch(ids, fields)
+            return _pick(records, ids)
+        finally:
+            self._active[key] -= 1
+            if not self._active[key]:
+                del self._active[key]
+
+    async def _flush(self, key, batch, fields, fetch, wait: bool):
+        # tanpa read lain yang sedang jalan tidak perlu menunggu window;
+        # caller di iterasi loop yang sama tetap ikut batch ini
+        if wait:
+            await asyncio.sleep(self.window)
+        self._pending.pop(key, None)
+        self.stats["rpcs"] += 1
+        self.stats["solo"] += not wait
+        try:
+            records = await fetch(sorted(batch["ids"]), fields)
+            batch["future"].set_result({r["id"]: r for r in records})
+        except Exception as e:
+            batch["future"].set_exception(e)
+            # pastikan exception dianggap sudah "diambil" walau semua caller batal
+            batch["future"].exception()
+
+    def snapshot(self) -> dict:
+        calls, rpcs = self.stats["calls"], self.stats["rpcs"]
+        return {**self.stats, "calls_per_rpc": round(calls / rpcs, 2) if rpcs else 0.0}
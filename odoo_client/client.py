@@ -1,9 +1,22 @@
-import xmlrpc.client
+from typing import Optional
 from config.settings import settings
+from odoo_client.transport import server_proxy
 
 def odoo_login(username: str, password: str) -> int:
-    common = xmlrpc.client.ServerProxy(f"{settings.ODOO_URL}/xmlrpc/2/common")
+    common = server_proxy("common")
     uid = common.authenticate(settings.ODOO_DB, username, password, {})
     if not uid:
         raise ValueError("Login gagal: username atau password salah")
     return uid
+
+
+def get_service_user() -> Optional[dict]:
+    """Kredensial akun service untuk job background; None kalau tidak dikonfigurasi."""
+    if not settings.ODOO_SERVICE_USERNAME or not settings.ODOO_SERVICE_PASSWORD:
+        return None
+    uid = odoo_login(settings.ODOO_SERVICE_USERNAME, settings.ODOO_SERVICE_PASSWORD)
+    return {
+        "uid": uid,
+        "username": settings.ODOO_SERVICE_USERNAME,
+        "password": settings.ODOO_SERVICE_PASSWORD
+    }
@@ -0,0 +1,58 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import HTTPException
+from config.settings import settings
+
+# waktu (time.monotonic) saat request harus sudah selesai; None = di luar request
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(HTTPException):
+    """Waktu request habis sebelum / saat menunggu Odoo."""
+
+    def __init__(self, detail: str = "Batas waktu request ke Odoo habis"):
+        super().__init__(status_code=504, detail=detail)
+
+
+class RpcTimeout(DeadlineExceeded):
+    """Odoo tidak menjawab dalam timeout RPC (socket / httpx timeout).
+
+    Beda dengan DeadlineExceeded biasa (deadline habis sebelum RPC dikirim),
+    ini dihitung limiter & circuit breaker sebagai error transport.
+    """
+
+
+def set_deadline(seconds: float):
+    """Mulai deadline `seconds` dari sekarang; return token untuk reset_deadline."""
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Sisa waktu request dalam detik (bisa negatif), atau None di luar request."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def call_timeout(cap: float) -> float:
+    """Timeout untuk satu panggilan keluar: sisa deadline, paling lama `cap`.
+
+    Raise DeadlineExceeded kalau deadline sudah lewat, supaya tidak ada
+    RPC baru yang dikirim untuk request yang sudah ditinggal client.
+    """
+    left = remaining()
+    if left is None:
+        return cap
+    if left <= 0:
+        raise DeadlineExceeded()
+    return min(left, cap)
+
+
+def rpc_timeout() -> float:
+    return call_timeout(settings.ODOO_RPC_TIMEOUT)
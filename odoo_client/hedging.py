@@ -0,0 +1,265 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from config.settings import settings
+from odoo_client.deadline import remaining
+from odoo_client.transport import AbortScope, RpcAborted, abort_scope
+
+# hanya method read yang aman dikirim dua kali
+HEDGE_METHODS = frozenset(("search", "read", "search_read"))
+
+
+class LatencyTracker:
+    """Kuantil latency per (model, method) dari `size` sampel terakhir."""
+
+    def __init__(self, quantile: float, min_samples: int, size: int = 500, recompute_every: int = 20):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.size = size
+        self.recompute_every = recompute_every
+        self._entries = {}  # key -> [deque sampel, sampel sejak dihitung, kuantil]
+        self._lock = threading.Lock()
+
+    def observe(self, key: tuple, seconds: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [deque(maxlen=self.size), 0, None]
+            entry[0].append(seconds)
+            entry[1] += 1
+
+    def value(self, key: tuple) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or len(entry[0]) < self.min_samples:
+                return None
+            if entry[2] is None or entry[1] >= self.recompute_every:
+                ordered = sorted(entry[0])
+                entry[2] = ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))]
+                entry[1] = 0
+            return entry[2]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                f"{model}.{method}": {"samples": len(entry[0]), "quantile": entry[2]}
+                for (model, method), entry in self._entries.items()
+            }
+
+
+class BackupTimer:
+    """Satu thread yang menjalankan callback setelah delay, tanpa thread per RPC.
+
+    Callback harus cepat (hanya submit backup ke executor). Thread dibuat
+    saat pertama dipakai dan dibuat ulang setelah fork.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = itertools.count()
+        self._pid = None
+
+    def schedule(self, delay: float, callback):
+        with self._cond:
+            if self._pid != os.getpid():
+                self._heap = []
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name="odoo-hedge-timer", daemon=True).start()
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), callback))
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    self._cond.wait(self._heap[0][0] - now if self._heap else None)
+                _, _, callback = heapq.heappop(self._heap)
+            callback()
+
+
+class _HedgedCall:
+    """State satu read yang di-hedge: primary di thread caller, backup di executor."""
+
+    __slots__ = ("lock", "primary_done", "primary_scope", "backup_scope", "backup")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.primary_done = False
+        self.primary_scope = AbortScope()
+        self.backup_scope = AbortScope()
+        self.backup = None
+
+
+class Hedger:
+    """Hedged request untuk read ke Odoo.
+
+    Kalau RPC belum selesai setelah kuantil latency-nya (default p95),
+    RPC yang sama dikirim sekali lagi dan hasil pertama yang sukses dipakai.
+    Jumlah RPC tambahan dibatasi token bucket (`max_ratio` per read), jadi
+    saat Odoo memang lambat semua, hedging tidak menggandakan beban.
+
+    Versi sync menjalankan primary di thread caller; hanya backup yang
+    dikirim ke executor (oleh BackupTimer). Kalau backup menang, koneksi
+    primary diputus (AbortScope) supaya thread caller bisa kembali; kalau
+    primary menang, koneksi backup yang diputus.
+    """
+
+    def __init__(self, quantile: float, min_samples: int, min_delay: float, max_ratio: float, workers: int):
+        self.latency = LatencyTracker(quantile, min_samples)
+        self.min_delay = min_delay
+        self.max_ratio = max_ratio
+        self._tokens = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="odoo-hedge")
+        self._timer = BackupTimer()
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "hedged": 0, "backup_wins": 0, "throttled": 0}
+
+    def _delay(self, key: tuple) -> Optional[float]:
+        with self._lock:
+            self.stats["calls"] += 1
+            self._tokens = min(self._tokens + self.max_ratio, 10.0)
+        quantile = self.latency.value(key)
+        if quantile is None:
+            return None
+        delay = max(quantile, self.min_delay)
+        left = remaining()
+        if left is not None and left <= delay:
+            return None  # tidak ada waktu untuk percobaan kedua
+        return delay
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                self.stats["throttled"] += 1
+                return False
+            self._tokens -= 1.0
+            self.stats["hedged"] += 1
+            return True
+
+    def _won(self, backup: bool):
+        if backup:
+            with self._lock:
+                self.stats["backup_wins"] += 1
+
+    def _timed(self, key: tuple, fn):
+        start = time.perf_counter()
+        result = fn()
+        self.latency.observe(key, time.perf_counter() - start)
+        return result
+
+    def _launch_backup(self, call: _HedgedCall, key: tuple, fn, context):
+        # dipanggil BackupTimer setelah delay; primary yang sudah selesai tidak di-hedge
+        with call.lock:
+            if call.primary_done or not self._take_token():
+                return
+            call.backup = self._executor.submit(context.run, self._run_backup, call, key, fn)
+
+    def _run_backup(self, call: _HedgedCall, key: tuple, fn):
+        token = abort_scope.set(call.backup_scope)
+        try:
+            result = self._timed(key, fn)
+        finally:
+            abort_scope.reset(token)
+        call.primary_scope.abort()  # backup menang: lepaskan thread caller dari primary
+        return result
+
+    def _finish_primary(self, call: _HedgedCall):
+        with call.lock:
+            call.primary_done = True
+            return call.backup
+
+    def call(self, model: str, method: str, fn):
+        """Jalankan `fn()` (blocking) di thread ini, dengan hedging kalau latency-nya sudah diketahui."""
+        key = (model, method)
+        delay = self._delay(key)
+        if delay is None:
+            return self._timed(key, fn)
+        call = _HedgedCall()
+        # context disalin (sebelum scope primary dipasang) supaya deadline &
+        # pencatatan RPC ikut ke thread backup
+        context = contextvars.copy_context()
+        self._timer.schedule(delay, lambda: self._launch_backup(call, key, fn, context))
+        token = abort_scope.set(call.primary_scope)
+        try:
+            result = self._timed(key, fn)
+        except RpcAborted:
+            self._finish_primary(call)
+            result = call.backup.result()
+            self._won(True)
+            return result
+        except Exception as primary_error:
+            backup = self._finish_primary(call)
+            if backup is None:
+                raise
+            # primary gagal: pakai hasil backup yang sudah jalan
+            try:
+                result = backup.result()
+            except Exception:
+                raise primary_error
+            self._won(True)
+            return result
+        finally:
+            abort_scope.reset(token)
+        backup = self._finish_primary(call)
+        if backup is not None:
+            call.backup_scope.abort()
+        return result
+
+    async def _timed_async(self, key: tuple, factory):
+        start = time.perf_counter()
+        result = await factory()
+        self.latency.observe(key, time.perf_counter() - start)
+        return result
+
+    async def call_async(self, model: str, method: str, factory):
+        """Versi async dari `call`; `factory()` membuat coroutine RPC baru."""
+        key = (model, method)
+        delay = self._delay(key)
+        if delay is None:
+            return await self._timed_async(key, factory)
+        tasks = [asyncio.ensure_future(self._timed_async(key, factory))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._take_token():
+                return await tasks[0]
+            tasks.append(asyncio.ensure_future(self._timed_async(key, factory)))
+            primary, backup = tasks
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in tasks:
+                if task in done and task.exception() is None:
+                    self._won(task is backup)
+                    return task.result()
+            other = backup if primary in done else primary
+            result = await other
+            self._won(other is backup)
+            return result
+        finally:
+            # RPC yang kalah dibatalkan, koneksinya kembali ke pool httpx
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        return {**stats, "latency": self.latency.snapshot()}
+
+
+hedger = Hedger(
+    quantile=settings.ODOO_HEDGE_QUANTILE,
+    min_samples=settings.ODOO_HEDGE_MIN_SAMPLES,
+    min_delay=settings.ODOO_HEDGE_MIN_DELAY,
+    max_ratio=settings.ODOO_HEDGE_MAX_RATIO,
+    workers=settings.ODOO_HEDGE_WORKERS,
+) if settings.ODOO_HEDGE_ENABLED else None
@@ -0,0 +1,188 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+RPC_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RPC_PER_REQUEST_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+class RequestTimings:
+    """Waktu yang dihabiskan satu request per komponen (odoo, geocode, serialize)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.handler_done = None  # diisi TimedRoute saat endpoint selesai
+        self.durations = {}
+        self.counts = {}
+        self.calls = []  # (model, method, jumlah id) berurutan, untuk deteksi N+1
+        self.items = None  # jumlah item endpoint bulk, untuk budget RPC per item
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def add_call(self, model: str, method: str, ids: Optional[int]):
+        with self._lock:
+            self.calls.append((model, method, ids))
+
+    @property
+    def rpc_count(self) -> int:
+        return self.counts.get("odoo", 0)
+
+
+class RpcCall:
+    """Satu execute_kw yang sedang berjalan; byte diisi transport lewat add_rpc_bytes."""
+
+    __slots__ = ("model", "method", "ids", "sent", "received")
+
+    def __init__(self, model: str, method: str, args: tuple):
+        self.model = model
+        self.method = method
+        self.sent = 0
+        self.received = 0
+        self.ids = None
+        positional = args[0] if args else []
+        if method == "create":
+            self.ids = 1
+        elif method in ("read", "write", "unlink") and positional and isinstance(positional[0], (list, tuple)):
+            self.ids = len(positional[0])
+
+    def returned(self, result):
+        # search/search_read: jumlah record yang kembali
+        if self.ids is None and isinstance(result, list):
+            self.ids = len(result)
+        return result
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+_current_call: ContextVar[Optional[RpcCall]] = ContextVar("current_rpc_call", default=None)
+_request_listeners = []
+
+
+def begin_request() -> tuple:
+    timings = RequestTimings()
+    return timings, _request_timings.set(timings)
+
+
+def end_request(token):
+    _request_timings.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+
+def record_timing(name: str, seconds: float):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+def record_items(count: int):
+    """Catat jumlah item yang diproses endpoint bulk di request ini."""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.items = count
+
+
+def add_rpc_bytes(sent: int, received: int):
+    call = _current_call.get()
+    if call is not None:
+        call.sent += sent
+        call.received += received
+
+
+def add_request_listener(callback):
+    """callback(record) dipanggil setelah setiap request HTTP selesai.
+
+    record: {"route", "method", "status", "calls", "rpc_count", "items", "duration"}
+    """
+    _request_listeners.append(callback)
+
+
+def remove_request_listener(callback):
+    if callback in _request_listeners:
+        _request_listeners.remove(callback)
+
+
+def notify_request(record: dict):
+    for callback in list(_request_listeners):
+        callback(record)
+
+
+def _observe(buckets: tuple, counts: list, value: float):
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            counts[index] += 1
+
+
+class RpcMetrics:
+    """Counter & histogram execute_kw per (model, method), plus RPC per request per route."""
+
+    def __init__(self):
+        self._rpc = {}  # (model, method) -> dict
+        self._requests = {}  # (route, http method) -> dict
+        self._lock = threading.Lock()
+
+    def observe_rpc(self, model: str, method: str, seconds: float, sent: int, received: int, error: bool):
+        with self._lock:
+            entry = self._rpc.get((model, method))
+            if entry is None:
+                entry = self._rpc[(model, method)] = {
+                    "calls": 0, "errors": 0, "seconds": 0.0, "bytes_sent": 0, "bytes_received": 0,
+                    "buckets": [0] * len(RPC_DURATION_BUCKETS),
+                }
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["seconds"] += seconds
+            entry["bytes_sent"] += sent
+            entry["bytes_received"] += received
+            _observe(RPC_DURATION_BUCKETS, entry["buckets"], seconds)
+
+    def observe_request(self, route: str, method: str, rpc_count: int):
+        with self._lock:
+            entry = self._requests.get((route, method))
+            if entry is None:
+                entry = self._requests[(route, method)] = {
+                    "requests": 0, "rpcs": 0, "buckets": [0] * len(RPC_PER_REQUEST_BUCKETS),
+                }
+            entry["requests"] += 1
+            entry["rpcs"] += rpc_count
+            _observe(RPC_PER_REQUEST_BUCKETS, entry["buckets"], rpc_count)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "rpc": {key: {**entry, "buckets": list(entry["buckets"])} for key, entry in self._rpc.items()},
+                "requests": {key: {**entry, "buckets": list(entry["buckets"])} for key, entry in self._requests.items()},
+            }
+
+
+rpc_metrics = RpcMetrics()
+
+
+@contextmanager
+def track_rpc(model: str, method: str, args: tuple = ()):
+    """Bungkus satu execute_kw: durasi, byte, error -> rpc_metrics & timing request."""
+    call = RpcCall(model, method, args)
+    token = _current_call.set(call)
+    error = False
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        # RPC yang sengaja diputus (backup hedging sudah menang) bukan error
+        error = not getattr(e, "aborted", False)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_call.reset(token)
+        rpc_metrics.observe_rpc(model, method, elapsed, call.sent, call.received, error)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add("odoo", elapsed)
+            timings.add_call(model, method, call.ids)
@@ -0,0 +1,67 @@
+import itertools
+import json
+import xmlrpc.client
+from datetime import date, datetime
+
+JSONRPC_PATH = "/jsonrpc"
+JSONRPC_HEADERS = [("Content-Type", "application/json"), ("Accept", "application/json")]
+
+_request_ids = itertools.count(1)
+
+
+def _json_default(value):
+    # samakan dengan marshalling xmlrpc: tanggal dikirim sebagai string
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_call(service: str, method: str, args) -> bytes:
+    payload = {
+        "jsonrpc": "2.0",
+        "method": "call",
+        "params": {"service": service, "method": method, "args": list(args)},
+        "id": next(_request_ids),
+    }
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def decode_reply(body: bytes):
+    """Ambil `result`, atau raise Fault seperti yang dilakukan xmlrpc.client."""
+    reply = json.loads(body)
+    error = reply.get("error")
+    if error:
+        data = error.get("data") or {}
+        raise xmlrpc.client.Fault(
+            data.get("name") or error.get("code", 1),
+            data.get("message") or data.get("debug") or error.get("message", ""),
+        )
+    return reply.get("result")
+
+
+class JsonRpcProxy:
+    """Pengganti ServerProxy yang bicara ke endpoint `/jsonrpc` Odoo."""
+
+    def __init__(self, pool, service: str):
+        self.pool = pool
+        self.service = service
+
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+
+        def call(*args):
+            status, reason, headers, body = self.pool.request(
+                JSONRPC_PATH, encode_call(self.service, method, args), JSONRPC_HEADERS
+            )
+            if status != 200:
+                raise xmlrpc.client.ProtocolError(
+                    self.pool.url + JSONRPC_PATH, status, reason, headers
+                )
+            return decode_reply(body)
+
+        return call
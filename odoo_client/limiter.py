@@ -0,0 +1,330 @@
+import asyncio
+import http.client
+import socket
+import threading
+import time
+import xmlrpc.client
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+import httpx
+from fastapi import HTTPException
+from config.settings import settings
+from odoo_client.deadline import call_timeout, RpcTimeout
+
+# error yang berarti Odoo tidak sehat; Fault (validasi, akses) justru tanda Odoo hidup.
+# RpcTimeout = Odoo tidak menjawab; DeadlineExceeded sebelum RPC dikirim tidak dihitung
+TRANSPORT_ERRORS = (
+    OSError, socket.timeout, http.client.HTTPException, xmlrpc.client.ProtocolError, httpx.TransportError, RpcTimeout,
+)
+
+
+class OdooUnavailable(HTTPException):
+    """Request ditolak sebelum sampai ke Odoo (circuit terbuka / antrian penuh)."""
+
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(
+            status_code=503, detail=detail, headers={"Retry-After": str(max(1, int(retry_after + 0.5)))}
+        )
+
+
+class AdaptiveLimiter:
+    """Batas RPC paralel ke Odoo yang menyesuaikan diri dengan latency (AIMD).
+
+    Latency <= target saat slot hampir penuh menambah limit 1/limit per
+    RPC (+1 per "putaran"); latency di atas target atau error transport
+    memotong limit dengan faktor `backoff`, paling sering sekali per
+    `target_latency`. Thread (OdooModel) dan coroutine (AsyncOdooModel)
+    antre di satu FIFO yang sama.
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, target_latency: float, backoff: float = 0.75):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters = deque()  # [threading.Event, granted] atau [future, loop]
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "queued": 0, "rejected": 0, "increases": 0, "decreases": 0}
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    # ------------------------------------------------------------ acquire
+    def _try_acquire(self) -> bool:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            self.stats["acquired"] += 1
+            return True
+        return False
+
+    def acquire(self, timeout: float):
+        with self._lock:
+            if self._try_acquire():
+                return
+            waiter = [threading.Event(), False]
+            self._waiters.append(waiter)
+            self.stats["queued"] += 1
+        if waiter[0].wait(timeout):
+            return
+        with self._lock:
+            if waiter[1]:  # slot diberikan tepat saat timeout
+                return
+            self._waiters.remove(waiter)
+            self.stats["rejected"] += 1
+        raise OdooUnavailable("Odoo sedang sibuk, coba lagi", timeout)
+
+    async def acquire_async(self, timeout: float):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_acquire():
+                return
+            future = loop.create_future()
+            waiter = [future, loop]
+            self._waiters.append(waiter)
+            self.stats["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    self.stats["rejected"] += 1
+                    raise OdooUnavailable("Odoo sedang sibuk, coba lagi", timeout)
+            await future  # slot diberikan tepat saat timeout
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter not in self._waiters
+                if not granted:
+                    self._waiters.remove(waiter)
+            if granted:
+                # slot sudah dialihkan ke waiter ini, kembalikan
+                future.add_done_callback(lambda _: self.release())
+            raise
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+            while self._waiters and self._in_flight < self.limit:
+                waiter = self._waiters.popleft()
+                self._in_flight += 1
+                self.stats["acquired"] += 1
+                if isinstance(waiter[0], threading.Event):
+                    waiter[1] = True
+                    waiter[0].set()
+                else:
+                    future, loop = waiter
+                    loop.call_soon_threadsafe(_grant, future)
+
+    # ------------------------------------------------------------ adaptasi
+    def on_sample(self, latency: float, failed: bool):
+        now = time.monotonic()
+        with self._lock:
+            if failed or latency > self.target_latency:
+                if now - self._last_decrease >= self.target_latency:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                    self._last_decrease = now
+                    self.stats["decreases"] += 1
+            elif self._in_flight >= self.limit * 0.8 and self._limit < self.max_limit:
+                # hanya naik kalau limit memang terpakai
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+                self.stats["increases"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "target_latency": self.target_latency,
+            }
+
+
+def _grant(future):
+    # future di-shield, jadi tidak pernah dibatalkan dari sisi waiter
+    if not future.done():
+        future.set_result(True)
+
+
+class CircuitBreaker:
+    """Closed -> open kalau rasio error/lambat dalam `window` detik melewati batas.
+
+    Saat open semua RPC langsung ditolak (503) selama `open_seconds`, lalu
+    half-open: `half_open_calls` RPC percobaan; satu gagal membuka lagi,
+    semuanya sukses menutup.
+    """
+
+    def __init__(self, window: float, min_calls: int, error_ratio: float, slow_call_seconds: float,
+                 slow_ratio: float, open_seconds: float, half_open_calls: int):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_ratio = error_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_ratio = slow_ratio
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = "closed"
+        self._opened_at = 0.0
+        self._probes = 0  # RPC percobaan yang sedang/sudah jalan saat half-open
+        self._probe_successes = 0
+        self._samples = deque()  # (waktu, gagal, lambat)
+        self._lock = threading.Lock()
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def before_call(self):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == "open":
+                if now - self._opened_at < self.open_seconds:
+                    self.stats["rejected"] += 1
+                    raise OdooUnavailable("Odoo tidak tersedia (circuit open)", self.open_seconds - (now - self._opened_at))
+                self.state = "half_open"
+                self._probes = 0
+                self._probe_successes = 0
+            if self.state == "half_open":
+                if self._probes >= self.half_open_calls:
+                    self.stats["rejected"] += 1
+                    raise OdooUnavailable("Odoo tidak tersedia (circuit half-open)", 1)
+                self._probes += 1
+
+    def cancel_call(self):
+        """RPC yang lolos before_call tapi tidak jadi jalan (mis. antrian limiter penuh)."""
+        with self._lock:
+            if self.state == "half_open" and self._probes > 0:
+                self._probes -= 1
+
+    def after_call(self, latency: float, failed: bool):
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self.state == "half_open":
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self.state = "closed"
+                        self._samples.clear()
+                return
+            if self.state == "open":
+                return
+            self._samples.append((now, failed, slow))
+            while self._samples and now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+            total = len(self._samples)
+            if total < self.min_calls:
+                return
+            errors = sum(1 for _, f, _ in self._samples if f)
+            slows = sum(1 for _, _, s in self._samples if s)
+            if errors / total >= self.error_ratio or slows / total >= self.slow_ratio:
+                self._open(now)
+
+    def _open(self, now: float):
+        self.state = "open"
+        self._opened_at = now
+        self._samples.clear()
+        self.stats["opened"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = len(self._samples)
+            return {
+                **self.stats,
+                "state": self.state,
+                "window_calls": total,
+                "window_errors": sum(1 for _, f, _ in self._samples if f),
+                "window_slow": sum(1 for _, _, s in self._samples if s),
+            }
+
+
+class OdooGuard:
+    """Limiter + breaker bersama untuk semua RPC OdooModel & AsyncOdooModel."""
+
+    def __init__(self, limiter=None, breaker=None, queue_timeout: float = 5.0):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.queue_timeout = queue_timeout
+
+    def _cancel(self):
+        if self.breaker is not None:
+            self.breaker.cancel_call()
+
+    def _record(self, start: float, failed: bool):
+        latency = time.monotonic() - start
+        if self.breaker is not None:
+            self.breaker.after_call(latency, failed)
+        if self.limiter is not None:
+            self.limiter.on_sample(latency, failed)
+            self.limiter.release()
+
+    @contextmanager
+    def slot(self):
+        if self.breaker is not None:
+            self.breaker.before_call()
+        if self.limiter is not None:
+            try:
+                self.limiter.acquire(call_timeout(self.queue_timeout))
+            except HTTPException:
+                self._cancel()
+                raise
+        start = time.monotonic()
+        failed = False
+        try:
+            yield
+        except TRANSPORT_ERRORS:
+            failed = True
+            raise
+        finally:
+            self._record(start, failed)
+
+    @asynccontextmanager
+    async def slot_async(self):
+        if self.breaker is not None:
+            self.breaker.before_call()
+        if self.limiter is not None:
+            try:
+                await self.limiter.acquire_async(call_timeout(self.queue_timeout))
+            except (HTTPException, asyncio.CancelledError):
+                self._cancel()
+                raise
+        start = time.monotonic()
+        failed = False
+        try:
+            yield
+        except TRANSPORT_ERRORS:
+            failed = True
+            raise
+        finally:
+            self._record(start, failed)
+
+    def snapshot(self) -> dict:
+        return {
+            "limiter": self.limiter.snapshot() if self.limiter is not None else None,
+            "breaker": self.breaker.snapshot() if self.breaker is not None else None,
+        }
+
+
+odoo_guard = OdooGuard(
+    limiter=AdaptiveLimiter(
+        initial=settings.ODOO_LIMITER_INITIAL,
+        min_limit=settings.ODOO_LIMITER_MIN,
+        max_limit=settings.ODOO_LIMITER_MAX,
+        target_latency=settings.ODOO_LIMITER_TARGET_LATENCY,
+    ) if settings.ODOO_LIMITER_ENABLED else None,
+    breaker=CircuitBreaker(
+        window=settings.ODOO_BREAKER_WINDOW,
+        min_calls=settings.ODOO_BREAKER_MIN_CALLS,
+        error_ratio=settings.ODOO_BREAKER_ERROR_RATIO,
+        slow_call_seconds=settings.ODOO_BREAKER_SLOW_CALL_SECONDS,
+        slow_ratio=settings.ODOO_BREAKER_SLOW_RATIO,
+        open_seconds=settings.ODOO_BREAKER_OPEN_SECONDS,
+        half_open_calls=settings.ODOO_BREAKER_HALF_OPEN_CALLS,
+    ) if settings.ODOO_BREAKER_ENABLED else None,
+    queue_timeout=settings.ODOO_LIMITER_QUEUE_TIMEOUT,
+)
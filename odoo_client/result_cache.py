@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict
+from config.settings import settings
+from odoo_client import signals
+
+# perubahan pada model kiri juga membuat hasil baca model kanan basi
+RELATED_MODELS = {
+    "hospital.appointment.line": ["hospital.appointment"],  # total_qty, appointment_line_ids
+    "hospital.appointment": ["hospital.appointment.line"],  # write dengan command line
+    "hospital.patient": ["hospital.appointment"],  # date_of_birth related di appointment
+    "vehicle.location": ["vehicle.fleet"],  # last_location_id
+    "vehicle.head": ["vehicle.fleet"],  # nama head di head_id
+}
+
+# query polling/sinkronisasi & cek ETag harus selalu segar
+UNCACHEABLE_FIELDS = ('write_date', '__last_update')
+
+
+def cacheable(domain=None, fields=None, limit=10) -> bool:
+    # limit=None = bulk load (view, index, replica) yang punya mekanisme segar sendiri
+    if not limit:
+        return False
+    for leaf in domain or []:
+        if isinstance(leaf, (list, tuple)) and leaf and leaf[0] in UNCACHEABLE_FIELDS:
+            return False
+    return not any(name in UNCACHEABLE_FIELDS for name in fields or [])
+
+
+def _copy(value):
+    # route boleh memodifikasi record hasil read, jadi yang dibagikan salinan
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+class ResultCache:
+    """Cache hasil search_read/read/search per (uid, model, argumen).
+
+    TTL per model (model tanpa TTL tidak di-cache), ukuran dibatasi LRU.
+    Setiap create/write/unlink lewat OdooModel menghapus entry model itu
+    dan model terkait (RELATED_MODELS). Generasi per model mencegah hasil
+    RPC yang dimulai sebelum write tersimpan setelah invalidasi.
+    """
+
+    def __init__(self, ttls: dict, max_entries: int):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._by_model = {}  # model -> set(key)
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "evictions": 0, "expired": 0}
+        for model in ttls:
+            signals.connect(model, self._on_change)
+        for model, related in RELATED_MODELS.items():
+            if model not in ttls and any(name in ttls for name in related):
+                signals.connect(model, self._on_change)
+
+    def key(self, odoo_model, method: str, args: tuple):
+        # uid & password ikut jadi key supaya hak akses user tidak tercampur
+        return (odoo_model.db, odoo_model.uid, odoo_model.password, odoo_model.model, method, repr(args))
+
+    def enabled_for(self, model: str) -> bool:
+        return self.ttls.get(model, 0) > 0
+
+    def get(self, key):
+        """(hit, value, generation); generation dipakai lagi saat `put`."""
+        now = time.monotonic()
+        model = key[3]
+        with self._lock:
+            generation = self._generations.get(model, 0)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return True, _copy(entry[1]), generation
+                self._drop(key)
+                self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return False, None, generation
+
+    def put(self, key, generation: int, value):
+        model = key[3]
+        with self._lock:
+            if self._generations.get(model, 0) != generation:
+                return  # ada write selama RPC berjalan
+            self._entries[key] = (time.monotonic() + self.ttls[model], _copy(value))
+            self._entries.move_to_end(key)
+            self._by_model.setdefault(model, set()).add(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        keys = self._by_model.get(key[3])
+        if keys is not None:
+            keys.discard(key)
+
+    def invalidate(self, model: str):
+        with self._lock:
+            for name in (model, *RELATED_MODELS.get(model, ())):
+                self._generations[name] = self._generations.get(name, 0) + 1
+                for key in self._by_model.pop(name, set()):
+                    self._entries.pop(key, None)
+            self.stats["invalidations"] += 1
+
+    def _on_change(self, model: str, operation: str, ids: list):
+        self.invalidate(model)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "hit_ratio": round(self.stats["hits"] / total, 4) if total else 0.0,
+                "ttls": dict(self.ttls),
+            }
+
+
+result_cache = (
+    ResultCache(settings.RESULT_CACHE_TTLS, settings.RESULT_CACHE_SIZE)
+    if settings.RESULT_CACHE_ENABLED else None
+)
@@ -0,0 +1,36 @@
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# model -> [callback(model, operation, ids)]
+_listeners = defaultdict(list)
+_lock = threading.Lock()
+
+
+def connect(model: str, callback):
+    """Daftarkan callback yang dipanggil setelah create/write/unlink lewat API ini."""
+    with _lock:
+        _listeners[model].append(callback)
+
+
+def disconnect(model: str, callback):
+    with _lock:
+        if callback in _listeners.get(model, []):
+            _listeners[model].remove(callback)
+
+
+def notify(model: str, operation: str, ids: list):
+    """Dipanggil OdooModel/AsyncOdooModel setelah perubahan sukses di Odoo.
+
+    Error di listener hanya di-log: cache yang gagal di-invalidate tidak
+    boleh membuat write yang sudah sukses terlihat gagal oleh client.
+    """
+    with _lock:
+        callbacks = list(_listeners.get(model, ()))
+    for callback in callbacks:
+        try:
+            callback(model, operation, list(ids))
+        except Exception:
+            logger.exception("Listener perubahan %s gagal", model)
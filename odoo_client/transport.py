@@ -0,0 +1,331 @@
+import gzip
+import http.client
+import select
+import socket
+import threading
+import time
+import xmlrpc.client
+from collections import deque
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+from config.settings import settings
+from odoo_client.jsonrpc import JsonRpcProxy
+from odoo_client.instrumentation import add_rpc_bytes
+from odoo_client.deadline import rpc_timeout, RpcTimeout
+
+# Error yang menandakan koneksi keep-alive sudah ditutup server saat idle,
+# request aman diulang sekali dengan koneksi baru.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+class RpcAborted(Exception):
+    """RPC diputus dari thread lain lewat AbortScope (mis. backup hedging sudah menang)."""
+
+    aborted = True  # tidak dihitung error di track_rpc
+
+
+class AbortScope:
+    """Pegangan ke koneksi yang sedang dipakai RPC, supaya bisa diputus thread lain.
+
+    `abort()` mematikan socket-nya; recv yang sedang menunggu langsung gagal
+    dan ConnectionPool.request mengubahnya jadi RpcAborted (tidak diulang).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self.aborted = False
+
+    def attach(self, conn):
+        with self._lock:
+            if self.aborted:
+                raise RpcAborted()
+            self._conn = conn
+
+    def detach(self):
+        with self._lock:
+            self._conn = None
+
+    def abort(self):
+        # di bawah lock: koneksi yang sudah di-detach (kembali ke pool) tidak ikut diputus
+        with self._lock:
+            self.aborted = True
+            if self._conn is not None and self._conn.sock is not None:
+                try:
+                    self._conn.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+# scope abort untuk RPC di context ini (diisi hedging)
+abort_scope: ContextVar = ContextVar("rpc_abort_scope", default=None)
+
+
+class ConnectionPool:
+    """Pool koneksi HTTP/1.1 keep-alive ke satu base URL Odoo (thread-safe)."""
+
+    def __init__(self, url: str, size: int, idle_timeout: float):
+        parts = urlsplit(url)
+        self.url = url
+        self.scheme = parts.scheme
+        self.host = parts.netloc.rsplit("@", 1)[-1]
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._idle = deque()  # (connection, last_used)
+        self._lock = threading.Lock()
+        self.stats = {
+            "created": 0,
+            "reused": 0,
+            "released": 0,
+            "evicted_idle": 0,
+            "evicted_unhealthy": 0,
+            "discarded": 0,
+            "in_use": 0,
+            "requests": 0,
+            "bytes_sent": 0,
+            "bytes_received": 0,
+        }
+
+    def _new_connection(self):
+        if self.scheme == "https":
+            conn = http.client.HTTPSConnection(self.host)
+        else:
+            conn = http.client.HTTPConnection(self.host)
+        self.stats["created"] += 1
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        # socket idle yang "readable" berarti server sudah kirim FIN / data nyasar
+        if conn.sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def acquire(self):
+        """Ambil koneksi idle yang masih sehat, atau buat koneksi baru."""
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if now - last_used > self.idle_timeout:
+                    self.stats["evicted_idle"] += 1
+                    conn.close()
+                    continue
+                if not self._is_healthy(conn):
+                    self.stats["evicted_unhealthy"] += 1
+                    conn.close()
+                    continue
+                self.stats["reused"] += 1
+                self.stats["in_use"] += 1
+                conn.reused = True
+                return conn
+            conn = self._new_connection()
+            self.stats["in_use"] += 1
+        conn.reused = False
+        return conn
+
+    def release(self, conn):
+        """Kembalikan koneksi ke pool; kelebihan dari `size` langsung ditutup."""
+        with self._lock:
+            self.stats["in_use"] -= 1
+            if conn.sock is None or len(self._idle) >= self.size:
+                self.stats["discarded"] += 1
+                conn.close()
+                return
+            self.stats["released"] += 1
+            self._idle.append((conn, time.monotonic()))
+
+    def discard(self, conn):
+        with self._lock:
+            self.stats["in_use"] -= 1
+            self.stats["discarded"] += 1
+        conn.close()
+
+    def request(self, path: str, body: bytes, headers: list):
+        """POST `body` ke `path`, return (status, reason, headers, body).
+
+        Request diulang sekali dengan koneksi baru kalau koneksi keep-alive
+        yang dipinjam ternyata sudah ditutup server. Timeout socket = sisa
+        deadline request (maks. ODOO_RPC_TIMEOUT), jadi worker Odoo yang
+        hang tidak menahan thread selamanya.
+        """
+        scope = abort_scope.get()
+        while True:
+            timeout = rpc_timeout()
+            conn = self.acquire()
+            conn.timeout = timeout  # dipakai connect() untuk koneksi baru
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                resp, data = self._exchange(conn, path, body, headers, scope)
+            except RpcAborted:
+                self.discard(conn)
+                raise
+            except STALE_CONNECTION_ERRORS:
+                self.discard(conn)
+                # koneksi baru yang gagal berarti memang error, jangan diulang
+                if not conn.reused:
+                    raise
+                continue
+            except TimeoutError:
+                # response yang terlambat tidak boleh terbaca request berikutnya
+                self.discard(conn)
+                raise RpcTimeout()
+            except Exception:
+                self.discard(conn)
+                raise
+            with self._lock:
+                self.stats["requests"] += 1
+                self.stats["bytes_sent"] += len(body)
+                self.stats["bytes_received"] += len(data)
+            add_rpc_bytes(len(body), len(data))
+            if scope is not None and scope.aborted:
+                self.discard(conn)  # socket mungkin sudah di-shutdown saat response selesai
+            else:
+                self.release(conn)
+            return resp.status, resp.reason, {k.lower(): v for k, v in resp.getheaders()}, data
+
+    @staticmethod
+    def _exchange(conn, path: str, body: bytes, headers: list, scope):
+        """Satu request di `conn`; error karena scope di-abort menjadi RpcAborted."""
+        if scope is not None:
+            scope.attach(conn)
+        try:
+            conn.putrequest("POST", path, skip_accept_encoding=True)
+            for key, value in headers:
+                conn.putheader(key, value)
+            conn.putheader("Content-Length", str(len(body)))
+            conn.endheaders(body)
+            resp = conn.getresponse()
+            return resp, resp.read()
+        except Exception as e:
+            if scope is not None and scope.aborted:
+                raise RpcAborted() from e
+            raise
+        finally:
+            if scope is not None:
+                scope.detach()
+
+    def evict_idle(self):
+        """Tutup koneksi idle yang sudah melewati idle_timeout."""
+        now = time.monotonic()
+        with self._lock:
+            keep = deque()
+            for conn, last_used in self._idle:
+                if now - last_used > self.idle_timeout:
+                    self.stats["evicted_idle"] += 1
+                    conn.close()
+                else:
+                    keep.append((conn, last_used))
+            self._idle = keep
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                self._idle.pop()[0].close()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            created = self.stats["created"]
+            reused = self.stats["reused"]
+            total = created + reused
+            return {
+                **self.stats,
+                "idle": len(self._idle),
+                "size": self.size,
+                "reuse_ratio": round(reused / total, 4) if total else 0.0,
+            }
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """Transport XML-RPC yang meminjam koneksi dari ConnectionPool per request."""
+
+    def __init__(self, pool: ConnectionPool):
+        super().__init__()
+        self.pool = pool
+        self.verbose = False
+
+    def request(self, host, handler, request_body, verbose=False):
+        _, extra_headers, _ = self.get_host_info(host)
+        headers = self._headers + (extra_headers or []) + [
+            ("Content-Type", "text/xml"),
+            ("User-Agent", self.user_agent),
+        ]
+        if self.accept_gzip_encoding:
+            headers.append(("Accept-Encoding", "gzip"))
+
+        status, reason, resp_headers, body = self.pool.request(handler, request_body, headers)
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(host + handler, status, reason, resp_headers)
+
+        if resp_headers.get("content-encoding", "") == "gzip":
+            body = gzip.decompress(body)
+        parser, unmarshaller = self.getparser()
+        parser.feed(body)
+        parser.close()
+        return unmarshaller.close()
+
+    def close(self):
+        # koneksi dimiliki pool, bukan transport
+        pass
+
+
+_pools = {}
+_transports = {}
+_registry_lock = threading.RLock()
+
+
+def get_pool(url: str = None) -> ConnectionPool:
+    url = url or settings.ODOO_URL
+    pool = _pools.get(url)
+    if pool is None:
+        with _registry_lock:
+            pool = _pools.get(url)
+            if pool is None:
+                pool = ConnectionPool(url, settings.ODOO_POOL_SIZE, settings.ODOO_POOL_IDLE_TIMEOUT)
+                _pools[url] = pool
+    return pool
+
+
+def get_transport(url: str = None) -> PooledTransport:
+    """Transport bersama (process-wide) untuk satu URL Odoo."""
+    url = url or settings.ODOO_URL
+    transport = _transports.get(url)
+    if transport is None:
+        with _registry_lock:
+            transport = _transports.get(url)
+            if transport is None:
+                transport = PooledTransport(get_pool(url))
+                _transports[url] = transport
+    return transport
+
+
+def server_proxy(service: str, url: str = None):
+    """Proxy `common`/`object` sesuai ODOO_PROTOCOL, dengan transport bersama."""
+    url = url or settings.ODOO_URL
+    if settings.ODOO_PROTOCOL == "jsonrpc":
+        return JsonRpcProxy(get_pool(url), service)
+    return xmlrpc.client.ServerProxy(
+        f"{url}/xmlrpc/2/{service}", allow_none=True, transport=get_transport(url)
+    )
+
+
+def pool_stats() -> dict:
+    for pool in list(_pools.values()):
+        pool.evict_idle()
+    return {url: pool.snapshot() for url, pool in list(_pools.items())}
+
+
+def close_pools():
+    for pool in list(_pools.values()):
+        pool.close()
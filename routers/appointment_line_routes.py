@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Literal, Optional
 from schemas.appointment_line_schema import AppointmentLineCreate, AppointmentLineOut
 from odoo_client.base_model import OdooModel
 from dependencies.auth_dep import get_odoo_user
 from helper.helper import preprocess_odoo_data, normalize_relations
+from helper.pagination import KEYSET_ORDER, keyset_domain, set_next_cursor, iter_search_read, ndjson_response
+from helper.replica import read_model
+from helper.server_timing import TimedRoute
+from config.settings import settings
 
-router = APIRouter(prefix="/appointment_line", tags=["Appointment Line"])
+router = APIRouter(prefix="/appointment_line", tags=["Appointment Line"], route_class=TimedRoute)
 
 # Endpoint untuk membuat Appointment Line
 @router.post("/", response_model=AppointmentLineOut)
@@ -35,7 +39,7 @@ def create_appointment_line(data: AppointmentLineCreate, user=Depends(get_odoo_u
 # Endpoint untuk membaca Appointment Line berdasarkan ID
 @router.get("/{line_id}", response_model=AppointmentLineOut)
 def get_appointment_line(line_id: int, user=Depends(get_odoo_user)):
-    appointment_line_model = OdooModel("hospital.appointment.line", user["uid"], user["username"], user["password"])
+    appointment_line_model = read_model("hospital.appointment.line", user)
     
     # Cari appointment line berdasarkan ID
     appointment_line = appointment_line_model.read([line_id], fields=[
@@ -50,15 +54,34 @@ def get_appointment_line(line_id: int, user=Depends(get_odoo_user)):
 
 # Endpoint untuk mendapatkan semua Appointment Lines yang terkait dengan Appointment tertentu
 @router.get("/appointment/{appointment_id}", response_model=List[AppointmentLineOut])
-def get_appointment_lines(appointment_id: int, user=Depends(get_odoo_user)):
-    appointment_line_model = OdooModel("hospital.appointment.line", user["uid"], user["username"], user["password"])
-    
+def get_appointment_lines(
+    appointment_id: int,
+    response: Response,
+    limit: int = Query(10, ge=1, le=settings.LIST_MAX_LIMIT),
+    after_id: Optional[int] = Query(None, description="Cursor: id terakhir dari halaman sebelumnya"),
+    format: Literal["json", "ndjson"] = "json",
+    user=Depends(get_odoo_user)
+):
+    appointment_line_model = read_model("hospital.appointment.line", user)
+    domain = [('appointment_id', '=', appointment_id)]
+    fields = ['id', 'appointment_id', 'product_id', 'qty']
+
+    if format == "ndjson":
+        return ndjson_response(
+            iter_search_read(
+                appointment_line_model, domain, fields, settings.EXPORT_CHUNK_SIZE, after_id=after_id,
+                transform=lambda lines: [normalize_relations(line) for line in lines]
+            ),
+            AppointmentLineOut
+        )
+
     # Cari semua appointment lines yang terkait dengan appointment_id
     appointment_lines = appointment_line_model.search_read(
-        domain=[('appointment_id', '=', appointment_id)], 
-        fields=['id', 'appointment_id', 'product_id', 'qty']
+        domain=keyset_domain(domain, after_id),
+        fields=fields, limit=limit, order=KEYSET_ORDER
     )
-    
+    set_next_cursor(response, appointment_lines, limit)
+
     clean_appointment_lines = [normalize_relations(appointment_line) for appointment_line in appointment_lines]
     return clean_appointment_lines
 
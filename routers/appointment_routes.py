@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, Header
+from typing import List, Literal, Optional
 from schemas.appointment_schema import AppointmentCreate, AppointmentOut, AppointmentUpdate, AppointmentOut2, AppointmentStateUpdate
 from odoo_client.base_model import OdooModel
 from dependencies.auth_dep import get_odoo_user
 from helper.helper import preprocess_odoo_data, normalize_relations
+from helper.pagination import KEYSET_ORDER, keyset_domain, set_next_cursor, iter_search_read, ndjson_response
+from helper.sparse_fields import parse_fields, sparse_response
+from helper.fast_json import fast_json_response
+from helper.appointment_view import appointment_views
+from helper.replica import read_model
+from helper.etag import make_etag, etag_matches, not_modified, etag_stats
+from helper.server_timing import TimedRoute
+from config.settings import settings
 
-router = APIRouter(prefix="/appointments", tags=["Appointments"])
+router = APIRouter(prefix="/appointments", tags=["Appointments"], route_class=TimedRoute)
 
 # @router.get("/", response_model=List[AppointmentOut])
 # def get_appointments(user=Depends(get_odoo_user)):
@@ -19,110 +27,165 @@ router = APIRouter(prefix="/appointments", tags=["Appointments"])
 #     print(clean_appointments)
 #     return clean_appointments
     
+APPOINTMENT_LIST_FIELDS = [
+    'id', 'reference', 'patient_id', 'date_appointment', 'note', 'state',
+    'appointment_line_ids', 'display_name', 'total_qty', 'date_of_birth'
+]
+
+LINE_FIELDS = ["id", "appointment_id", "product_id", "qty"]
+
+def latest_update(records: list):
+    """`__last_update` terbaru dari sekumpulan record (bagian ETag), None kalau kosong."""
+    return max((record['__last_update'] for record in records), default=None)
+
+def attach_appointment_lines(appointment_line_model, appointments: list, line_details: Optional[list] = None) -> list:
+    """Baca line semua appointment dalam satu RPC lalu gabungkan per appointment.
+
+    `line_details`: line yang sudah dibaca caller (field LINE_FIELDS), jadi tidak dibaca ulang.
+    """
+    # Kumpulkan semua ID line dari semua appointment
+    all_line_ids = []
+    for appt in appointments:
+        all_line_ids.extend(appt.get("appointment_line_ids", []))
+
+    # Baca semua line sekalian
+    line_map = {}
+    if line_details is None:
+        line_details = appointment_line_model.read(all_line_ids, fields=LINE_FIELDS) if all_line_ids else []
+    for line in line_details:
+        if line.get("appointment_id"):
+            appt_id = line["appointment_id"][0]
+            if appt_id not in line_map:
+                line_map[appt_id] = []
+            line_map[appt_id].append({
+                "id": line["id"],
+                "product_id": line["product_id"][0] if isinstance(line["product_id"], list) else line["product_id"],
+                "qty": line["qty"]
+            })
+
+    # Gabungkan appointment dengan line-nya (hanya field yang memang dibaca)
+    result = []
+    for appt in appointments:
+        row = dict(appt)
+        if "patient_id" in row:
+            row["patient_id"] = row["patient_id"][0] if isinstance(row["patient_id"], list) else None
+        if "appointment_line_ids" in row:
+            row["appointment_line_ids"] = line_map.get(appt["id"], [])
+        result.append(row)
+    return result
+
 @router.get("/", response_model=List[AppointmentOut])
-def get_appointments(user=Depends(get_odoo_user)):
+def get_appointments(
+    response: Response,
+    limit: int = Query(100, ge=1, le=settings.LIST_MAX_LIMIT),
+    after_id: Optional[int] = Query(None, description="Cursor: id terakhir dari halaman sebelumnya"),
+    format: Literal["json", "ndjson"] = "json",
+    fields: Optional[str] = Query(None, description="Sparse fieldset, mis. `reference,state`"),
+    user=Depends(get_odoo_user)
+):
+    sparse = parse_fields(fields, AppointmentOut)
+    read_fields = sparse or APPOINTMENT_LIST_FIELDS
     try:
-        appointment_model = OdooModel("hospital.appointment", user["uid"], user["username"], user["password"])
-        appointment_line_model = OdooModel("hospital.appointment.line", user["uid"], user["username"], user["password"])
-
-        # Step 1: Ambil semua appointment
-        appointments = appointment_model.search_read(fields=[
-            'id', 'reference', 'patient_id', 'date_appointment', 'note', 'state',
-            'appointment_line_ids', 'display_name', 'total_qty', 'date_of_birth'
-        ], limit=100)
+        appointment_model = read_model("hospital.appointment", user)
+        appointment_line_model = read_model("hospital.appointment.line", user)
+
+        if settings.APPOINTMENT_VIEW_ENABLED and format == "json":
+            # dilayani dari materialized view; row sudah tervalidasi
+            view = appointment_views.for_user(user["uid"])
+            view.ensure_fresh(appointment_model, appointment_line_model)
+            rows = view.page(after_id, limit)
+            set_next_cursor(response, rows, limit)
+            if sparse:
+                rows = [{name: row[name] for name in sparse} for row in rows]
+            return fast_json_response(rows, List[AppointmentOut], validated=True, headers=response.headers)
+
+        if format == "ndjson":
+            # tiap chunk appointment langsung digabung dengan line-nya lalu di-stream
+            return ndjson_response(
+                iter_search_read(
+                    appointment_model, [], read_fields, settings.EXPORT_CHUNK_SIZE, after_id=after_id,
+                    transform=lambda appointments: attach_appointment_lines(appointment_line_model, appointments)
+                ),
+                AppointmentOut, sparse
+            )
+
+        # Ambil satu halaman appointment
+        appointments = appointment_model.search_read(
+            domain=keyset_domain([], after_id), fields=read_fields, limit=limit, order=KEYSET_ORDER
+        )
 
         if not appointments:
             return []
 
-        # Step 2: Kumpulkan semua ID line dari semua appointment
-        all_line_ids = []
-        for appt in appointments:
-            all_line_ids.extend(appt.get("appointment_line_ids", []))
-
-        # Step 3: Baca semua line sekalian
-        line_map = {}
-        if all_line_ids:
-            line_details = appointment_line_model.read(all_line_ids, fields=["id", "appointment_id", "product_id", "qty"])
-            for line in line_details:
-                if line.get("appointment_id"):
-                    appt_id = line["appointment_id"][0]
-                    if appt_id not in line_map:
-                        line_map[appt_id] = []
-                    line_map[appt_id].append({
-                        "id": line["id"],
-                        "product_id": line["product_id"][0] if isinstance(line["product_id"], list) else line["product_id"],
-                        "qty": line["qty"]
-                    })
-        print("line_map:", line_map)
-
-        # Step 4: Gabungkan appointment dengan line-nya
-        result = []
-        for appt in appointments:
-            result.append({
-                "id": appt["id"],
-                "reference": appt["reference"],
-                "patient_id": appt["patient_id"][0] if isinstance(appt["patient_id"], list) else None,
-                "date_appointment": appt.get("date_appointment"),
-                "note": appt.get("note"),
-                "state": appt["state"],
-                "appointment_line_ids": line_map.get(appt["id"], []),
-                "display_name": appt.get("display_name"),
-                "total_qty": appt.get("total_qty"),
-                "date_of_birth": appt.get("date_of_birth")
-            })
-
+        set_next_cursor(response, appointments, limit)
+        result = attach_appointment_lines(appointment_line_model, appointments)
+        if sparse:
+            return sparse_response(result, AppointmentOut, sparse, headers=response.headers)
+        if settings.FAST_JSON_RESPONSES:
+            return fast_json_response(result, List[AppointmentOut], headers=response.headers)
         return result
 
+    except HTTPException:
+        raise  # mis. 503 dari limiter/circuit breaker Odoo
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{appointment_id}", response_model=AppointmentOut)
-def get_appointment(appointment_id: int, user=Depends(get_odoo_user)):
-    appointment_model = OdooModel("hospital.appointment", user["uid"], user["username"], user["password"])
-
-    # # Read appointment data from Odoo
-    # appointment = appointment_model.read([appointment_id], fields=[
-    #     'id', 'reference', 'patient_id', 'date_appointment', 'note', 'state',
-    #     'appointment_line_ids', 'display_name', 'total_qty', 'date_of_birth'
-    # ])
-    # if not appointment:
-    #     raise HTTPException(status_code=404, detail="Appointment not found")
-    # clean_appointment = normalize_relations(appointment[0])
-
-    # return clean_appointment
-    # Read hasil appointment
-    appointment_data = appointment_model.read([appointment_id], fields=[
-        'id', 'reference', 'patient_id', 'date_appointment', 'note', 'state', 
-        'display_name', 'total_qty', 'date_of_birth', 'appointment_line_ids'
-    ])[0]
-
-    # Baca detail appointment_line jika perlu (optional)
-    line_ids = appointment_data.get("appointment_line_ids", [])
-    appointment_line_model = OdooModel("hospital.appointment.line", user["uid"], user["username"], user["password"])
-    line_details = appointment_line_model.read(line_ids, fields=["id", "product_id", "qty"])
-
-    # Format hasil line
-    formatted_lines = [
-        {
-            "id": line["id"],
-            "product_id": line["product_id"][0],
-            "qty": line["qty"]
-        }
-        for line in line_details
-    ]
-
-    return {
-        "id": appointment_data['id'],
-        "reference": appointment_data['reference'],
-        "patient_id": appointment_data['patient_id'][0],
-        "date_appointment": appointment_data.get('date_appointment'),
-        "note": appointment_data.get('note'),
-        "state": appointment_data['state'],
-        "appointment_line_ids": formatted_lines,  # kalau mau detail line, ambil lagi pakai read()
-        "display_name": appointment_data.get('display_name'),
-        "total_qty": appointment_data.get('total_qty'),
-        "date_of_birth": appointment_data.get('date_of_birth')
-    }
+def get_appointment(
+    appointment_id: int,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Sparse fieldset, mis. `reference,state`"),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_odoo_user)
+):
+    appointment_model = read_model("hospital.appointment", user)
+    appointment_line_model = read_model("hospital.appointment.line", user)
+    sparse = parse_fields(fields, AppointmentOut)
+    read_fields = sparse or APPOINTMENT_LIST_FIELDS
+
+    if if_none_match:
+        # request conditional: versi appointment + versi line saja (line bisa diubah langsung
+        # tanpa menyentuh appointment); record lengkap & line hanya dibaca kalau berubah
+        version = appointment_model.search_read(
+            domain=[('id', '=', appointment_id)], fields=['appointment_line_ids', '__last_update'], limit=1
+        )
+        if not version:
+            raise HTTPException(status_code=404, detail="Appointment not found")
+        line_ids = sorted(version[0].get("appointment_line_ids") or [])
+        line_versions = appointment_line_model.read(line_ids, fields=['__last_update']) if line_ids else []
+        etag = make_etag(
+            "hospital.appointment", appointment_id, version[0]['__last_update'],
+            line_ids, latest_update(line_versions), sparse
+        )
+        if etag_matches(if_none_match, etag):
+            etag_stats.record("appointments", True)
+            return not_modified(etag)
+
+    # record appointment & line kecil, jadi dibaca sekalian dengan versinya (ETag baru)
+    appointment_data = appointment_model.search_read(
+        domain=[('id', '=', appointment_id)],
+        fields=list(dict.fromkeys([*read_fields, 'appointment_line_ids', '__last_update'])),
+        limit=1
+    )
+    if not appointment_data:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    appointment = appointment_data[0]
+    line_ids = sorted(appointment.get("appointment_line_ids") or [])
+    lines = appointment_line_model.read(line_ids, fields=[*LINE_FIELDS, '__last_update']) if line_ids else []
+    etag = make_etag(
+        "hospital.appointment", appointment_id, appointment.pop('__last_update'),
+        line_ids, latest_update(lines), sparse
+    )
+    etag_stats.record("appointments", False)
+    response.headers["ETag"] = etag
+
+    if 'appointment_line_ids' not in read_fields:
+        # line hanya dibaca kalau appointment_line_ids diminta
+        appointment.pop('appointment_line_ids')
+    result = attach_appointment_lines(appointment_line_model, [appointment], lines)[0]
+    if sparse:
+        return sparse_response(result, AppointmentOut, sparse, headers=response.headers)
+    return result
 
 @router.post("/", response_model=AppointmentOut)
 def create_appointment(data: AppointmentCreate, user=Depends(get_odoo_user)):
@@ -173,6 +236,8 @@ def create_appointment(data: AppointmentCreate, user=Depends(get_odoo_user)):
             "total_qty": appointment_data.get('total_qty'),
             "date_of_birth": appointment_data.get('date_of_birth')
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -186,11 +251,13 @@ def create_appointment(data: AppointmentCreate, user=Depends(get_odoo_user)):
         # Create appointment
         appointment_id = appointment_model.create(data_dict)
         appointment = appointment_model.read([appointment_id], fields=[
-            'id', 'patient_id', 'date_appointment', 'note', 'state',
+            'id', 'reference', 'patient_id', 'date_appointment', 'note', 'state',
             'appointment_line_ids', 'display_name', 'total_qty', 'date_of_birth'
         ])
         clean_appointment = normalize_relations(appointment[0])
         return clean_appointment
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -237,6 +304,8 @@ def update_appointment(appointment_id: int, data: AppointmentUpdate, user=Depend
             "total_qty": appointment_data.get('total_qty'),
             "date_of_birth": appointment_data.get('date_of_birth')
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,121 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from odoo_client.instrumentation import rpc_metrics, RPC_DURATION_BUCKETS, RPC_PER_REQUEST_BUCKETS
+from odoo_client.transport import pool_stats
+from odoo_client.result_cache import result_cache
+from odoo_client.limiter import odoo_guard
+from helper.etag import etag_stats
+from helper.server_timing import TimedRoute
+
+# tanpa auth supaya bisa di-scrape Prometheus; batasi aksesnya di reverse proxy
+router = APIRouter(tags=["Metrics"], route_class=TimedRoute)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def header(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value, **labels):
+        self.lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+
+    def histogram(self, name: str, bounds: tuple, counts: list, total: int, value_sum, **labels):
+        # counts per bucket sudah kumulatif (setiap observasi masuk semua bucket >= nilai)
+        for bound, count in zip(bounds, counts):
+            self.sample(f"{name}_bucket", count, **labels, le=bound)
+        self.sample(f"{name}_bucket", total, **labels, le="+Inf")
+        self.sample(f"{name}_sum", value_sum, **labels)
+        self.sample(f"{name}_count", total, **labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics() -> str:
+    snapshot = rpc_metrics.snapshot()
+    out = _Writer()
+
+    out.header("odoo_rpc_duration_seconds", "histogram", "Durasi execute_kw ke Odoo per model dan method.")
+    for (model, method), entry in sorted(snapshot["rpc"].items()):
+        out.histogram(
+            "odoo_rpc_duration_seconds", RPC_DURATION_BUCKETS, entry["buckets"], entry["calls"],
+            round(entry["seconds"], 6), model=model, method=method,
+        )
+    out.header("odoo_rpc_errors_total", "counter", "execute_kw yang gagal (Fault, error koneksi).")
+    for (model, method), entry in sorted(snapshot["rpc"].items()):
+        out.sample("odoo_rpc_errors_total", entry["errors"], model=model, method=method)
+    out.header("odoo_rpc_request_bytes_total", "counter", "Byte body request RPC yang dikirim ke Odoo.")
+    for (model, method), entry in sorted(snapshot["rpc"].items()):
+        out.sample("odoo_rpc_request_bytes_total", entry["bytes_sent"], model=model, method=method)
+    out.header("odoo_rpc_response_bytes_total", "counter", "Byte body response RPC dari Odoo.")
+    for (model, method), entry in sorted(snapshot["rpc"].items()):
+        out.sample("odoo_rpc_response_bytes_total", entry["bytes_received"], model=model, method=method)
+
+    out.header("http_request_odoo_rpcs", "histogram", "Jumlah RPC ke Odoo per request HTTP.")
+    for (route, method), entry in sorted(snapshot["requests"].items()):
+        out.histogram(
+            "http_request_odoo_rpcs", RPC_PER_REQUEST_BUCKETS, entry["buckets"], entry["requests"],
+            entry["rpcs"], route=route, method=method,
+        )
+
+    out.header("odoo_pool_connections_created_total", "counter", "Koneksi keep-alive baru ke Odoo.")
+    pools = pool_stats()
+    for url, stats in pools.items():
+        out.sample("odoo_pool_connections_created_total", stats["created"], url=url)
+    out.header("odoo_pool_connections_reused_total", "counter", "Request yang memakai ulang koneksi keep-alive.")
+    for url, stats in pools.items():
+        out.sample("odoo_pool_connections_reused_total", stats["reused"], url=url)
+
+    if result_cache is not None:
+        cache = result_cache.snapshot()
+        out.header("result_cache_lookups_total", "counter", "Lookup result cache per hasil.")
+        out.sample("result_cache_lookups_total", cache["hits"], result="hit")
+        out.sample("result_cache_lookups_total", cache["misses"], result="miss")
+        out.header("result_cache_entries", "gauge", "Jumlah entry di result cache.")
+        out.sample("result_cache_entries", cache["size"])
+
+    if odoo_guard.limiter is not None:
+        limiter = odoo_guard.limiter.snapshot()
+        out.header("odoo_limiter_limit", "gauge", "Batas RPC paralel ke Odoo saat ini.")
+        out.sample("odoo_limiter_limit", limiter["limit"])
+        out.header("odoo_limiter_in_flight", "gauge", "RPC ke Odoo yang sedang berjalan.")
+        out.sample("odoo_limiter_in_flight", limiter["in_flight"])
+        out.header("odoo_limiter_waiting", "gauge", "RPC yang antre menunggu slot.")
+        out.sample("odoo_limiter_waiting", limiter["waiting"])
+        out.header("odoo_limiter_rejected_total", "counter", "RPC yang ditolak karena antrian melewati timeout.")
+        out.sample("odoo_limiter_rejected_total", limiter["rejected"])
+    if odoo_guard.breaker is not None:
+        breaker = odoo_guard.breaker.snapshot()
+        out.header("odoo_breaker_open", "gauge", "1 kalau circuit breaker Odoo tidak closed.")
+        out.sample("odoo_breaker_open", int(breaker["state"] != "closed"), state=breaker["state"])
+        out.header("odoo_breaker_opened_total", "counter", "Berapa kali circuit breaker terbuka.")
+        out.sample("odoo_breaker_opened_total", breaker["opened"])
+        out.header("odoo_breaker_rejected_total", "counter", "RPC yang ditolak circuit breaker.")
+        out.sample("odoo_breaker_rejected_total", breaker["rejected"])
+
+    out.header("conditional_get_requests_total", "counter", "GET detail dengan If-None-Match per hasil.")
+    for endpoint, counts in sorted(etag_stats.snapshot().items()):
+        out.sample("conditional_get_requests_total", counts["not_modified"], endpoint=endpoint, result="not_modified")
+        out.sample(
+            "conditional_get_requests_total", counts["requests"] - counts["not_modified"],
+            endpoint=endpoint, result="modified",
+        )
+    return out.render()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
@@ -1,15 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from schemas.partner_schema import PartnerCreate, PartnerResponse
 from odoo_client.base_model import OdooModel
 from dependencies.auth_dep import get_odoo_user
-from typing import List
+from typing import List, Literal, Optional
+from config.settings import settings
+from helper.pagination import KEYSET_ORDER, keyset_domain, set_next_cursor, iter_search_read, ndjson_response
+from helper.sparse_fields import parse_fields, sparse_response
+from helper.fast_json import fast_json_response
+from helper.replica import read_model
+from helper.server_timing import TimedRoute
 
-router = APIRouter(prefix="/partners", tags=["Partners"])
+router = APIRouter(prefix="/partners", tags=["Partners"], route_class=TimedRoute)
 
 @router.get("/", response_model=List[PartnerResponse])
-def get_partners(user=Depends(get_odoo_user)):
-    partner_model = OdooModel("res.partner", user["uid"], user["username"], user["password"])
-    result = partner_model.search_read(fields=["id", "name", "email", "phone"], limit=50)
+def get_partners(
+    response: Response,
+    limit: int = Query(50, ge=1, le=settings.LIST_MAX_LIMIT),
+    after_id: Optional[int] = Query(None, description="Cursor: id terakhir dari halaman sebelumnya"),
+    format: Literal["json", "ndjson"] = "json",
+    fields: Optional[str] = Query(None, description="Sparse fieldset, mis. `name,email`"),
+    user=Depends(get_odoo_user)
+):
+    partner_model = read_model("res.partner", user)
+    sparse = parse_fields(fields, PartnerResponse)
+    read_fields = sparse or ["id", "name", "email", "phone"]
+
+    if format == "ndjson":
+        return ndjson_response(
+            iter_search_read(partner_model, [], read_fields, settings.EXPORT_CHUNK_SIZE, after_id=after_id),
+            PartnerResponse, sparse
+        )
+
+    result = partner_model.search_read(
+        domain=keyset_domain([], after_id), fields=read_fields, limit=limit, order=KEYSET_ORDER
+    )
+    set_next_cursor(response, result, limit)
+    if sparse:
+        return sparse_response(result, PartnerResponse, sparse, headers=response.headers)
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(result, List[PartnerResponse], headers=response.headers)
     return result
 
 @router.post("/", response_model=PartnerResponse)
@@ -1,32 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile
-from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile, Query, Response, Header
+from typing import Optional, List, Literal
 from datetime import date
 from schemas.patient_schema import PatientBase, PatientCreate, PatientUpdate, PatientOut, PatientOutAll
 from odoo_client.base_model import OdooModel
 from dependencies.auth_dep import get_odoo_user
 from helper.helper import preprocess_odoo_data
+from helper.pagination import KEYSET_ORDER, keyset_domain, set_next_cursor, iter_search_read, ndjson_response
+from helper.sparse_fields import parse_fields, sparse_response
+from helper.fast_json import fast_json_response
+from helper.replica import read_model
+from helper.etag import make_etag, etag_matches, not_modified, etag_stats
+from helper.image_cache import patient_image_cache, sniff_content_type
+from helper.image_pipeline import prepare_image_upload
+from helper.server_timing import TimedRoute
+from fastapi.concurrency import run_in_threadpool
+from config.settings import settings
 import base64
 
-router = APIRouter(prefix="/patients", tags=["Patients"])
+router = APIRouter(prefix="/patients", tags=["Patients"], route_class=TimedRoute)
+
+# Blob gambar tidak ikut dibaca secara default; JSON membawa image_url
+PATIENT_FIELDS = ['id', 'name', 'date_of_birth', 'gender', 'is_minor', 'guardian', 'tag_ids']
+IMAGE_FIELDS = {"full": "image", "medium": "image_medium", "small": "image_small"}
+
+def odoo_fields(sparse: list) -> list:
+    # image_url dihitung di sini, bukan field Odoo
+    return [name for name in sparse if name != "image_url"]
+
+def with_image_url(records: list, size: str) -> list:
+    for record in records:
+        record["image_url"] = f"{router.prefix}/{record['id']}/image?size={size}"
+    return records
 
 @router.get("/", response_model=List[PatientOutAll])
-async def get_patients(user=Depends(get_odoo_user)):
-    patient_model = OdooModel("hospital.patient", user["uid"], user["username"], user["password"])
-    result = patient_model.search_read(fields=['id', 'name', 'date_of_birth', 'gender', 'is_minor', 'guardian', 'tag_ids', 'image_small'], limit=50)
+def get_patients(
+    response: Response,
+    limit: int = Query(50, ge=1, le=settings.LIST_MAX_LIMIT),
+    after_id: Optional[int] = Query(None, description="Cursor: id terakhir dari halaman sebelumnya"),
+    format: Literal["json", "ndjson"] = "json",
+    fields: Optional[str] = Query(None, description="Sparse fieldset, mis. `name,gender`"),
+    user=Depends(get_odoo_user)
+):
+    patient_model = read_model("hospital.patient", user)
+    sparse = parse_fields(fields, PatientOutAll)
+    read_fields = odoo_fields(sparse) if sparse else PATIENT_FIELDS
+
+    if format == "ndjson":
+        return ndjson_response(
+            iter_search_read(
+                patient_model, [], read_fields, settings.EXPORT_CHUNK_SIZE, after_id=after_id,
+                transform=lambda records: with_image_url(records, "small")
+            ),
+            PatientOutAll, sparse
+        )
+
+    result = patient_model.search_read(
+        domain=keyset_domain([], after_id), fields=read_fields, limit=limit, order=KEYSET_ORDER
+    )
+    set_next_cursor(response, result, limit)
+    with_image_url(result, "small")
+    if sparse:
+        return sparse_response(result, PatientOutAll, sparse, headers=response.headers)
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(result, List[PatientOutAll], headers=response.headers)
     return result
 
 @router.get("/{patient_id}", response_model=PatientOut)
-def get_patient(patient_id: int, user=Depends(get_odoo_user)):
-    patient_model = OdooModel("hospital.patient", user["uid"], user["username"], user["password"])
+def get_patient(
+    patient_id: int,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Sparse fieldset, mis. `name,image`"),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_odoo_user)
+):
+    patient_model = read_model("hospital.patient", user)
+    sparse = parse_fields(fields, PatientOut)
+    read_fields = odoo_fields(sparse) if sparse else PATIENT_FIELDS
 
-    # Gunakan read untuk ambil detail berdasarkan ID
-    result = patient_model.read([patient_id], fields=['id', 'name', 'date_of_birth', 'gender', 'is_minor', 'guardian', 'tag_ids', 'image'])
+    if if_none_match:
+        # request conditional: cek versi dulu (satu field), record lengkap hanya dibaca kalau berubah
+        version = patient_model.search_read(domain=[('id', '=', patient_id)], fields=['__last_update'], limit=1)
+        if not version:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        etag = make_etag("hospital.patient", patient_id, version[0]['__last_update'], sparse)
+        if etag_matches(if_none_match, etag):
+            etag_stats.record("patients", True)
+            return not_modified(etag)
+        result = patient_model.read([patient_id], fields=read_fields)
+    else:
+        # tanpa If-None-Match: satu RPC, versi ikut dibaca untuk ETag
+        result = patient_model.search_read(
+            domain=[('id', '=', patient_id)], fields=[*read_fields, '__last_update'], limit=1
+        )
+        if not result:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        etag = make_etag("hospital.patient", patient_id, result[0].pop('__last_update'), sparse)
+    etag_stats.record("patients", False)
+    response.headers["ETag"] = etag
 
     if not result:
         raise HTTPException(status_code=404, detail="Patient not found")
 
+    with_image_url(result, "full")
+    if sparse:
+        return sparse_response(result[0], PatientOut, sparse, headers=response.headers)
     return result[0]
 
+@router.get("/{patient_id}/image")
+def get_patient_image(
+    patient_id: int,
+    size: Literal["full", "medium", "small"] = "full",
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_odoo_user)
+):
+    """Bytes gambar mentah; ETag mengikuti `__last_update` record."""
+    key = f"{patient_id}-{size}"
+    # window tanpa RPC hanya untuk uid yang sudah lolos cek akses Odoo
+    ref = patient_image_cache.fresh(key, user["uid"])
+    if ref is None:
+        patient_model = OdooModel("hospital.patient", user["uid"], user["username"], user["password"])
+        # cek versi dulu (murah), blob hanya dibaca kalau versi berubah
+        record = patient_model.search_read(domain=[('id', '=', patient_id)], fields=['__last_update'], limit=1)
+        if not record:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        version = str(record[0]['__last_update'])
+        ref = patient_image_cache.validate(key, version, user["uid"])
+        if ref is None:
+            image = patient_model.read([patient_id], fields=[IMAGE_FIELDS[size]])
+            blob = image[0].get(IMAGE_FIELDS[size]) if image else None
+            if not blob:
+                raise HTTPException(status_code=404, detail="Patient has no image")
+            ref = patient_image_cache.store(key, version, base64.b64decode(blob), user["uid"])
+
+    etag = make_etag("hospital.patient", patient_id, size, ref["version"])
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, headers)
+
+    data = patient_image_cache.read(ref)
+    if data is None:
+        # blob hilang dari disk: buang ref, client cukup retry
+        patient_image_cache.invalidate(f"{patient_id}-")
+        raise HTTPException(status_code=503, detail="Image cache entry missing, retry")
+    return Response(content=data, media_type=sniff_content_type(data), headers=headers)
+
 # @router.post("/", response_model=PatientOut)
 # def create_patient(data: PatientCreate, user=Depends(get_odoo_user)):
 #     patient_model = OdooModel("hospital.patient", user["uid"], user["username"], user["password"])
@@ -53,10 +170,10 @@ async def create_patient(
     patient_model = OdooModel("hospital.patient", user["uid"], user["username"], user["password"])
 
     # Proses image
+    # dibaca per chunk dengan batas ukuran, resize + base64 di process pool
     image_base64 = None
     if image:
-        content = await image.read()
-        image_base64 = base64.b64encode(content).decode("utf-8")
+        image_base64 = await prepare_image_upload(image)
 
     # Siapkan dict data
     data_dict = {
@@ -73,12 +190,10 @@ async def create_patient(
         data_dict["image"] = image_base64
 
     # Proses ke Odoo
-    new_id = patient_model.create(data_dict)
-    patient = patient_model.read([new_id], fields=[
-        'id', 'name', 'date_of_birth', 'gender', 'is_minor', 'guardian', 'tag_ids', 'image'
-    ])
-    
-    return patient[0]
+    new_id = await run_in_threadpool(patient_model.create, data_dict)
+    patient = await run_in_threadpool(patient_model.read, [new_id], fields=PATIENT_FIELDS)
+
+    return with_image_url(patient, "full")[0]
 
 # @router.put("/{patient_id}", response_model=PatientOut)
 # def update_patient(patient_id: int, data: PatientUpdate, user=Depends(get_odoo_user)):
@@ -121,20 +236,18 @@ async def update_patient(
         data_dict["tag_ids"] = [(6, 0, tag_ids)]
 
     if image:
-        content = await image.read()
-        image_base64 = base64.b64encode(content).decode("utf-8")
-        data_dict["image"] = image_base64
+        data_dict["image"] = await prepare_image_upload(image)
 
     # Update ke Odoo
     if data_dict:
-        patient_model.write([patient_id], data_dict)
+        await run_in_threadpool(patient_model.write, [patient_id], data_dict)
+    if "image" in data_dict:
+        patient_image_cache.invalidate(f"{patient_id}-")
 
     # Ambil data yang sudah di-update
-    patient = patient_model.read([patient_id], fields=[
-        'id', 'name', 'date_of_birth', 'gender', 'is_minor', 'guardian', 'tag_ids', 'image'
-    ])
+    patient = await run_in_threadpool(patient_model.read, [patient_id], fields=PATIENT_FIELDS)
 
-    return patient[0]
+    return with_image_url(patient, "full")[0]
 
 @router.delete("/{patient_id}")
 def delete_patient(patient_id: int, user=Depends(get_odoo_user)):
@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends
+from dependencies.auth_dep import get_odoo_user
+from odoo_client.transport import pool_stats
+from odoo_client import base_model, async_model
+from helper.geocode_cache import geocode_cache
+from routers.vehicle_fleet_routes import karlo_queue
+from helper.fleet_index import fleet_index
+from helper.position_store import position_store
+from auth.session_store import session_store
+from helper.image_cache import patient_image_cache
+from helper.appointment_view import appointment_views
+from helper.replica import replica
+from helper.etag import etag_stats
+from helper.server_timing import TimedRoute
+from odoo_client.result_cache import result_cache
+from helper.rpc_budget import rpc_patterns
+from odoo_client.limiter import odoo_guard
+from odoo_client.hedging import hedger
+from helper.shared_store import shared_store
+
+router = APIRouter(prefix="/stats", tags=["Stats"], route_class=TimedRoute)
+
+@router.get("/odoo-pool")
+def get_odoo_pool_stats(user=Depends(get_odoo_user)):
+    return pool_stats()
+
+@router.get("/read-coalescing")
+def get_read_coalescing_stats(user=Depends(get_odoo_user)):
+    return {
+        "sync": base_model.read_coalescer.snapshot() if base_model.read_coalescer else None,
+        "async": async_model.read_coalescer.snapshot() if async_model.read_coalescer else None,
+    }
+
+@router.get("/geocode-cache")
+def get_geocode_cache_stats(user=Depends(get_odoo_user)):
+    return geocode_cache.snapshot()
+
+@router.get("/karlo-queue")
+def get_karlo_queue_stats(user=Depends(get_odoo_user)):
+    return karlo_queue.snapshot()
+
+@router.get("/fleet-index")
+def get_fleet_index_stats(user=Depends(get_odoo_user)):
+    return fleet_index.snapshot()
+
+@router.get("/vehicle-positions")
+def get_vehicle_position_stats(user=Depends(get_odoo_user)):
+    return position_store.snapshot() if position_store is not None else {"enabled": False}
+
+@router.get("/patient-images")
+def get_patient_image_stats(user=Depends(get_odoo_user)):
+    return patient_image_cache.snapshot()
+
+@router.get("/appointment-view")
+def get_appointment_view_stats(user=Depends(get_odoo_user)):
+    return appointment_views.snapshot()
+
+@router.get("/replica")
+def get_replica_stats(user=Depends(get_odoo_user)):
+    return replica.snapshot()
+
+@router.get("/conditional-get")
+def get_conditional_get_stats(user=Depends(get_odoo_user)):
+    return etag_stats.snapshot()
+
+@router.get("/result-cache")
+def get_result_cache_stats(user=Depends(get_odoo_user)):
+    return result_cache.snapshot() if result_cache is not None else {"enabled": False}
+
+@router.get("/rpc-patterns")
+def get_rpc_pattern_stats(user=Depends(get_odoo_user)):
+    return rpc_patterns.snapshot() if rpc_patterns is not None else {"enabled": False}
+
+@router.get("/sessions")
+def get_session_stats(user=Depends(get_odoo_user)):
+    return session_store.snapshot()
+
+@router.get("/odoo-limiter")
+def get_odoo_limiter_stats(user=Depends(get_odoo_user)):
+    return odoo_guard.snapshot()
+
+@router.get("/odoo-hedging")
+def get_odoo_hedging_stats(user=Depends(get_odoo_user)):
+    return hedger.snapshot() if hedger is not None else {"enabled": False}
+
+@router.get("/shared-store")
+def get_shared_store_stats(user=Depends(get_odoo_user)):
+    return shared_store.snapshot() if shared_store is not None else {"enabled": False}
@@ -1,59 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Form, File, UploadFile, Query, Response, Header
+from fastapi.responses import JSONResponse
 from typing import Optional, List
 from datetime import date
 from schemas.vehicle_fleet_schema import VehicleFleetCreate, VehicleFleetOut, VehicleFleetOutDetail
 from schemas.vehicle_location_schema import VehicleLocationCreate, VehicleLocationOut
-from schemas.vehicle_karlo_schema import VehicleKarloCreate, VehicleKarloOut
+from schemas.vehicle_karlo_schema import VehicleKarloCreate, VehicleKarloOut, VehicleKarloBulkOut
 from odoo_client.base_model import OdooModel
+from odoo_client.async_model import AsyncOdooModel
 from dependencies.auth_dep import get_odoo_user
-from helper.helper import preprocess_odoo_data, normalize_relations
+from helper.helper import preprocess_odoo_data, normalize_relations, is_access_fault
+from helper.geocode_cache import geocode_cache
+from helper.ingest_queue import IngestQueue
+from helper.fleet_index import fleet_index
+from helper.position_store import position_store, location_detail, LOCATION_FIELDS
+from helper.sparse_fields import parse_fields, sparse_response
+from helper.replica import read_model
+from helper.etag import make_etag, etag_matches, not_modified, etag_stats
+from helper.server_timing import TimedRoute
+from odoo_client.instrumentation import record_timing, record_items
+from odoo_client.deadline import call_timeout
+from config.settings import settings
 import base64
 import httpx
-from fastapi.concurrency import run_in_threadpool
+import xmlrpc.client
 import asyncio
+import time
 
-odoo_rpc_semaphore = asyncio.Semaphore(20)
+_geocoder_client = None
 
-async def safe_run_in_threadpool(func, *args, **kwargs):
-    async with odoo_rpc_semaphore:
-        return await run_in_threadpool(func, *args, **kwargs)
+def get_geocoder_client() -> httpx.AsyncClient:
+    global _geocoder_client
+    if _geocoder_client is None or _geocoder_client.is_closed:
+        _geocoder_client = httpx.AsyncClient(timeout=settings.GEOCODE_TIMEOUT)
+    return _geocoder_client
 
-async def get_address_from_coordinates(data: dict):
-    lat = data.get("latitude")
-    lon = data.get("longitude")
-
-    if lat is None or lon is None:
-        return None  # atau raise error
+async def close_geocoder_client():
+    global _geocoder_client
+    if _geocoder_client is not None:
+        await _geocoder_client.aclose()
+        _geocoder_client = None
 
-    url = "https://app-nominatim.sibasurya.com/reverse"
+async def fetch_address(lat: float, lon: float):
     params = {
         "lat": lat,
         "lon": lon,
         "format": "jsonv2"
     }
-
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        response = await client.get(url, params=params)
+    start = time.perf_counter()
+    try:
+        # sisa deadline request, paling lama GEOCODE_TIMEOUT
+        response = await get_geocoder_client().get(
+            settings.NOMINATIM_URL, params=params, timeout=call_timeout(settings.GEOCODE_TIMEOUT)
+        )
+    except httpx.TimeoutException:
+        # alamat opsional: lokasi tetap disimpan tanpa alamat
+        return None
+    finally:
+        record_timing("geocode", time.perf_counter() - start)
 
     if response.status_code == 200:
         return response.json()
     else:
         return None
 
+async def get_address_from_coordinates(data: dict):
+    lat = data.get("latitude")
+    lon = data.get("longitude")
+
+    if lat is None or lon is None:
+        return None  # atau raise error
+
+    # truk yang parkir / jalan pelan hampir selalu kena cache
+    return await geocode_cache.get_or_fetch(lat, lon, lambda: fetch_address(lat, lon))
+
 # ##############################################
-router = APIRouter(prefix="/vehicle", tags=["Vehicle"])
+router = APIRouter(prefix="/vehicle", tags=["Vehicle"], route_class=TimedRoute)
+
+FLEET_DETAIL_FIELDS = {"id": "id", "nopol": "nopol", "head": "head_id", "last_location": "last_location_id"}
+
+def remember_position(fleet_id: int, location_id: int, values: dict):
+    """Fix yang baru dibuat jadi posisi terakhir fleet di position store."""
+    if position_store is not None:
+        position_store.record(fleet_id, {"id": location_id, **values}, "ingest")
+
+def fleet_from_position(fleet_id: int, nopol: str, position: dict, sparse, if_none_match, response: Response):
+    """GET /vehicle/{nopol} tanpa RPC: head dari fleet index, lokasi dari position store."""
+    head = fleet_index.head(fleet_id)
+    # umur data dilaporkan lewat header, supaya ETag tetap mewakili isi body
+    headers = {"Age": str(int(position["age"])), "X-Position-Source": position["source"]}
+    etag = make_etag("vehicle.fleet", fleet_id, "position", position["location_id"], head and head["id"], sparse)
+    if etag_matches(if_none_match, etag):
+        etag_stats.record("vehicle", True)
+        return not_modified(etag, headers)
+    etag_stats.record("vehicle", False)
+    response.headers.update({"ETag": etag, **headers})
+    detail = {"id": fleet_id, "nopol": nopol, "head": head, "last_location": position["location"]}
+    if sparse:
+        return sparse_response(detail, VehicleFleetOutDetail, sparse, headers=response.headers)
+    return detail
 
 @router.get("/{nopol}", response_model=VehicleFleetOutDetail)
-def get_fleet(nopol: str, user=Depends(get_odoo_user)):
-    fleet_model = OdooModel("vehicle.fleet", user["uid"], user["username"], user["password"])
-    location_model = OdooModel("vehicle.location", user["uid"], user["username"], user["password"])
-
-    # cari ID berdasarkan nopol
-    fleet_ids = fleet_model.search([('nopol', '=', nopol)], limit=1)
+def get_fleet(
+    nopol: str,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Sparse fieldset, mis. `nopol,last_location`"),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_odoo_user)
+):
+    fleet_model = read_model("vehicle.fleet", user)
+    location_model = read_model("vehicle.location", user)
+    sparse = parse_fields(fields, VehicleFleetOutDetail)
+
+    # cari ID berdasarkan nopol (index lokal, fallback ke Odoo)
+    fleet_id = fleet_index.lookup(nopol, fleet_model)
 
-    if not fleet_ids:
+    if not fleet_id:
         raise HTTPException(status_code=404, detail="Fleet not found")
-    result = fleet_model.read(fleet_ids, fields=['id', 'nopol', 'head_id', 'last_location_id'])[0]
+
+    # posisi terakhir dari ingestion; miss / kedaluwarsa / belum tentu boleh dibaca
+    # uid ini lewat jalur RPC di bawah (record rule dicek Odoo)
+    position = position_store.get(fleet_id) if position_store is not None else None
+    if position is not None and fleet_index.readable(
+        fleet_id, user["uid"], OdooModel("vehicle.fleet", user["uid"], user["username"], user["password"])
+    ):
+        return fleet_from_position(fleet_id, nopol, position, sparse, if_none_match, response)
+
+    # nama field di response -> field Odoo; location hanya dibaca kalau diminta
+    read_fields = [FLEET_DETAIL_FIELDS[name] for name in sparse] if sparse else list(FLEET_DETAIL_FIELDS.values())
+    try:
+        result = fleet_model.read([fleet_id], fields=[*read_fields, '__last_update'])[0]
+    except xmlrpc.client.Fault as e:
+        # index dimuat dengan kredensial lain: fleet yang tidak boleh dibaca user ini
+        # tetap 404 (seperti search per user sebelumnya), bukan 500
+        if is_access_fault(e):
+            raise HTTPException(status_code=404, detail="Fleet not found")
+        raise
+
+    # fix lokasi baru selalu mengganti last_location_id (write_date fleet ikut berubah),
+    # jadi versi fleet cukup untuk ETag dan location tidak perlu dibaca saat 304
+    etag = make_etag("vehicle.fleet", fleet_id, result['__last_update'], sparse)
+    if etag_matches(if_none_match, etag):
+        etag_stats.record("vehicle", True)
+        return not_modified(etag)
+    etag_stats.record("vehicle", False)
+    response.headers["ETag"] = etag
 
     # Head
     head = None
@@ -66,35 +156,21 @@ def get_fleet(nopol: str, user=Depends(get_odoo_user)):
     # Last Location
     last_location = None
     if result.get("last_location_id"):
-        loc_data = location_model.read(
-            [result["last_location_id"][0]],
-            fields=[
-                'id', 'fleet_id', 'latitude', 'longitude', 'address', 'village',
-                'district', 'city', 'province', 'postcode', 'timestamp'
-            ]
-        )
+        loc_data = location_model.read([result["last_location_id"][0]], fields=LOCATION_FIELDS)
         if loc_data:
-            loc = loc_data[0]
-            last_location = {
-                "id": loc["id"],
-                "fleet_id": loc["fleet_id"][0] if isinstance(loc["fleet_id"], list) else loc["fleet_id"],
-                "latitude": loc.get("latitude"),
-                "longitude": loc.get("longitude"),
-                "address": loc.get("address"),
-                "village": loc.get("village"), 
-                "district": loc.get("district"),
-                "city": loc.get("city"),
-                "province": loc.get("province"),
-                "postcode": loc.get("postcode"),
-                "timestamp": loc.get("timestamp"),
-            }
+            last_location = location_detail(loc_data[0])
+    if position_store is not None and "last_location_id" in result:
+        position_store.record(fleet_id, last_location, "odoo", replace=True)
 
-    return {
+    detail = {
         "id": result["id"],
-        "nopol": result["nopol"],
+        "nopol": result.get("nopol"),
         "head": head,
         "last_location": last_location
     }
+    if sparse:
+        return sparse_response(detail, VehicleFleetOutDetail, sparse, headers=response.headers)
+    return detail
 
 @router.post("/location/", response_model=VehicleLocationOut)
 def create_location(data: VehicleLocationCreate, user=Depends(get_odoo_user)):
@@ -104,64 +180,156 @@ def create_location(data: VehicleLocationCreate, user=Depends(get_odoo_user)):
     data_dict = preprocess_odoo_data(data.dict()) # process data
     
     fleet_id = data_dict.get("fleet_id")
-    fleet_exists = fleet_model.search([("id", "=", fleet_id)], limit=1)
-    if not fleet_exists:
+    # index dimuat dengan kredensial lain: fleet yang tidak boleh dibaca user ini juga 404
+    if not fleet_index.exists(fleet_id, fleet_model) or not fleet_index.readable(fleet_id, user["uid"], fleet_model):
         raise HTTPException(status_code=404, detail="Fleet ID not found")
 
     new_id = location_model.create(data_dict)
     location = location_model.read([new_id], fields=['id', 'fleet_id', 'latitude', 'longitude', 'address', 'village', 'district', 'city', 'province', 'postcode', 'timestamp'])
     # Normalisasi hasil
     clean_location = normalize_relations(location[0])
+    remember_position(fleet_id, new_id, location_detail(location[0]))
     return clean_location
 
+def build_location_values(data_dict: dict, address_data: Optional[dict], fleet_id: int) -> dict:
+    """Susun values vehicle.location dari payload Karlo + hasil reverse geocode."""
+    address_data = address_data or {}
+    address_line = address_data.get("address", {})
+    return {
+        "latitude": data_dict.get("latitude"),
+        "longitude": data_dict.get("longitude"),
+        "address": address_data.get("display_name") or address_line.get("road") or "",
+        "village": address_line.get("village") or address_line.get("hamlet") or address_line.get("neighbourhood") or address_line.get("residential") or "",
+        "district": address_line.get("state_district") or address_line.get("city_district") or address_line.get("suburb") or "",
+        "city": address_line.get("city") or address_line.get("town") or address_line.get("county") or address_line.get("municipality") or "",
+        "province": address_line.get("state") or address_line.get("region") or address_line.get("county") or "",
+        "postcode": address_line.get("postcode") or "",
+        "timestamp": data_dict.get("lastUpdated"),
+        "fleet_id": fleet_id
+    }
+
+async def ingest_karlo_fix(data: VehicleKarloCreate, user: dict):
+    """Dipakai worker antrian: search fleet + geocode paralel, lalu create lokasi."""
+    fleet_model = AsyncOdooModel("vehicle.fleet", user["uid"], user["username"], user["password"])
+    location_model = AsyncOdooModel("vehicle.location", user["uid"], user["username"], user["password"])
+
+    data_dict = preprocess_odoo_data(data.dict())
+    nopol = data_dict.get("plate_number")
+    fleet_id, address_data = await asyncio.gather(
+        fleet_index.lookup_async(nopol, fleet_model),
+        get_address_from_coordinates(data.dict())
+    )
+    if not fleet_id or not await fleet_index.readable_async(fleet_id, user["uid"], fleet_model):
+        raise LookupError(f"Fleet {nopol} not found")
+    values = build_location_values(data_dict, address_data, fleet_id)
+    new_id = await location_model.create(values)
+    remember_position(fleet_id, new_id, values)
+    return new_id
+
+karlo_queue = IngestQueue(
+    "karlo-ingest",
+    maxsize=settings.KARLO_QUEUE_SIZE,
+    workers=settings.KARLO_QUEUE_WORKERS,
+    handler=ingest_karlo_fix
+)
+
+def enqueue_karlo_fix(data: VehicleKarloCreate, user: dict):
+    # antrian penuh -> 429 supaya vendor GPS mundur dulu, bukan menumpuk request
+    if not karlo_queue.submit(data, user):
+        raise HTTPException(status_code=429, detail="Ingestion queue full", headers={"Retry-After": "1"})
+    return JSONResponse(status_code=202, content={
+        "status": "202 Accepted",
+        "nopol": data.plate_number,
+        "timestamp": data.lastUpdated.isoformat()
+    })
+
 @router.post("/karlo-update/")
 async def update_location(data: VehicleKarloCreate, user=Depends(get_odoo_user)):
-    fleet_model = OdooModel("vehicle.fleet", user["uid"], user["username"], user["password"])
-    location_model = OdooModel("vehicle.location", user["uid"], user["username"], user["password"])
+    if settings.KARLO_INGEST_MODE == "queue":
+        return enqueue_karlo_fix(data, user)
+
+    fleet_model = AsyncOdooModel("vehicle.fleet", user["uid"], user["username"], user["password"])
+    location_model = AsyncOdooModel("vehicle.location", user["uid"], user["username"], user["password"])
 
     data_dict = preprocess_odoo_data(data.dict()) # process data
     # cari ID berdasarkan nopol
     nopol = data_dict.get("plate_number")
-    # fleet_id = fleet_model.search([('nopol', '=', nopol)], limit=1)
-    # fleet_id = await run_in_threadpool(fleet_model.search, [('nopol', '=', nopol)], limit=1)
-    fleet_id = await safe_run_in_threadpool(fleet_model.search, [('nopol', '=', nopol)], limit=1)
-
+    fleet_id = await fleet_index.lookup_async(nopol, fleet_model)
 
-    if not fleet_id:
+    if not fleet_id or not await fleet_index.readable_async(fleet_id, user["uid"], fleet_model):
         raise HTTPException(status_code=404, detail="Fleet ID not found")
 
     # get address
     address_data = await get_address_from_coordinates(data.dict())
-    address_line = address_data.get("address", {})
     # save location
-    new_location = {
-        "latitude": data_dict.get("latitude"),
-        "longitude": data_dict.get("longitude"),
-        "address": address_data.get("display_name") or address_line.get("road") or "",
-        "village": address_line.get("village") or address_line.get("hamlet") or address_line.get("neighbourhood") or address_line.get("residential") or "",
-        "district": address_line.get("state_district") or address_line.get("city_district") or address_line.get("suburb") or "",
-        "city": address_line.get("city") or address_line.get("town") or address_line.get("county") or address_line.get("municipality") or "",
-        "province": address_line.get("state") or address_line.get("region") or address_line.get("county") or "",
-        "postcode": address_line.get("postcode") or "",
-        "timestamp": data_dict.get("lastUpdated"),
-        "fleet_id": fleet_id[0]
-    }
-    # new_id = location_model.create(new_location)
-    # new_id = await run_in_threadpool(location_model.create, new_location)
-    new_id = await safe_run_in_threadpool(location_model.create, new_location)
-        
+    new_location = build_location_values(data_dict, address_data, fleet_id)
+    new_id = await location_model.create(new_location)
+    remember_position(fleet_id, new_id, new_location)
+
     return {
-        "status": "200 OK", 
+        "status": "200 OK",
         "nopol": nopol,
         "timestamp": data_dict.get("lastUpdated")
         }
-    # return new_location 
+
+@router.post("/karlo-update/bulk/", response_model=VehicleKarloBulkOut)
+async def update_location_bulk(data: List[VehicleKarloCreate], user=Depends(get_odoo_user)):
+    if len(data) > settings.KARLO_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Maximum {settings.KARLO_BULK_MAX_ITEMS} fixes per request")
+    record_items(len(data))
+
+    fleet_model = AsyncOdooModel("vehicle.fleet", user["uid"], user["username"], user["password"])
+    location_model = AsyncOdooModel("vehicle.location", user["uid"], user["username"], user["password"])
+    semaphore = asyncio.Semaphore(settings.KARLO_BULK_CONCURRENCY)
+
+    # Nopol dari index lokal; yang belum ada dicari dengan satu search_read `in`
+    fleet_by_nopol = await fleet_index.lookup_many_async([fix.plate_number for fix in data], fleet_model)
+    # fleet yang tidak boleh dibaca user ini diperlakukan seperti tidak ada
+    readable = await fleet_index.readable_many_async(set(fleet_by_nopol.values()), user["uid"], fleet_model)
+    fleet_by_nopol = {nopol: fleet_id for nopol, fleet_id in fleet_by_nopol.items() if fleet_id in readable}
+
+    # Geocode hanya posisi unik (sudah dibulatkan sesuai presisi cache)
+    positions = {}
+    for fix in data:
+        if fix.plate_number in fleet_by_nopol:
+            positions.setdefault(geocode_cache.key(fix.latitude, fix.longitude), fix)
+
+    async def geocode(fix):
+        async with semaphore:
+            try:
+                return await get_address_from_coordinates({"latitude": fix.latitude, "longitude": fix.longitude})
+            except httpx.HTTPError:
+                return None
+
+    addresses = dict(zip(positions, await asyncio.gather(*[geocode(fix) for fix in positions.values()])))
+
+    async def create(index, fix):
+        fleet_id = fleet_by_nopol.get(fix.plate_number)
+        if fleet_id is None:
+            return {"index": index, "nopol": fix.plate_number, "status": "not_found", "detail": "Fleet ID not found"}
+        data_dict = preprocess_odoo_data(fix.dict())
+        address_data = addresses.get(geocode_cache.key(fix.latitude, fix.longitude))
+        values = build_location_values(data_dict, address_data, fleet_id)
+        async with semaphore:
+            try:
+                new_id = await location_model.create(values)
+            except Exception as e:
+                return {"index": index, "nopol": fix.plate_number, "status": "error", "detail": str(e)}
+        remember_position(fleet_id, new_id, values)
+        return {"index": index, "nopol": fix.plate_number, "status": "created", "location_id": new_id}
+
+    items = await asyncio.gather(*[create(index, fix) for index, fix in enumerate(data)])
+    created = sum(1 for item in items if item["status"] == "created")
+    return {"created": created, "failed": len(items) - created, "items": items}
 
 @router.post("/karlo-update2/")
 async def update_location2(data: VehicleKarloCreate, user=Depends(get_odoo_user)):
+    if settings.KARLO_INGEST_MODE == "queue":
+        return enqueue_karlo_fix(data, user)
+
     # Inisialisasi model Odoo
-    fleet_model = OdooModel("vehicle.fleet", user["uid"], user["username"], user["password"])
-    location_model = OdooModel("vehicle.location", user["uid"], user["username"], user["password"])
+    fleet_model = AsyncOdooModel("vehicle.fleet", user["uid"], user["username"], user["password"])
+    location_model = AsyncOdooModel("vehicle.location", user["uid"], user["username"], user["password"])
 
     # Preprocess data
     data_dict = preprocess_odoo_data(data.dict())
@@ -169,8 +337,7 @@ async def update_location2(data: VehicleKarloCreate, user=Depends(get_odoo_user)
 
     # Jalankan search dan get_address secara paralel
     search_task = asyncio.create_task(
-        # run_in_threadpool(fleet_model.search, [('nopol', '=', nopol)], limit=1)
-        safe_run_in_threadpool(fleet_model.search, [('nopol', '=', nopol)], limit=1)
+        fleet_index.lookup_async(nopol, fleet_model)
     )
     address_task = asyncio.create_task(
         get_address_from_coordinates(data.dict())
@@ -180,32 +347,18 @@ async def update_location2(data: VehicleKarloCreate, user=Depends(get_odoo_user)
     fleet_id, address_data = await asyncio.gather(search_task, address_task)
 
     # Validasi hasil search
-    if not fleet_id:
+    if not fleet_id or not await fleet_index.readable_async(fleet_id, user["uid"], fleet_model):
         raise HTTPException(status_code=404, detail="Fleet ID not found")
 
-    address_line = address_data.get("address", {})
-
     # Siapkan data lokasi
-    new_location = {
-        "latitude": data_dict.get("latitude"),
-        "longitude": data_dict.get("longitude"),
-        "address": address_data.get("display_name") or address_line.get("road") or "",
-        "village": address_line.get("village") or address_line.get("hamlet") or address_line.get("neighbourhood") or address_line.get("residential") or "",
-        "district": address_line.get("state_district") or address_line.get("city_district") or address_line.get("suburb") or "",
-        "city": address_line.get("city") or address_line.get("town") or address_line.get("county") or address_line.get("municipality") or "",
-        "province": address_line.get("state") or address_line.get("region") or address_line.get("county") or "",
-        "postcode": address_line.get("postcode") or "",
-        "timestamp": data_dict.get("lastUpdated"),
-        "fleet_id": fleet_id[0]
-    }
+    new_location = build_location_values(data_dict, address_data, fleet_id)
 
-    # Simpan data lokasi (juga di threadpool)
-    new_id = await run_in_threadpool(location_model.create, new_location)
-    new_id = await safe_run_in_threadpool(location_model.create, new_location)
+    # Simpan data lokasi
+    new_id = await location_model.create(new_location)
+    remember_position(fleet_id, new_id, new_location)
 
     return {
         "status": "200 OK",
         "nopol": nopol,
         "timestamp": data_dict.get("lastUpdated")
     }
-
@@ -27,7 +27,8 @@ class PatientUpdate(BaseModel):
 
 class PatientOut(PatientBase):
     id: int
-    image: Optional[str] = Field(None, description="Base64-encoded image")
+    image_url: Optional[str] = Field(None, description="URL gambar (GET /patients/{id}/image)")
+    image: Optional[str] = Field(None, description="Base64-encoded image, hanya lewat ?fields=image")
 
     @field_validator("guardian", "image", mode="before")
     @classmethod
@@ -41,7 +42,8 @@ class PatientOut(PatientBase):
 class PatientOutAll(PatientBase):
     id: int
     # image: Optional[str] = Field(None, description="Base64-encoded image")
-    image_small: Optional[str] = Field(None, description="Base64-encoded image")
+    image_url: Optional[str] = Field(None, description="URL gambar (GET /patients/{id}/image)")
+    image_small: Optional[str] = Field(None, description="Base64-encoded image, hanya lewat ?fields=image_small")
 
     @field_validator("guardian", "image_small", mode="before")
     @classmethod
@@ -23,3 +23,15 @@ class VehicleKarloCreate(VehicleKarloBase):
 class VehicleKarloOut(VehicleLocationBase):
     # id: int
     head: Optional[VehicleHeadOut] = None
+
+class VehicleKarloBulkItemOut(BaseModel):
+    index: int
+    nopol: str
+    status: str = Field(..., example="created")  # created / not_found / error
+    location_id: Optional[int] = None
+    detail: Optional[str] = None
+
+class VehicleKarloBulkOut(BaseModel):
+    created: int
+    failed: int
+    items: List[VehicleKarloBulkItemOut]
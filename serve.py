@@ -0,0 +1,177 @@
+"""
+Entry point produksi: pre-fork beberapa worker uvicorn dari app yang sudah dimuat.
+
+Master mengimport main.app sekali dan mengisi cache (fleet index) sebelum
+fork, jadi worker langsung hangat tanpa bulk load sendiri-sendiri. Semua
+worker berbagi satu socket listen; worker yang mati diganti, SIGTERM /
+SIGINT menghentikan semua worker dengan graceful shutdown uvicorn.
+
+Dengan lebih dari satu worker, sesi login, snapshot fleet index, cache
+geocode dan lease sync replica dibagi lewat SHARED_STORE_DB (SQLite,
+default .cache/shared.sqlite3), supaya worker tambahan tidak menambah
+beban ke Odoo lewat cache yang dingin per proses.
+
+    python serve.py --host 0.0.0.0 --port 8002
+    python serve.py --workers 4 --threads 32
+
+Default: worker = jumlah CPU yang boleh dipakai proses ini (WEB_WORKERS),
+thread per worker = 40 x CPU / worker, minimal 16 (WEB_THREADS).
+Untuk development tetap pakai `python main.py` (auto reload).
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+DEFAULT_SHARED_STORE = ".cache/shared.sqlite3"
+# worker yang mati secepat ini dianggap crash saat start: jeda sebelum diganti
+MIN_WORKER_LIFETIME = 1.0
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))  # ikut batas cpuset container
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def default_workers(cpus: int) -> int:
+    # handler sync menunggu Odoo di threadpool, jadi satu proses per core sudah cukup
+    return max(1, cpus)
+
+
+def default_threads(cpus: int, workers: int) -> int:
+    # 40 = default threadpool anyio untuk satu proses; dibagi rata ke worker
+    return max(16, 40 * cpus // workers)
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(config, sock):
+    import uvicorn
+
+    # handler sinyal master tidak berlaku di worker; uvicorn memasang miliknya sendiri
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def preload(args):
+    """Import app + isi cache di master; return (app, jumlah worker)."""
+    from config.settings import settings
+
+    cpus = available_cpus()
+    workers = args.workers or settings.WEB_WORKERS or default_workers(cpus)
+    threads = args.threads or settings.WEB_THREADS or default_threads(cpus, workers)
+    # settings dibaca modul lain saat import, jadi diisi sebelum main di-import
+    settings.WEB_THREADS = threads
+    if workers > 1 and not settings.SHARED_STORE_DB:
+        settings.SHARED_STORE_DB = args.shared_store
+    logger.info(
+        "CPU %d -> %d worker x %d thread, shared store: %s",
+        cpus, workers, threads, settings.SHARED_STORE_DB or "-",
+    )
+
+    from main import app, warm_up_caches
+    from odoo_client.transport import close_pools
+
+    try:
+        warm_up_caches()
+    except Exception:
+        logger.exception("Warm-up cache di master gagal; worker mengisi sendiri")
+    finally:
+        # koneksi keep-alive tidak boleh dipakai bersama beberapa proses
+        close_pools()
+    return app, workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork launcher uvicorn untuk main.app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--workers", type=int, default=0, help="0 = WEB_WORKERS / jumlah CPU")
+    parser.add_argument("--threads", type=int, default=0, help="thread per worker; 0 = WEB_THREADS / dari CPU")
+    parser.add_argument("--shared-store", default=DEFAULT_SHARED_STORE,
+                        help="path SQLite bersama kalau SHARED_STORE_DB kosong dan worker > 1")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--timeout-keep-alive", type=int, default=5)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    # Config dibuat sebelum preload supaya logging uvicorn sudah terpasang
+    config = uvicorn.Config(
+        None, log_level=args.log_level, access_log=not args.no_access_log,
+        timeout_keep_alive=args.timeout_keep_alive, backlog=args.backlog,
+    )
+    app, workers = preload(args)
+    config.app = app
+    sock = bind_socket(args.host, args.port, args.backlog)
+    logger.info("Listening on http://%s:%d", args.host, args.port)
+
+    children = {}  # pid -> waktu start
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(config, sock)
+            except SystemExit as e:  # mis. startup lifespan gagal
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception("Worker %d berhenti dengan error", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        logger.warning("Worker %d keluar (status %d), diganti", pid, os.waitstatus_to_exitcode(status))
+        if time.monotonic() - started < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)
+        spawn()
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Akses fleet per user di endpoint vehicle.
+
+Fleet index dimuat dengan kredensial lain, jadi endpoint yang menulis
+vehicle.location harus menolak (404) fleet yang tidak boleh dibaca user.
+Di stand-in, user `demo` hanya boleh membaca vehicle.fleet id 1..50.
+"""
+import pytest
+
+ALLOWED, DENIED = 10, 60
+
+
+def nopol(fleet_id):
+    return f"L-{1000 + fleet_id}-AB"
+
+
+def karlo_fix(fleet_id):
+    return {
+        "gps_imei": "356307042441013", "gps_vendor": "Teltonika", "gps_network": "4G",
+        "plate_number": nopol(fleet_id), "latitude": -7.25, "longitude": 112.75,
+        "altitude": 0.0, "bearing": 0.0, "speed": 30.0, "battery": 80.0,
+        "lastUpdated": "2025-01-01T00:00:00+00:00",
+    }
+
+
+@pytest.fixture(scope="module")
+def demo_headers(api_client):
+    # index dimuat lebih dulu dengan admin (berisi semua fleet), seperti akun service
+    assert api_client.get(f"/vehicle/{nopol(DENIED)}").status_code == 200
+    response = api_client.post("/auth/login", json={"username": "demo", "password": "demo"})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def locations_of(odoo_server, fleet_id):
+    with odoo_server.lock:
+        return sum(1 for loc in odoo_server.tables["vehicle.location"].values() if loc["fleet_id"] == fleet_id)
+
+
+@pytest.mark.parametrize("path", ["/vehicle/karlo-update/", "/vehicle/karlo-update2/"])
+def test_karlo_update_denied_fleet_is_404(path, api_client, odoo_server, demo_headers):
+    before = locations_of(odoo_server, DENIED)
+    response = api_client.post(path, json=karlo_fix(DENIED), headers=demo_headers)
+    assert response.status_code == 404
+    assert locations_of(odoo_server, DENIED) == before
+    assert api_client.post(path, json=karlo_fix(ALLOWED), headers=demo_headers).status_code == 200
+
+
+def test_create_location_denied_fleet_is_404(api_client, odoo_server, demo_headers):
+    before = locations_of(odoo_server, DENIED)
+    body = {"fleet_id": DENIED, "latitude": -7.25, "longitude": 112.75}
+    assert api_client.post("/vehicle/location/", json=body, headers=demo_headers).status_code == 404
+    assert locations_of(odoo_server, DENIED) == before
+    body["fleet_id"] = ALLOWED
+    assert api_client.post("/vehicle/location/", json=body, headers=demo_headers).status_code == 200
+
+
+def test_bulk_skips_denied_fleet(api_client, odoo_server, demo_headers):
+    before = locations_of(odoo_server, DENIED)
+    response = api_client.post("/vehicle/karlo-update/bulk/", json=[karlo_fix(ALLOWED), karlo_fix(DENIED)],
+                               headers=demo_headers)
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["items"]] == ["created", "not_found"]
+    assert locations_of(odoo_server, DENIED) == before
+
+
+def test_queue_ingest_denied_fleet_is_not_found(api_client, odoo_server, demo_headers):
+    from routers.vehicle_fleet_routes import ingest_karlo_fix
+    from schemas.vehicle_karlo_schema import VehicleKarloCreate
+
+    user = {"uid": 6, "username": "demo", "password": "demo"}
+    before = locations_of(odoo_server, DENIED)
+    with pytest.raises(LookupError):
+        api_client.portal.call(ingest_karlo_fix, VehicleKarloCreate(**karlo_fix(DENIED)), user)
+    assert locations_of(odoo_server, DENIED) == before
+
+
+def test_get_fleet_denied_is_404(api_client, demo_headers):
+    assert api_client.get(f"/vehicle/{nopol(DENIED)}", headers=demo_headers).status_code == 404
+    assert api_client.get(f"/vehicle/{nopol(ALLOWED)}", headers=demo_headers).status_code == 200
+
+
+def test_new_fleet_after_access_load_is_readable(odoo_server):
+    from helper.fleet_index import FleetIndex
+    from odoo_client.base_model import OdooModel
+
+    index = FleetIndex(refresh_interval=60.0, reload_interval=3600.0)
+    admin_fleets = OdooModel("vehicle.fleet", 2, "admin", "1234")
+    demo_fleets = OdooModel("vehicle.fleet", 6, "demo", "demo")
+    assert index.readable(DENIED, 2, admin_fleets)
+    assert index.readable(ALLOWED, 6, demo_fleets)
+    assert not index.readable(DENIED, 6, demo_fleets)
+
+    # fleet yang dibuat setelah daftar dimuat: dicek ulang dengan search milik uid
+    with odoo_server.lock:
+        new_id = odoo_server._create("vehicle.fleet", {"nopol": "L-9999-ZZ"})
+    assert index.readable(new_id, 2, admin_fleets)
+    assert not index.readable(new_id, 6, demo_fleets)  # di luar record rule demo
+    snapshot = index.snapshot()
+    assert snapshot["access_loads"] == 2
+    assert snapshot["access_denied"] == 2
@@ -0,0 +1,112 @@
+"""
+FleetIndex: bulk load sekali, refresh inkremental lewat write_date,
+nopol yang belum ada dicari ke Odoo lalu disimpan.
+"""
+import asyncio
+import operator
+
+import pytest
+
+from helper.fleet_index import FleetIndex
+
+OPERATORS = {"=": operator.eq, ">=": operator.ge, ">": operator.gt, "in": lambda value, arg: value in arg}
+
+
+class FakeFleets:
+    def __init__(self, count):
+        self.records = {
+            i: {"id": i, "nopol": f"L-{1000 + i}-AB", "head_id": [i, f"H{i}"], "write_date": "2025-01-01 00:00:00"}
+            for i in range(1, count + 1)
+        }
+        self.calls = []
+
+    def _match(self, domain):
+        return [
+            dict(rec) for rec in self.records.values()
+            if all(OPERATORS[op](rec[field], arg) for field, op, arg in domain)
+        ]
+
+    def search_read(self, domain=None, fields=None, limit=10):
+        self.calls.append(("search_read", domain, limit))
+        return self._match(domain or [])[:limit]
+
+    def search(self, domain=None, limit=10):
+        self.calls.append(("search", domain, limit))
+        return [rec["id"] for rec in self._match(domain or [])][:limit]
+
+
+class AsyncFleets:
+    def __init__(self, fleets):
+        self.fleets = fleets
+
+    async def search_read(self, **kwargs):
+        return self.fleets.search_read(**kwargs)
+
+    async def search(self, **kwargs):
+        return self.fleets.search(**kwargs)
+
+
+@pytest.fixture
+def fleets():
+    return FakeFleets(5)
+
+
+@pytest.fixture
+def index(fleets):
+    index = FleetIndex(refresh_interval=60.0, reload_interval=3600.0)
+    index.refresh(fleets, force=True)
+    fleets.calls.clear()
+    return index
+
+
+def expire_refresh(index):
+    index._last_refresh -= 61.0
+
+
+def test_bulk_load_then_lookup_without_rpc(index, fleets):
+    assert index.lookup("L-1003-AB", fleets) == 3
+    assert index.head(3) == {"id": 3, "nolambung": "H3"}
+    assert index.exists(5, fleets)
+    assert fleets.calls == []
+    assert index.snapshot()["size"] == 5
+
+
+def test_incremental_refresh_applies_changes(index, fleets):
+    fleets.records[2].update(nopol="L-2002-XY", write_date="2025-01-02 00:00:00")
+    expire_refresh(index)
+    assert index.lookup("L-2002-XY", fleets) == 2
+    (method, domain, limit), = fleets.calls
+    assert method == "search_read" and limit is None
+    assert domain[0][:2] == ("write_date", ">=")
+    # nopol lama dilepas dari index, jadi dicari ke Odoo (dan tidak ditemukan)
+    assert index.lookup("L-1002-AB", fleets) is None
+    assert index.snapshot()["watermark"] == "2025-01-02 00:00:00"
+
+
+def test_miss_falls_back_to_odoo_and_is_stored(index, fleets):
+    fleets.records[6] = {"id": 6, "nopol": "L-1006-AB", "head_id": False, "write_date": "2025-01-01 00:00:00"}
+    assert index.lookup("L-1006-AB", fleets) == 6
+    assert index.lookup("L-1006-AB", fleets) == 6
+    assert len(fleets.calls) == 1
+    assert index.head(6) is None
+    assert index.stats["fallback_hits"] == 1
+
+
+def test_lookup_many_resolves_misses_in_one_rpc(index, fleets):
+    for i in (6, 7):
+        fleets.records[i] = {"id": i, "nopol": f"L-{1000 + i}-AB", "head_id": False, "write_date": "2025-01-01 00:00:00"}
+    found = asyncio.run(index.lookup_many_async(["L-1001-AB", "L-1006-AB", "L-1007-AB", "L-9999-ZZ"], AsyncFleets(fleets)))
+    assert found == {"L-1001-AB": 1, "L-1006-AB": 6, "L-1007-AB": 7}
+    (method, domain, limit), = fleets.calls
+    assert domain[0][:2] == ("nopol", "in") and limit == 3
+
+
+def test_readable_is_loaded_once_per_uid(index, fleets):
+    denied_model = FakeFleets(3)  # uid lain hanya boleh membaca id 1..3
+    assert index.readable(2, 6, denied_model)
+    assert not index.readable(4, 6, denied_model)
+    assert [call[0] for call in denied_model.calls] == ["search", "search"]  # daftar + cek ulang id 4
+    assert asyncio.run(index.readable_many_async({1, 2, 3}, 6, AsyncFleets(denied_model))) == {1, 2, 3}
+    assert len(denied_model.calls) == 2
+    snapshot = index.snapshot()
+    assert snapshot["access_users"] == 1 and snapshot["access_denied"] == 1
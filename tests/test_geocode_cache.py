@@ -0,0 +1,75 @@
+"""
+GeocodeCache: tingkat SQLite tidak boleh memblokir event loop, dan miss
+bersamaan untuk koordinat yang sama tetap satu fetch.
+"""
+import asyncio
+import threading
+import time
+
+from helper.geocode_cache import GeocodeCache
+
+
+def make_cache(tmp_path):
+    return GeocodeCache(precision=4, max_size=100, ttl=3600.0, db_path=str(tmp_path / "geocode.sqlite3"))
+
+
+def test_disk_lock_does_not_block_event_loop(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.set(cache.key(-7.25, 112.75), {"display_name": "warm"})  # buka koneksi & tabel
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def fetch():
+            return {"display_name": "fresh"}
+
+        ticking = asyncio.create_task(ticker())
+        # worker lain memegang lock disk selama 0.3 detik
+        held = threading.Event()
+
+        def hold():
+            with cache._db_lock:
+                held.set()
+                time.sleep(0.3)
+
+        threading.Thread(target=hold).start()
+        held.wait()
+        value = await cache.get_or_fetch(-7.3, 112.8, fetch)
+        ticking.cancel()
+        await asyncio.gather(*cache._tasks)
+        return value, ticks
+
+    value, ticks = asyncio.run(scenario())
+    assert value == {"display_name": "fresh"}
+    assert ticks >= 10  # loop tetap jalan selama lookup disk menunggu lock
+
+    # write-behind sudah sampai ke disk: instance baru (mis. worker lain) dapat disk hit
+    other = make_cache(tmp_path)
+    assert other.get(other.key(-7.3, 112.8)) == {"display_name": "fresh"}
+    assert other.stats["disk_hits"] == 1
+
+
+def test_concurrent_misses_fetch_once(tmp_path):
+    cache = make_cache(tmp_path)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"display_name": "once"}
+
+    async def scenario():
+        results = await asyncio.gather(*[cache.get_or_fetch(-7.25, 112.75, fetch) for _ in range(5)])
+        await asyncio.gather(*cache._tasks)
+        return results
+
+    assert asyncio.run(scenario()) == [{"display_name": "once"}] * 5
+    assert calls == 1
+    assert cache.stats["misses"] == 1
@@ -0,0 +1,101 @@
+"""
+Hedging read: backup dikirim setelah kuantil latency, hasil pertama yang
+sukses dipakai, dan jumlah backup dibatasi token bucket.
+"""
+import asyncio
+import itertools
+import time
+
+from odoo_client.hedging import Hedger
+from odoo_client.transport import RpcAborted, abort_scope
+
+KEY = ("vehicle.fleet", "read")
+
+
+def make_hedger(max_ratio=1.0, min_samples=5):
+    hedger = Hedger(quantile=0.5, min_samples=min_samples, min_delay=0.01, max_ratio=max_ratio, workers=2)
+    for _ in range(min_samples):
+        hedger.latency.observe(KEY, 0.02)
+    return hedger
+
+
+def slow_primary():
+    """RPC palsu: panggilan pertama menggantung sampai scope-nya di-abort (seperti socket)."""
+    calls = itertools.count()
+
+    def fn():
+        if next(calls) > 0:
+            return "backup"
+        scope = abort_scope.get()
+        deadline = time.monotonic() + 2.0
+        while not scope.aborted:
+            if time.monotonic() > deadline:
+                return "primary"
+            time.sleep(0.005)
+        raise RpcAborted()
+
+    return fn, calls
+
+
+def test_no_hedge_without_latency_samples():
+    hedger = Hedger(quantile=0.5, min_samples=5, min_delay=0.01, max_ratio=1.0, workers=2)
+    assert hedger.call(*KEY, lambda: "primary") == "primary"
+    assert hedger.stats["hedged"] == 0
+    assert hedger.latency.snapshot()["vehicle.fleet.read"]["samples"] == 1
+
+
+def test_backup_wins_and_releases_primary():
+    hedger = make_hedger()
+    fn, calls = slow_primary()
+    start = time.monotonic()
+    assert hedger.call(*KEY, fn) == "backup"
+    assert time.monotonic() - start < 1.0  # primary diputus, tidak menunggu timeout-nya
+    assert next(calls) == 2
+    assert hedger.stats["hedged"] == 1
+    assert hedger.stats["backup_wins"] == 1
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = make_hedger()
+    calls = itertools.count()
+
+    def fn():
+        next(calls)
+        return "primary"
+
+    assert hedger.call(*KEY, fn) == "primary"
+    time.sleep(0.05)  # timer backup sudah lewat, tapi primary selesai lebih dulu
+    assert next(calls) == 1
+    assert hedger.stats["hedged"] == 0
+
+
+def test_backups_throttled_by_token_bucket():
+    hedger = make_hedger(max_ratio=0.1)
+    assert hedger.call(*KEY, lambda: time.sleep(0.05) or "primary") == "primary"
+    assert hedger.stats["hedged"] == 0
+    assert hedger.stats["throttled"] == 1
+
+
+def test_async_backup_wins_and_cancels_primary():
+    hedger = make_hedger()
+    calls = itertools.count()
+    cancelled = []
+
+    async def rpc(n):
+        if n == 0:
+            try:
+                await asyncio.sleep(2.0)
+            except asyncio.CancelledError:
+                cancelled.append(n)
+                raise
+            return "primary"
+        return "backup"
+
+    async def main():
+        result = await hedger.call_async(*KEY, lambda: rpc(next(calls)))
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == "backup"
+    assert cancelled == [0]
+    assert hedger.stats["backup_wins"] == 1
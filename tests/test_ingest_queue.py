@@ -0,0 +1,40 @@
+"""
+IngestQueue: item yang targetnya tidak ada dihitung terpisah dan di-log
+tanpa traceback; error lain tetap `failed` dengan traceback.
+"""
+import asyncio
+import logging
+
+from helper.ingest_queue import IngestQueue
+
+
+def run_items(items):
+    async def handler(item):
+        if item == "unknown":
+            raise LookupError("Fleet L-0000-XX not found")
+        if item == "broken":
+            raise RuntimeError("Odoo error")
+
+    async def scenario():
+        queue = IngestQueue("test-ingest", maxsize=10, workers=2, handler=handler)
+        queue.start()
+        for item in items:
+            assert queue.submit(item)
+        await queue.stop()
+        return queue.snapshot()
+
+    return asyncio.run(scenario())
+
+
+def test_not_found_is_counted_and_logged_without_traceback(caplog):
+    with caplog.at_level(logging.WARNING, logger="helper.ingest_queue"):
+        snapshot = run_items(["ok", "unknown", "unknown", "broken"])
+    assert snapshot["processed"] == 1
+    assert snapshot["not_found"] == 2
+    assert snapshot["failed"] == 1
+
+    not_found = [record for record in caplog.records if "not found" in record.getMessage()]
+    assert len(not_found) == 2
+    assert all(record.levelno == logging.WARNING and record.exc_info is None for record in not_found)
+    failed = [record for record in caplog.records if record.levelno == logging.ERROR]
+    assert len(failed) == 1 and failed[0].exc_info is not None
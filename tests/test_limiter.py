@@ -0,0 +1,107 @@
+"""
+Akuntansi error OdooGuard: error transport & timeout RPC dihitung limiter
+dan circuit breaker, deadline yang habis sebelum RPC dikirim tidak.
+"""
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from odoo_client.deadline import DeadlineExceeded, RpcTimeout, reset_deadline, rpc_timeout, set_deadline
+from odoo_client.limiter import AdaptiveLimiter, CircuitBreaker, OdooGuard, OdooUnavailable
+from odoo_client.transport import ConnectionPool
+
+
+def make_guard(min_calls=4):
+    breaker = CircuitBreaker(
+        window=30.0, min_calls=min_calls, error_ratio=0.5, slow_call_seconds=60.0,
+        slow_ratio=0.8, open_seconds=15.0, half_open_calls=1,
+    )
+    limiter = AdaptiveLimiter(initial=8, min_limit=1, max_limit=16, target_latency=60.0)
+    return OdooGuard(limiter=limiter, breaker=breaker, queue_timeout=1.0)
+
+
+@pytest.fixture
+def hung_odoo():
+    """Server yang menerima koneksi tapi tidak pernah menjawab (Odoo hang)."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(16)
+    accepted = []
+    stop = threading.Event()
+
+    def accept():
+        listener.settimeout(0.1)
+        while not stop.is_set():
+            try:
+                accepted.append(listener.accept()[0])
+            except socket.timeout:
+                continue
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{listener.getsockname()[1]}"
+    stop.set()
+    thread.join()
+    for conn in accepted:
+        conn.close()
+    listener.close()
+
+
+def test_rpc_timeout_opens_breaker():
+    guard = make_guard()
+    for _ in range(4):
+        with pytest.raises(RpcTimeout):
+            with guard.slot():
+                raise RpcTimeout()
+    assert guard.breaker.state == "open"
+    assert guard.limiter.stats["decreases"] == 1
+    with pytest.raises(OdooUnavailable):
+        with guard.slot():
+            pass
+
+
+def test_rpc_timeout_opens_breaker_async():
+    guard = make_guard()
+
+    async def call():
+        async with guard.slot_async():
+            raise RpcTimeout()
+
+    for _ in range(4):
+        with pytest.raises(RpcTimeout):
+            asyncio.run(call())
+    assert guard.breaker.state == "open"
+
+
+def test_hung_odoo_opens_breaker(hung_odoo):
+    guard = make_guard(min_calls=2)
+    pool = ConnectionPool(hung_odoo, size=2, idle_timeout=60.0)
+    for _ in range(2):
+        token = set_deadline(0.2)
+        try:
+            with pytest.raises(RpcTimeout):
+                with guard.slot():
+                    pool.request("/xmlrpc/2/object", b"<methodCall/>", [])
+        finally:
+            reset_deadline(token)
+    assert guard.breaker.state == "open"
+    assert pool.stats["discarded"] == 2
+
+
+def test_spent_deadline_is_not_a_failure():
+    guard = make_guard()
+    for _ in range(8):
+        token = set_deadline(-1.0)
+        try:
+            with pytest.raises(DeadlineExceeded) as raised:
+                with guard.slot():
+                    rpc_timeout()
+        finally:
+            reset_deadline(token)
+        assert not isinstance(raised.value, RpcTimeout)
+    snapshot = guard.breaker.snapshot()
+    assert snapshot["state"] == "closed"
+    assert snapshot["window_errors"] == 0
+    assert guard.limiter.stats["decreases"] == 0
@@ -0,0 +1,54 @@
+"""Keyset pagination: cursor = id terakhir, chunk berhenti di halaman pendek."""
+from fastapi import Response
+
+from helper.pagination import KEYSET_ORDER, iter_search_read, keyset_domain, set_next_cursor
+
+
+class FakeModel:
+    def __init__(self, count):
+        self.records = [{"id": i, "name": f"rec {i}"} for i in range(1, count + 1)]
+        self.calls = []
+
+    def search_read(self, domain=None, fields=None, limit=10, order=None):
+        self.calls.append((domain, limit, order))
+        after = max([leaf[2] for leaf in domain if leaf[0] == "id"], default=0)
+        return [dict(rec) for rec in self.records if rec["id"] > after][:limit]
+
+
+def test_keyset_domain_copies_and_appends():
+    base = [("state", "=", "draft")]
+    assert keyset_domain(base, 10) == [("state", "=", "draft"), ("id", ">", 10)]
+    assert base == [("state", "=", "draft")]
+    assert keyset_domain(None, None) == []
+
+
+def test_next_cursor_only_on_full_page():
+    response = Response()
+    set_next_cursor(response, [{"id": 3}, {"id": 7}], limit=2)
+    assert response.headers["X-Next-Cursor"] == "7"
+    response = Response()
+    set_next_cursor(response, [{"id": 3}], limit=2)
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_iter_search_read_chunks():
+    model = FakeModel(7)
+    ids = [rec["id"] for rec in iter_search_read(model, [], ["name"], chunk_size=3)]
+    assert ids == list(range(1, 8))
+    assert [call[0] for call in model.calls] == [[], [("id", ">", 3)], [("id", ">", 6)]]
+    assert all(call[2] == KEYSET_ORDER for call in model.calls)
+
+
+def test_iter_search_read_exact_multiple_and_cursor():
+    model = FakeModel(6)
+    ids = [rec["id"] for rec in iter_search_read(model, None, ["name"], chunk_size=3, after_id=2)]
+    assert ids == [3, 4, 5, 6]
+    assert len(model.calls) == 2  # halaman kedua pendek: tidak ada query kosong
+
+
+def test_iter_search_read_transform():
+    model = FakeModel(4)
+    records = iter_search_read(
+        model, [], ["name"], chunk_size=3, transform=lambda chunk: [{**rec, "chunk": len(chunk)} for rec in chunk]
+    )
+    assert [rec["chunk"] for rec in records] == [3, 3, 3, 1]
@@ -0,0 +1,70 @@
+"""PositionStore: location id terbesar menang, entry tua dianggap miss."""
+import time
+
+import pytest
+
+from helper.position_store import PositionStore
+from helper.shared_store import SharedStore
+
+
+def loc(location_id, fleet_id=1):
+    return {"id": location_id, "fleet_id": fleet_id, "latitude": -7.25, "longitude": 112.75}
+
+
+@pytest.fixture(params=["memory", "shared"])
+def stores(request, tmp_path):
+    if request.param == "memory":
+        store = PositionStore(max_age=60.0)
+        return store, store
+    path = str(tmp_path / "shared.db")
+    # dua worker dengan file shared store yang sama
+    return PositionStore(60.0, SharedStore(path)), PositionStore(60.0, SharedStore(path))
+
+
+def test_newer_location_wins(stores):
+    writer, reader = stores
+    assert writer.record(1, loc(10), "ingest")
+    assert not writer.record(1, loc(9), "ingest")  # fix yang selesai belakangan, tapi lebih tua
+    assert reader.get(1)["location"]["id"] == 10
+    assert writer.record(1, loc(11), "ingest")
+    assert reader.get(1)["location_id"] == 11
+    assert writer.stats["out_of_order"] == 1
+
+
+def test_replace_overrides_newer(stores):
+    writer, reader = stores
+    writer.record(1, loc(10), "ingest")
+    assert writer.record(1, None, "odoo", replace=True)  # lokasi terakhir dihapus di Odoo
+    entry = reader.get(1)
+    assert entry["location"] is None and entry["source"] == "odoo"
+
+
+def test_miss_and_expiry(monkeypatch):
+    store = PositionStore(max_age=60.0)
+    assert store.get(1) is None
+    store.record(1, loc(10), "ingest")
+    assert store.get(1)["age"] < 60.0
+    now = time.time()
+    monkeypatch.setattr("helper.position_store.time.time", lambda: now + 61.0)
+    assert store.get(1) is None
+    assert store.stats["misses"] == 1 and store.stats["expired"] == 1
+
+
+def test_seed_reads_last_locations_in_bulk():
+    class Fleets:
+        def search_read(self, domain=None, fields=None, limit=10):
+            return [{"id": 1, "last_location_id": [10, "x"]}, {"id": 2, "last_location_id": False}]
+
+    class Locations:
+        calls = []
+
+        def read(self, ids, fields=None):
+            self.calls.append(ids)
+            return [{"id": 10, "fleet_id": [1, "L-1001-AB"], "latitude": -7.0, "longitude": 112.0}]
+
+    store, locations = PositionStore(max_age=60.0), Locations()
+    store.seed(Fleets(), locations)
+    assert locations.calls == [[10]]
+    assert store.get(1)["location"]["fleet_id"] == 1
+    assert store.get(2)["location"] is None
+    assert store.stats["seeded"] == 2
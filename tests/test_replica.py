@@ -0,0 +1,26 @@
+"""
+read_model hanya memakai replica (data akun service) untuk model di
+REPLICA_MODELS; model lain tetap dibaca dengan kredensial user.
+"""
+from config.settings import settings
+from helper.replica import REPLICA_MODELS, ReplicaModel, read_model, replica
+from odoo_client.base_model import OdooModel
+
+USER = {"uid": 6, "username": "demo", "password": "demo"}
+
+
+def test_no_model_replicated_by_default():
+    assert settings.REPLICA_MODELS == []
+    assert replica.models == {}
+
+
+def test_read_model_only_serves_allowlisted_models(monkeypatch):
+    monkeypatch.setattr(settings, "REPLICA_ENABLED", True)
+    monkeypatch.setattr(replica, "models", {"res.partner": REPLICA_MODELS["res.partner"]})
+    monkeypatch.setattr(replica, "ready", lambda model: True)
+
+    assert isinstance(read_model("res.partner", USER), ReplicaModel)
+    for model in ("hospital.patient", "vehicle.fleet"):
+        odoo_model = read_model(model, USER)
+        assert type(odoo_model) is OdooModel
+        assert odoo_model.uid == USER["uid"]
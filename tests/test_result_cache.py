@@ -0,0 +1,86 @@
+"""
+Invalidasi ResultCache: write lewat API menghapus entry model itu dan
+model terkait, dan hasil RPC yang dimulai sebelum write tidak disimpan.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from odoo_client import signals
+from odoo_client.result_cache import ResultCache, cacheable
+
+TTLS = {"vehicle.fleet": 60.0, "hospital.appointment": 60.0}
+
+
+@pytest.fixture
+def cache():
+    cache = ResultCache(dict(TTLS), max_entries=3)
+    yield cache
+    for model in ("vehicle.fleet", "hospital.appointment", "vehicle.location",
+                  "hospital.appointment.line", "hospital.patient"):
+        signals.disconnect(model, cache._on_change)
+
+
+def key_for(cache, model, uid=2, args=()):
+    odoo_model = SimpleNamespace(db="db", uid=uid, password="pw", model=model)
+    return cache.key(odoo_model, "search_read", args)
+
+
+def store(cache, key, value):
+    hit, _, generation = cache.get(key)
+    assert not hit
+    cache.put(key, generation, value)
+
+
+def test_hit_returns_copy(cache):
+    key = key_for(cache, "vehicle.fleet")
+    store(cache, key, [{"id": 1}])
+    hit, value, _ = cache.get(key)
+    assert hit and value == [{"id": 1}]
+    value[0]["id"] = 99
+    assert cache.get(key)[1] == [{"id": 1}]
+
+
+def test_uid_is_part_of_key(cache):
+    store(cache, key_for(cache, "vehicle.fleet", uid=2), [{"id": 1}])
+    assert not cache.get(key_for(cache, "vehicle.fleet", uid=6))[0]
+
+
+def test_write_signal_invalidates_model_and_related(cache):
+    fleet, appointment = key_for(cache, "vehicle.fleet"), key_for(cache, "hospital.appointment")
+    store(cache, fleet, [{"id": 1}])
+    store(cache, appointment, [{"id": 2}])
+
+    # vehicle.location tidak di-cache, tapi mengubah last_location_id di vehicle.fleet
+    signals.notify("vehicle.location", "create", [5])
+    assert not cache.get(fleet)[0]
+    assert cache.get(appointment)[0]
+
+    signals.notify("hospital.appointment.line", "unlink", [7])
+    assert not cache.get(appointment)[0]
+    assert cache.stats["invalidations"] == 2
+
+
+def test_put_after_invalidation_is_dropped(cache):
+    key = key_for(cache, "vehicle.fleet")
+    _, _, generation = cache.get(key)
+    signals.notify("vehicle.fleet", "write", [1])  # write selesai saat RPC read masih jalan
+    cache.put(key, generation, [{"id": 1, "nopol": "lama"}])
+    assert not cache.get(key)[0]
+    assert cache.stats["stores"] == 0
+
+
+def test_lru_eviction(cache):
+    keys = [key_for(cache, "vehicle.fleet", args=(n,)) for n in range(4)]
+    for key in keys:
+        store(cache, key, [])
+    assert not cache.get(keys[0])[0]
+    assert cache.snapshot()["size"] == 3
+    assert cache.stats["evictions"] == 1
+
+
+def test_polling_queries_not_cacheable():
+    assert cacheable([("nopol", "=", "L-1001-AB")], ["id"], 1)
+    assert not cacheable([("write_date", ">=", "2025-01-01 00:00:00")], ["id"], 10)
+    assert not cacheable([], ["__last_update"], 1)
+    assert not cacheable([], ["id"], None)
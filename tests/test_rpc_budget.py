@@ -0,0 +1,152 @@
+"""
+Budget RPC per endpoint terhadap stand-in Odoo (loadtest/fake_odoo.py).
+
+Setiap route di RPC_BUDGETS / RPC_ITEM_BUDGETS dipanggil lewat TestClient
+dan dicek dengan `rpc_recorder.assert_budget()`, jadi round trip tambahan
+atau pola N+1 menggagalkan `pytest`.
+"""
+import random
+
+import pytest
+
+from loadtest.check_rpc_budget import appointment_write_flow
+from loadtest.run import SCENARIOS, discover
+
+REPEAT = 3
+
+
+@pytest.fixture(scope="module")
+def state(api_client):
+    return discover(api_client)
+
+
+@pytest.fixture
+def rnd():
+    return random.Random(0)
+
+
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+def test_load_scenario_budget(name, api_client, state, rnd, rpc_recorder):
+    scenario, _ = SCENARIOS[name]
+    for _ in range(REPEAT):
+        response = scenario(api_client, rnd, state)
+        assert response.status_code < 400, response.text
+    rpc_recorder.assert_budget()
+
+
+def test_appointment_write_flow_budget(api_client, state, rnd, rpc_recorder):
+    response = appointment_write_flow(api_client, rnd, state)
+    assert response.status_code < 400, response.text
+    rpc_recorder.assert_budget()
+
+
+@pytest.mark.parametrize("path, rpcs", [("/appointments/{}", 2), ("/patients/{}", 1)])
+def test_detail_conditional_budget(path, rpcs, api_client, state, rpc_recorder):
+    record_id = state["appointment_ids" if "appointments" in path else "patient_ids"][0]
+    url = path.format(record_id)
+    first = api_client.get(url)
+    assert first.status_code == 200
+    rpc_recorder.assert_budget(max_rpcs=rpcs)
+
+    # 304 hanya dari versi appointment / line
+    rpc_recorder.clear()
+    second = api_client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 304
+    rpc_recorder.assert_budget(max_rpcs=rpcs)
+
+    # ETag basi: versi dulu, lalu record lengkap; ETag baru sama dengan jalur tanpa If-None-Match
+    rpc_recorder.clear()
+    third = api_client.get(url, headers={"If-None-Match": '"stale"'})
+    assert third.status_code == 200
+    assert third.headers["ETag"] == first.headers["ETag"]
+    assert third.json() == first.json()
+    rpc_recorder.assert_budget()
+
+
+def test_login_budget(api_client, rpc_recorder):
+    response = api_client.post("/auth/login", json={"username": "admin", "password": "1234"})
+    assert response.status_code == 200
+    rpc_recorder.assert_budget()
+
+
+def test_patient_write_budget(api_client, rpc_recorder):
+    created = api_client.post("/patients/", data={"name": "Budget", "gender": "female"})
+    assert created.status_code == 200, created.text
+    patient_id = created.json()["id"]
+    assert api_client.put(f"/patients/{patient_id}", data={"guardian": "Budget"}).status_code == 200
+    assert api_client.delete(f"/patients/{patient_id}").status_code == 200
+    rpc_recorder.assert_budget()
+
+
+def test_appointment_createonly_budget(api_client, state, rpc_recorder):
+    created = api_client.post("/appointments/createonly/", json={
+        "patient_id": state["patient_ids"][0], "date_appointment": "2025-01-01",
+        "appointment_line_ids": [], "display_name": None, "total_qty": 0, "date_of_birth": None,
+    })
+    assert created.status_code == 200, created.text
+    appointment_id = created.json()["id"]
+    updated = api_client.put(f"/appointments/updateonly/{appointment_id}", json={"note": "budget"})
+    assert updated.status_code == 200, updated.text
+    assert api_client.delete(f"/appointments/{appointment_id}").status_code == 204
+    rpc_recorder.assert_budget()
+
+
+def test_appointment_line_delete_budget(api_client, state, rpc_recorder):
+    # POST /appointment_line/ belum bisa dipanggil (schema tanpa appointment_id), jadi
+    # line yang dihapus dibuat lewat POST /appointments/
+    created = api_client.post("/appointments/", json={
+        "patient_id": state["patient_ids"][0], "date_appointment": "2025-01-01",
+        "appointment_line_ids": [{"product_id": 1, "qty": 1}],
+        "display_name": None, "total_qty": 0, "date_of_birth": None,
+    })
+    assert created.status_code == 200, created.text
+    appointment = created.json()
+    line_id = appointment["appointment_line_ids"][0]["id"]
+    assert api_client.delete(f"/appointment_line/{line_id}").status_code == 204
+    assert api_client.delete(f"/appointments/{appointment['id']}").status_code == 204
+    rpc_recorder.assert_budget()
+
+
+def test_vehicle_location_budget(api_client, state, rnd, rpc_recorder):
+    created = api_client.post("/vehicle/location/", json={"fleet_id": 1, "latitude": -7.25, "longitude": 112.75})
+    assert created.status_code == 200, created.text
+    fix = {
+        "gps_imei": "356307042441013", "gps_vendor": "Teltonika", "gps_network": "4G",
+        "plate_number": state["nopols"][0], "latitude": -7.26, "longitude": 112.76,
+        "altitude": 0.0, "bearing": 0.0, "speed": 30.0, "battery": 80.0,
+        "lastUpdated": "2025-01-01T00:00:00+00:00",
+    }
+    assert api_client.post("/vehicle/karlo-update2/", json=fix).status_code == 200
+    rpc_recorder.assert_budget()
+
+
+@pytest.mark.parametrize("size", [1, 50])
+def test_karlo_bulk_budget_scales_per_item(size, api_client, state, rnd, rpc_recorder):
+    fixes = [
+        {
+            "gps_imei": "356307042441013", "gps_vendor": "Teltonika", "gps_network": "4G",
+            "plate_number": rnd.choice(state["nopols"]),
+            "latitude": -7.25 + rnd.random() / 10, "longitude": 112.75 + rnd.random() / 10,
+            "altitude": 0.0, "bearing": 0.0, "speed": 30.0, "battery": 80.0,
+            "lastUpdated": "2025-01-01T00:00:00+00:00",
+        }
+        for _ in range(size)
+    ]
+    response = api_client.post("/vehicle/karlo-update/bulk/", json=fixes)
+    assert response.status_code == 200, response.text
+    assert response.json()["created"] == size
+    rpc_recorder.assert_budget()
+
+
+def test_karlo_bulk_n_plus_one_fails_budget():
+    from helper.rpc_budget import check_record
+
+    # lookup fleet per fix (bukan satu search_read `in`) + satu create per fix
+    calls = [("vehicle.fleet", "search_read", 1), ("vehicle.location", "create", None)] * 10
+    record = {
+        "method": "POST", "route": "/vehicle/karlo-update/bulk/",
+        "calls": calls, "rpc_count": len(calls), "items": 10,
+    }
+    problems = check_record(record)
+    assert any("budget 13" in problem for problem in problems)
+    assert any("N+1 vehicle.fleet.search_read" in problem for problem in problems)
@@ -0,0 +1,75 @@
+"""SessionStore: idle timeout, revoke, cache token, dan sesi lintas worker."""
+import time
+
+import pytest
+
+from auth.session_store import SessionStore
+from helper.shared_store import SharedStore
+
+
+def make_store(shared=None, **kwargs):
+    options = {"idle_timeout": 60.0, "max_sessions": 100, "token_cache_size": 2, "recheck": 0.0}
+    options.update(kwargs)
+    return SessionStore(shared=shared, **options)
+
+
+def test_create_get_revoke():
+    store = make_store()
+    session = store.create(2, "admin", "1234", time.time() + 3600)
+    assert store.get(session.sid).as_user() == {"uid": 2, "username": "admin", "password": "1234", "sid": session.sid}
+    store.revoke(session.sid)
+    assert store.get(session.sid) is None
+    assert store.stats["revoked"] == 1
+
+
+def test_expired_and_idle_sessions_are_dropped():
+    store = make_store(idle_timeout=60.0)
+    expired = store.create(2, "admin", "1234", time.time() - 1)
+    idle = store.create(2, "admin", "1234", time.time() + 3600)
+    idle.last_seen -= 61.0
+    assert store.get(expired.sid) is None
+    assert store.get(idle.sid) is None
+    assert store.stats["expired"] == 2
+
+
+def test_max_sessions_drops_least_recent():
+    store = make_store(max_sessions=2)
+    first, second = (store.create(2, "admin", "1234", time.time() + 3600) for _ in range(2))
+    store.get(first.sid)
+    store.create(2, "admin", "1234", time.time() + 3600)
+    assert store.get(second.sid) is None
+    assert store.get(first.sid) is not None
+
+
+def test_token_cache_lru():
+    store = make_store(token_cache_size=2)
+    for n in range(3):
+        store.remember_token(f"t{n}", f"sid{n}", time.time() + 60)
+    assert store.cached_token("t0") is None
+    assert store.cached_token("t2")[0] == "sid2"
+    store.forget_token("t2")
+    assert store.cached_token("t2") is None
+    assert store.stats["token_cache_hits"] == 1
+
+
+@pytest.fixture
+def workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    return make_store(SharedStore(path)), make_store(SharedStore(path))
+
+
+def test_shared_session_visible_and_revoked_across_workers(workers):
+    first, second = workers
+    session = first.create(2, "admin", "1234", time.time() + 3600)
+    loaded = second.get(session.sid)
+    assert loaded.uid == 2 and loaded.password == "1234"
+    assert second.stats["shared_loads"] == 1
+    first.revoke(session.sid)  # logout di worker lain
+    assert second.get(session.sid) is None
+
+
+def test_shared_password_is_encrypted(workers):
+    first, _ = workers
+    session = first.create(2, "admin", "1234", time.time() + 3600)
+    stored = first.shared.get("session", session.sid)
+    assert stored["password"] != "1234"